@@ -17,6 +17,20 @@ from flask_socketio import SocketIO
 # モデルとルートのインポート
 from models import db, migrate
 from routes import register_routes
+from commands import register_commands
+from utils.compression import init_compression
+from utils.instrumentation import init_instrumentation, instrument_socketio
+from utils.profiling import init_profiling
+from utils.metrics import (
+    init_metrics, instrument_engine_options, instrument_socketio_emits, metrics_access_allowed, metrics_response
+)
+from utils.json_provider import init_json_provider
+from utils.passwords import init_password_hashing
+from utils.socketio_queue import socketio_queue_options
+from services.change_feed import init_change_feed
+from services.email_outbox import init_email_outbox
+from services.email_templates import init_email_templates
+from services.scheduler import init_scheduler
 
 
 
@@ -30,9 +44,29 @@ def create_app(config_name=None):
     app_config = config[config_name]
     app.config.from_object(app_config)
     app.config.from_object(config['development']) 
+
+    # JSONのエンコード・デコードに orjson を使う
+    init_json_provider(app)
+
+    # パスワードのハッシュ計算を eventlet のスレッドプールで行う
+    init_password_hashing(app)
     
     # CORS設定
     CORS(app, supports_credentials=True)
+
+    # リクエスト計測（Server-Timing ヘッダー・遅いリクエストのログ）
+    # 圧縮後のレスポンスサイズを記録するため圧縮より先に登録する
+    init_instrumentation(app)
+
+    # オンデマンドプロファイリング（管理者のヘッダー指定・抽出率）
+    init_profiling(app)
+
+    # レスポンス圧縮（Accept-Encoding に応じて gzip / brotli）
+    init_compression(app)
+    
+    # Prometheus メトリクス（DB接続プールの計測は db.init_app より前に設定する）
+    instrument_engine_options(app)
+    init_metrics(app)
     
     # 拡張機能の初期化
     db.init_app(app)
@@ -51,14 +85,35 @@ def create_app(config_name=None):
                 print("データベーステーブルを作成中...")
                 db.create_all()
                 print("データベーステーブルの作成が完了しました")
+
+            # 工数テーブルの先の月のパーティションを作成
+            from services.worklog_partition import ensure_worklog_partitions
+            created = ensure_worklog_partitions()
+            if created:
+                print(f"工数パーティションを{len(created)}件作成・移動しました: "
+                      + ", ".join(f"{name}({moved}行移動)" for name, moved in created))
         except Exception as e:
+            db.session.rollback()
             print(f"データベース初期化エラー: {e}")
     
-    # WebSocketの初期化
-    socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet")
+    # WebSocketの初期化（SOCKETIO_MESSAGE_QUEUE 指定時は全ワーカーに配信）
+    socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet", **socketio_queue_options(app))
+    # リクエスト中のSocket送信回数を計測
+    instrument_socketio(socketio)
+    instrument_socketio_emits(socketio)
     # SocketIOをアプリケーションのコンテキストに保存
     app.config['socketio'] = socketio
 
+    # 工数・チャットの変更を PostgreSQL から受け取って Socket.IO で通知する
+    init_change_feed(app, socketio)
+
+    # メールテンプレートのコンパイルと送信キューのワーカー
+    init_email_templates(app)
+    init_email_outbox(app, socketio)
+
+    # 定期ジョブ（パーティション作成・ダイジェスト・古いデータの削除）
+    init_scheduler(app, socketio)
+
     # Socket.IOイベントの登録
     from routes.socket_events import register_socket_events
     register_socket_events(socketio)
@@ -87,11 +142,22 @@ def create_app(config_name=None):
     
     # ルートの登録
     register_routes(app)
+
+    # CLIコマンドの登録
+    register_commands(app)
     
     # ヘルスチェックエンドポイント
     @app.route('/api/health', methods=['GET'])
     def health_check():
         return {'status': 'ok', 'message': 'API is running'}
+
+    # メトリクスエンドポイント（Prometheus のテキスト形式）
+    @app.route('/api/metrics', methods=['GET'], endpoint='metrics')
+    def metrics():
+        # METRICS_TOKEN の Bearer トークン、または管理者のログインが必要
+        if not metrics_access_allowed(app):
+            return jsonify({'error': '認証が必要です'}), 401
+        return metrics_response(app)
     
     return app, socketio
 
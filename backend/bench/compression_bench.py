@@ -0,0 +1,64 @@
+# bench/compression_bench.py - レスポンス圧縮の転送量とCPUコストを計測する
+#
+# 使い方（backend ディレクトリで実行）:
+#   python -m bench.compression_bench
+#   python -m bench.compression_bench --url http://localhost:5000/api/admin_worklog --token <JWT>
+
+import argparse
+import json
+import time
+
+from bench.payloads import ENDPOINT_PAYLOADS
+from utils.compression import brotli, compress_bytes
+
+LEVELS = [('gzip', 1), ('gzip', 6), ('gzip', 9), ('br', 1), ('br', 4), ('br', 6)]
+
+
+def measure(data, encoding, level, repeat):
+    """圧縮後サイズと1回あたりのCPU時間（ミリ秒）を返す"""
+    start = time.process_time()
+    for _ in range(repeat):
+        compressed = compress_bytes(data, encoding, level)
+    elapsed = (time.process_time() - start) / repeat
+    return len(compressed), elapsed * 1000
+
+
+def report(name, data, repeat):
+    print(f"\n{name}: 非圧縮 {len(data):,} bytes")
+    for encoding, level in LEVELS:
+        if encoding == 'br' and brotli is None:
+            continue
+        size, cpu_ms = measure(data, encoding, level, repeat)
+        ratio = size / len(data) * 100
+        print(f"  {encoding:<4} level {level}: {size:>10,} bytes ({ratio:5.1f}%)  CPU {cpu_ms:8.2f} ms")
+
+
+def fetch(url, token):
+    """実サーバーから非圧縮のレスポンス本文を取得する"""
+    from urllib.request import Request, urlopen
+    headers = {'Accept-Encoding': 'identity'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    with urlopen(Request(url, headers=headers)) as response:
+        return response.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='レスポンス圧縮のベンチマーク')
+    parser.add_argument('--url', action='append', help='計測する実エンドポイント（複数指定可）')
+    parser.add_argument('--token', help='JWTアクセストークン')
+    parser.add_argument('--repeat', type=int, default=5, help='圧縮の繰り返し回数')
+    args = parser.parse_args()
+
+    if args.url:
+        for url in args.url:
+            report(url, fetch(url, args.token), args.repeat)
+        return
+
+    for name, build in ENDPOINT_PAYLOADS.items():
+        data = json.dumps(build(), ensure_ascii=False).encode('utf-8')
+        report(name, data, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+# bench/login_rush.py - ログイン集中時にほかのリクエストが待たされないかを計測する
+#
+# 朝のログイン集中を想定して、ベンチ用ユーザーで同時に --logins 件ログインしながら、
+# 別のグリーンスレッドで軽いリクエスト（/api/health）を一定間隔で送り続け、その応答時間を
+# ログインなし（idle）とログイン中（rush）で比べる。
+# パスワードのハッシュ計算がハブを止めていると、rush の応答時間がハッシュ計算の合計時間まで伸びる。
+#
+# サーバーを PASSWORD_HASH_OFFLOAD=false / true で起動し直して2回実行すると比較できる。
+# --local を指定すると、サーバーやデータベースなしで utils/passwords.py の照合だけを
+# このプロセスのハブ上で同時に実行し、ハブの遅延（予定時刻からの遅れ）を両方の設定で計測する。
+#
+# 使い方（backend ディレクトリで実行）:
+#   python -m bench.login_rush --base-url http://localhost:5000 --logins 200
+#   python -m bench.login_rush --local --logins 200 --threads 4
+
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import json
+import math
+import sys
+import time
+
+from bench.datagen import BENCH_EMPLOYEE_ID_START, BENCH_PASSWORD
+from bench.run import HttpTransport
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+def summarize(values):
+    return {
+        'count': len(values),
+        'p50': percentile(values, 0.50),
+        'p95': percentile(values, 0.95),
+        'max': max(values) if values else None
+    }
+
+
+def print_row(label, summary):
+    if not summary['count']:
+        print(f'  {label:<24}  (なし)')
+        return
+    print(f"  {label:<24} {summary['count']:>6}件  p50 {summary['p50']:>8.1f}ms  "
+          f"p95 {summary['p95']:>8.1f}ms  max {summary['max']:>8.1f}ms")
+
+
+class Prober:
+    """一定間隔で probe() を呼び、予定時刻から probe() が終わるまでの時間（ミリ秒）を記録する
+
+    ハブが止まっていると予定時刻に起きられないため、その待ち時間も含めて記録する。
+    """
+
+    def __init__(self, probe, interval):
+        self.probe = probe
+        self.interval = interval
+        self.samples = []
+        self.running = True
+
+    def run(self):
+        due = time.perf_counter()
+        while self.running:
+            self.probe()
+            finished = time.perf_counter()
+            self.samples.append((finished - due) * 1000)
+            due = finished + self.interval
+            eventlet.sleep(self.interval)
+
+    def take(self):
+        samples, self.samples = self.samples, []
+        return samples
+
+
+def run_phases(prober, rush, idle_seconds):
+    """ログインなしで idle_seconds 計測したあと、rush() の実行中を計測する
+
+    Returns:
+        dict: {'idle': 集計, 'rush': 集計, 'rush_seconds': rush() の所要時間, 'result': rush() の戻り値}
+    """
+    thread = eventlet.spawn(prober.run)
+    eventlet.sleep(idle_seconds)
+    idle = prober.take()
+
+    started = time.perf_counter()
+    result = rush()
+    rush_seconds = time.perf_counter() - started
+    # ログイン中に待たされていた分の計測を取りこぼさないように1回分待つ
+    eventlet.sleep(prober.interval * 2)
+    busy = prober.take()
+
+    prober.running = False
+    thread.wait()
+    return {'idle': summarize(idle), 'rush': summarize(busy), 'rush_seconds': rush_seconds, 'result': result}
+
+
+def http_rush(transport, logins, users):
+    """ベンチ用ユーザーで同時にログインし、(ログインの応答時間, 失敗数) を返す"""
+    latencies = []
+    failures = 0
+
+    def login(index):
+        nonlocal failures
+        employee_id = str(BENCH_EMPLOYEE_ID_START + index % users)
+        started = time.perf_counter()
+        status, _, _, _ = transport.request(
+            'POST', '/api/login', body={'employeeId': employee_id, 'password': BENCH_PASSWORD}
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        if status != 200:
+            failures += 1
+
+    pool = eventlet.GreenPool(logins)
+    for index in range(logins):
+        pool.spawn_n(login, index)
+    pool.waitall()
+    return latencies, failures
+
+
+def run_http(args):
+    transport = HttpTransport(args.base_url)
+    status, _, _, _ = transport.request('GET', '/api/health')
+    if status != 200:
+        print(f'{args.base_url} に接続できません（{status}）', file=sys.stderr)
+        return None
+
+    prober = Prober(lambda: transport.request('GET', '/api/health'), args.interval)
+    phases = run_phases(prober, lambda: http_rush(transport, args.logins, args.users), args.idle)
+    latencies, failures = phases['result']
+
+    print(f"同時ログイン {args.logins}件（{phases['rush_seconds']:.2f}秒、失敗 {failures}件）")
+    print_row('ログイン', summarize(latencies))
+    print_row('/api/health（idle）', phases['idle'])
+    print_row('/api/health（rush）', phases['rush'])
+    return {'logins': summarize(latencies), 'failures': failures,
+            'idle': phases['idle'], 'rush': phases['rush'], 'rush_seconds': phases['rush_seconds']}
+
+
+def run_local(args):
+    from flask import Flask
+    from werkzeug.security import generate_password_hash
+
+    from utils.passwords import init_password_hashing, verify_password
+
+    app = Flask(__name__)
+    app.config['PASSWORD_HASH_THREADS'] = args.threads
+    init_password_hashing(app)
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+
+    def rush():
+        def login(_):
+            with app.app_context():
+                assert verify_password(password_hash, BENCH_PASSWORD)
+        pool = eventlet.GreenPool(args.logins)
+        for index in range(args.logins):
+            pool.spawn_n(login, index)
+        pool.waitall()
+
+    # 何もしない probe の予定時刻からの遅れが、ハブが止まっている間ほかのリクエストが待たされる時間
+    results = {}
+    for offload in (False, True):
+        app.config['PASSWORD_HASH_OFFLOAD'] = offload
+        phases = run_phases(Prober(lambda: None, args.interval), rush, args.idle)
+        label = 'スレッドプール' if offload else 'ハブ上で直接'
+        print(f"{label}: 同時照合 {args.logins}件（{phases['rush_seconds']:.2f}秒）")
+        print_row('ハブの遅延（idle）', phases['idle'])
+        print_row('ハブの遅延（rush）', phases['rush'])
+        results['offload' if offload else 'inline'] = {
+            'idle': phases['idle'], 'rush': phases['rush'], 'rush_seconds': phases['rush_seconds']
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ログイン集中時のほかのリクエストの待ち時間の計測')
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--logins', type=int, default=200, help='同時に行うログインの件数')
+    parser.add_argument('--users', type=int, default=200, help='ログインに使うベンチ用ユーザー数')
+    parser.add_argument('--interval', type=float, default=0.02, help='計測用リクエストの間隔（秒）')
+    parser.add_argument('--idle', type=float, default=2.0, help='ログイン前に計測する時間（秒）')
+    parser.add_argument('--local', action='store_true', help='サーバーなしでハッシュ照合だけを計測する')
+    parser.add_argument('--threads', type=int, default=4, help='--local のスレッドプールのスレッド数')
+    parser.add_argument('--json-out', help='結果をJSONで書き出すファイル')
+    args = parser.parse_args()
+
+    result = run_local(args) if args.local else run_http(args)
+    if result is None:
+        return 1
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# bench/payloads.py - ベンチマーク用のレスポンス形状のダミーデータ
+
+import random
+from datetime import date, datetime, timedelta
+
+UNITS = ['組立', '溶接', '塗装', '検査', '出荷']
+WORK_TYPES = ['通常', '段取り', '手直し', '応援', '教育']
+STATUSES = ['draft'] * 8 + ['approved'] * 6 + ['pending_add', 'pending_edit', 'pending_delete', 'rejected_add']
+DEPARTMENTS = ['製造一課', '製造二課', '品質保証課', '生産管理課']
+POSITIONS = ['一般', '班長', '係長', '課長']
+REMARKS = ['', '', '', '部品待ちのため中断', '治具交換あり', '前日分の続き作業', '不具合対応（再検査）']
+
+
+def worklog_rows(count, seed=0, with_user=False):
+    """/worklog_history・/admin_worklog の workRows と同じ形のデータ"""
+    rng = random.Random(seed)
+    base = date(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        row = {
+            'id': i + 1,
+            'date': (base + timedelta(days=rng.randrange(365))).isoformat(),
+            'model': f'MD-{rng.randrange(100, 999)}',
+            'serialNumber': f'SN{rng.randrange(100000, 999999)}',
+            'workOrder': f'WO-{rng.randrange(10000, 99999)}',
+            'partNumber': f'PN-{rng.randrange(1000, 9999)}-{rng.randrange(10, 99)}',
+            'orderNumber': f'OD{rng.randrange(1000000, 9999999)}',
+            'quantity': str(rng.randrange(1, 50)),
+            'unitName': rng.choice(UNITS),
+            'workType': rng.choice(WORK_TYPES),
+            'minutes': str(rng.choice([15, 30, 45, 60, 90, 120, 240, 480])),
+            'remarks': rng.choice(REMARKS),
+            'status': rng.choice(STATUSES),
+            'editReason': '',
+            'originalId': None,
+        }
+        if with_user:
+            row.update({
+                'employeeId': f'{rng.randrange(1000, 9999)}',
+                'employeeName': f'社員{rng.randrange(1, 500)}',
+                'department': rng.choice(DEPARTMENTS),
+                'position': rng.choice(POSITIONS),
+            })
+        else:
+            row['updatedAt'] = (datetime(2024, 1, 1) + timedelta(minutes=rng.randrange(525600))).isoformat() + '+09:00'
+        rows.append(row)
+    return rows
+
+
+def users(count, seed=0):
+    """/users・/admin_users と同じ形のデータ"""
+    rng = random.Random(seed)
+    return [
+        {
+            'id': i + 1,
+            'employee_id': f'{1000 + i}',
+            'name': f'社員{i + 1}',
+            'department_name': rng.choice(DEPARTMENTS),
+            'position': rng.choice(POSITIONS),
+            'email': f'user{i + 1}@example.com',
+            'role_level': rng.choice([1, 1, 1, 2, 3]),
+            'default_unit': rng.choice(UNITS + [None]),
+            'created_at': (datetime(2024, 1, 1) + timedelta(days=rng.randrange(365))).isoformat(),
+            'last_active_page': rng.choice(['worklog', 'history', 'chat', None]),
+            'sound_enabled': rng.random() < 0.5,
+        }
+        for i in range(count)
+    ]
+
+
+def chat_messages(count, seed=0):
+    """/chat/messages/<user_id> と同じ形のデータ"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            'id': i + 1,
+            'sender_id': rng.choice([1, 2]),
+            'receiver_id': rng.choice([1, 2]),
+            'message': rng.choice(['了解です', '本日の工数を確認お願いします', '申請しました', '承認しました。ありがとうございます']),
+            'is_read': rng.random() < 0.9,
+            'is_edited': rng.random() < 0.05,
+            'created_at': (start + timedelta(minutes=i * 7)).isoformat() + '+09:00',
+            'updated_at': None,
+        }
+        for i in range(count)
+    ]
+
+
+# エンドポイント → 代表的なレスポンス
+ENDPOINT_PAYLOADS = {
+    '/admin_worklog (100件)': lambda: {'workRows': worklog_rows(100, with_user=True)},
+    '/admin_worklog?csv_export (20,000件)': lambda: {'workRows': worklog_rows(20000, with_user=True)},
+    '/worklog_history 従来方式 (5,000件)': lambda: {'workRows': worklog_rows(5000)},
+    '/users (1,000人)': lambda: users(1000),
+    '/admin_users (1,000人)': lambda: users(1000),
+    '/chat/messages (2,000件)': lambda: chat_messages(2000),
+}
@@ -0,0 +1,322 @@
+# bench/run.py - シナリオを再生してエンドポイントごとのレイテンシとSQL件数を計測する
+#
+# bench.datagen で作成したデータに対して bench.scenarios のシナリオを実行し、
+# 計測名ごとに p50 / p95 / p99（ミリ秒）と1リクエストあたりのSQL件数を表示する。
+# SQL件数はサーバーが返す Server-Timing ヘッダー（utils/instrumentation.py）から読む。
+#
+# ベースライン（JSON）を指定すると比較し、悪化していれば終了コード1で終わる。
+#   - p95 が ベースライン × (1 + --tolerance) を超え、かつ差が --min-delta-ms 以上
+#   - 1リクエストあたりのSQL件数が ベースライン + --query-tolerance を超える
+#   - 5xx のレスポンスがあった
+#
+# 使い方（backend ディレクトリで実行）:
+#   python -m bench.run --iterations 300                              # アプリをプロセス内で実行
+#   python -m bench.run --base-url http://localhost:5000 --concurrency 8
+#   python -m bench.run --write-baseline bench/baseline.json          # ベースラインを作成・更新
+#   python -m bench.run --baseline bench/baseline.json                # 比較（CI用）
+#
+# bench/baseline.json は bench.datagen --reset --users 200 --days 120（--seed 0）で作成したデータに
+# 対して、既定の引数（プロセス内・--iterations 200・--seed 0）で書き出したもの。
+# p95 は実行するマシンに依存するため、CI のマシンを変えた場合は --write-baseline で作り直す。
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+from bench.datagen import BENCH_EMPLOYEE_ID_START, BENCH_PASSWORD
+from bench.scenarios import SCENARIOS, build_schedule
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+BASELINE_VERSION = 1
+
+
+class InProcessTransport:
+    """Flask のテストクライアントでアプリを直接呼ぶ（ネットワークを含まない）"""
+
+    def __init__(self):
+        from app import app
+        self.app = app
+
+    def request(self, method, path, params=None, body=None, headers=None):
+        with self.app.test_client() as client:
+            response = client.open(path, method=method, query_string=params, json=body, headers=headers)
+            return response.status_code, response.headers, response.get_data(), response.is_json
+
+
+class HttpTransport:
+    """起動済みのサーバーに HTTP で送る"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, params=None, body=None, headers=None):
+        from urllib.error import HTTPError
+        from urllib.parse import urlencode
+        from urllib.request import Request, urlopen
+
+        url = self.base_url + path
+        if params:
+            url += '?' + urlencode(params)
+        headers = dict(headers or {})
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        try:
+            with urlopen(Request(url, data=data, headers=headers, method=method)) as response:
+                status, response_headers, content = response.status, response.headers, response.read()
+        except HTTPError as e:
+            status, response_headers, content = e.code, e.headers, e.read()
+        is_json = (response_headers.get('Content-Type') or '').startswith('application/json')
+        return status, response_headers, content, is_json
+
+
+class Recorder:
+    """計測名ごとの結果（スレッド間で共有）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}  # 計測名 → [(ミリ秒, SQL件数 or None, ステータス)]
+
+    def add(self, name, elapsed_ms, queries, status):
+        with self.lock:
+            self.samples.setdefault(name, []).append((elapsed_ms, queries, status))
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+
+class Session:
+    """ログイン済みの1ユーザー（シナリオから呼ばれる）"""
+
+    def __init__(self, transport, recorder, user, token):
+        self.transport = transport
+        self.recorder = recorder
+        self.user = user
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def _send(self, name, method, path, params=None, body=None):
+        start = time.perf_counter()
+        status, headers, content, is_json = self.transport.request(method, path, params, body, self.headers)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        queries = None
+        match = SERVER_TIMING_QUERIES.search(headers.get('Server-Timing') or '')
+        if match:
+            queries = int(match.group(1))
+        self.recorder.add(name, elapsed_ms, queries, status)
+
+        if status >= 400 or not is_json:
+            return None
+        return json.loads(content)
+
+    def get(self, name, path, params=None):
+        return self._send(name, 'GET', path, params)
+
+    def post(self, name, path, body):
+        return self._send(name, 'POST', path, body=body)
+
+    def put(self, name, path, body):
+        return self._send(name, 'PUT', path, body=body)
+
+    def delete(self, name, path):
+        return self._send(name, 'DELETE', path)
+
+
+def login(transport, employee_id):
+    status, _, content, _ = transport.request(
+        'POST', '/api/login', body={'employeeId': employee_id, 'password': BENCH_PASSWORD}
+    )
+    if status != 200:
+        raise RuntimeError(f'社員ID {employee_id} でログインできません（{status}）。bench.datagen でデータを作成してください')
+    data = json.loads(content)
+    return data['user'], data['access_token']
+
+
+def create_sessions(transport, recorder, users):
+    """ベンチ用ユーザーでログインして (管理者, 社員) のセッションを返す"""
+    admin_sessions, member_sessions = [], []
+    for i in range(users):
+        user, token = login(transport, str(BENCH_EMPLOYEE_ID_START + i))
+        session = Session(transport, recorder, user, token)
+        (admin_sessions if user['role_level'] >= 2 else member_sessions).append(session)
+    if not admin_sessions or not member_sessions:
+        raise RuntimeError('管理者と社員の両方が必要です（--users と datagen の --admins を確認してください）')
+    return admin_sessions, member_sessions
+
+
+def run_schedule(schedule, admin_sessions, member_sessions, seed, today, concurrency):
+    """シナリオを順に（または concurrency 並列で）実行する"""
+    jobs = list(enumerate(schedule))
+    jobs_lock = threading.Lock()
+    errors = []
+
+    def worker():
+        while True:
+            with jobs_lock:
+                if not jobs:
+                    return
+                index, name = jobs.pop(0)
+            func, target, _ = SCENARIOS[name]
+            # シナリオごとに乱数を分けて、並列実行でも同じ内容のリクエストになるようにする
+            rng = random.Random(f'{seed}:{index}')
+            if target == 'admin':
+                pool = admin_sessions
+            elif target == 'member':
+                pool = member_sessions
+            else:
+                pool = admin_sessions + member_sessions
+            try:
+                func(rng.choice(pool), rng, today)
+            except Exception as e:
+                errors.append(f'{name}: {e}')
+
+    threads = [threading.Thread(target=worker) for _ in range(max(concurrency, 1))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def percentile(sorted_values, fraction):
+    """最近傍順位法のパーセンタイル"""
+    if not sorted_values:
+        return None
+    index = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """計測名 → 集計値"""
+    summary = {}
+    for name, rows in sorted(samples.items()):
+        latencies = sorted(elapsed for elapsed, _, _ in rows)
+        query_counts = [queries for _, queries, _ in rows if queries is not None]
+        summary[name] = {
+            'count': len(rows),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'queries_per_request': round(sum(query_counts) / len(query_counts), 2) if query_counts else None,
+            'errors_4xx': sum(1 for _, _, status in rows if 400 <= status < 500),
+            'errors_5xx': sum(1 for _, _, status in rows if status >= 500),
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'計測名':<32} {'件数':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'SQL/req':>8} {'4xx':>5} {'5xx':>5}")
+    for name, s in summary.items():
+        queries = f"{s['queries_per_request']:.1f}" if s['queries_per_request'] is not None else '-'
+        print(f"{name:<32} {s['count']:>6} {s['p50_ms']:>7.1f}ms {s['p95_ms']:>7.1f}ms {s['p99_ms']:>7.1f}ms "
+              f"{queries:>8} {s['errors_4xx']:>5} {s['errors_5xx']:>5}")
+
+
+def compare(summary, baseline, tolerance, min_delta_ms, query_tolerance):
+    """ベースラインとの比較結果（悪化した項目のメッセージのリスト）"""
+    regressions = []
+    for name, s in summary.items():
+        if s['errors_5xx']:
+            regressions.append(f"{name}: 5xx が {s['errors_5xx']} 件")
+        base = baseline['endpoints'].get(name)
+        if base is None:
+            print(f"  （ベースラインに無い計測名: {name}）")
+            continue
+        limit = base['p95_ms'] * (1 + tolerance)
+        if s['p95_ms'] > limit and s['p95_ms'] - base['p95_ms'] >= min_delta_ms:
+            regressions.append(f"{name}: p95 {s['p95_ms']:.1f}ms（ベースライン {base['p95_ms']:.1f}ms、上限 {limit:.1f}ms）")
+        if s['queries_per_request'] is not None and base.get('queries_per_request') is not None:
+            if s['queries_per_request'] > base['queries_per_request'] + query_tolerance:
+                regressions.append(
+                    f"{name}: SQL {s['queries_per_request']:.1f}件/req（ベースライン {base['queries_per_request']:.1f}件/req）"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='フロントエンドのシナリオを再生してレイテンシとSQL件数を計測する')
+    parser.add_argument('--base-url', help='起動済みサーバーのURL（省略時はアプリをプロセス内で実行）')
+    parser.add_argument('--iterations', type=int, default=200, help='実行するシナリオの回数')
+    parser.add_argument('--warmup', type=int, default=20, help='計測前に実行するシナリオの回数')
+    parser.add_argument('--concurrency', type=int, default=1, help='同時に実行するシナリオ数')
+    parser.add_argument('--users', type=int, default=50, help='ログインするベンチ用ユーザー数（先頭から）')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--today', type=date.fromisoformat, help='datagen に指定した基準日')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help='実行するシナリオ（複数指定可）')
+    parser.add_argument('--baseline', help='比較するベースラインのJSONファイル')
+    parser.add_argument('--write-baseline', help='結果をベースラインとして書き出すファイル')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='p95 の許容悪化率')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help='悪化とみなす p95 の最小差（ミリ秒）')
+    parser.add_argument('--query-tolerance', type=float, default=0.5, help='1リクエストあたりのSQL件数の許容増加')
+    args = parser.parse_args()
+
+    transport = HttpTransport(args.base_url) if args.base_url else InProcessTransport()
+    recorder = Recorder()
+    today = args.today or date.today()
+
+    admin_sessions, member_sessions = create_sessions(transport, recorder, args.users)
+
+    if args.warmup:
+        warmup = build_schedule(random.Random(f'{args.seed}:warmup'), args.warmup, args.scenario)
+        run_schedule(warmup, admin_sessions, member_sessions, f'{args.seed}:warmup', today, args.concurrency)
+    recorder.clear()
+
+    schedule = build_schedule(random.Random(args.seed), args.iterations, args.scenario)
+    started = time.perf_counter()
+    errors = run_schedule(schedule, admin_sessions, member_sessions, args.seed, today, args.concurrency)
+    elapsed = time.perf_counter() - started
+
+    summary = summarize(recorder.samples)
+    total = sum(s['count'] for s in summary.values())
+    print(f"シナリオ {args.iterations} 回 / リクエスト {total:,} 件 / {elapsed:.1f} 秒（並列 {args.concurrency}）\n")
+    print_summary(summary)
+    for error in errors:
+        print(f"シナリオのエラー: {error}", file=sys.stderr)
+
+    if args.write_baseline:
+        baseline = {
+            'version': BASELINE_VERSION,
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'params': {
+                'mode': 'http' if args.base_url else 'in-process',
+                'iterations': args.iterations,
+                'concurrency': args.concurrency,
+                'users': args.users,
+                'seed': args.seed,
+                'scenarios': args.scenario or sorted(SCENARIOS),
+            },
+            'endpoints': summary,
+        }
+        with open(args.write_baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\nベースラインを書き出しました: {args.write_baseline}")
+
+    if args.baseline:
+        try:
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"\nベースライン {args.baseline} がありません（--write-baseline で作成してください）", file=sys.stderr)
+            sys.exit(2)
+        print(f"\nベースライン {args.baseline}（{baseline['created_at']}）との比較")
+        regressions = compare(summary, baseline, args.tolerance, args.min_delta_ms, args.query_tolerance)
+        if errors:
+            regressions.extend(f'シナリオのエラー: {error}' for error in errors)
+        if regressions:
+            for message in regressions:
+                print(f"  NG {message}")
+            sys.exit(1)
+        print('  OK')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# bench/scenarios.py - フロントエンドの操作を再現するシナリオ
+#
+# frontend/src/services の workHistoryService.js・adminWorkService.js・chatService.js が
+# 実際に送るリクエスト（パス・クエリパラメータ・本文）をそのまま並べたもの。
+# 各シナリオは session.get / post / put / delete を呼び、計測は session 側で行う。
+# 計測名（第1引数）は同じエンドポイントでも使い方が違うものを分けて集計するためのもの。
+#
+# 書き込みを伴うシナリオは、追加した申請・メッセージを同じシナリオ内で取り消して
+# データ量が実行のたびに増えないようにしている。
+
+from datetime import timedelta
+
+from bench.datagen import DEPARTMENTS, UNITS
+
+STATUS_FILTERS = ['pending_add', 'pending_edit', 'pending_delete', 'approved', 'rejected_add']
+SORT_KEYS = ['date', 'unit_name', 'work_type', 'minutes', 'status']
+
+
+def _date_range(rng, today, max_days):
+    days = rng.choice([7, 14, 30, max_days])
+    return (today - timedelta(days=days)).isoformat(), today.isoformat()
+
+
+def work_history_browse(session, rng, today):
+    """工数履歴画面を開いてフィルター・ページ送り・並び替えをする（workHistoryService.js）"""
+    session.get('worklog_history/filter_options', '/api/worklog_history/filter_options')
+    session.get('worklog/unit-options', '/api/worklog/unit-options')
+    session.get('worklog_history?page', '/api/worklog_history', {'page': 1, 'per_page': 100})
+    session.get('worklog_history?page', '/api/worklog_history', {'page': 2, 'per_page': 100})
+
+    start_date, end_date = _date_range(rng, today, 90)
+    session.get('worklog_history?filter', '/api/worklog_history', {
+        'start_date': start_date,
+        'end_date': end_date,
+        'unit_name': rng.choice(UNITS),
+        'status': rng.choice(STATUS_FILTERS),
+    })
+    session.get('worklog_history?sort', '/api/worklog_history', {
+        'sort_by': rng.choice(SORT_KEYS),
+        'sort_order': rng.choice(['asc', 'desc']),
+    })
+
+
+def work_history_legacy(session, rng, today):
+    """パラメータなしの全件取得（旧画面・エクスポートの互換呼び出し）"""
+    session.get('worklog_history', '/api/worklog_history')
+
+
+def work_history_request_cycle(session, rng, today):
+    """追加申請して取り消す（workHistoryService.js の add → cancel）"""
+    unit_options = session.get('worklog/unit-options', '/api/worklog/unit-options') or []
+    unit = rng.choice(unit_options) if unit_options else {'name': rng.choice(UNITS), 'work_types': ['通常']}
+    added = session.post('worklog_history/add', '/api/worklog_history/add', {
+        'date': (today - timedelta(days=rng.randint(1, 5))).isoformat(),
+        'model': f'MD-{rng.randrange(100, 999)}',
+        'serialNumber': f'SN{rng.randrange(100000, 999999)}',
+        'workOrder': f'WO-{rng.randrange(10000, 99999)}',
+        'partNumber': f'PN-{rng.randrange(1000, 9999)}',
+        'orderNumber': '',
+        'quantity': str(rng.randrange(1, 20)),
+        'unitName': unit['name'],
+        'workType': rng.choice(unit['work_types'] or ['通常']),
+        'minutes': str(rng.choice([30, 60, 90])),
+        'remarks': 'ベンチマーク',
+        'editReason': '作業漏れのため追加',
+    })
+    if added and added.get('worklog'):
+        session.post('worklog_history/cancel', '/api/worklog_history/cancel', {
+            'id': added['worklog']['id'],
+            'status': 'pending_add',
+        })
+    session.get('worklog_history?page', '/api/worklog_history', {'page': 1, 'per_page': 100})
+
+
+def _admin_filters(rng, today):
+    start_date, end_date = _date_range(rng, today, 120)
+    filters = {'start_date': start_date, 'end_date': end_date}
+    if rng.random() < 0.5:
+        filters['unit_name'] = rng.choice(UNITS)
+    if rng.random() < 0.3:
+        filters['department'] = rng.choice(DEPARTMENTS)
+    if rng.random() < 0.5:
+        filters['status'] = rng.choice(STATUS_FILTERS)
+    return filters
+
+
+def admin_review(session, rng, today):
+    """管理者の工数一覧（件数 → 一覧 → ページ送り）（adminWorkService.js）"""
+    session.get('admin_worklog/default_unit', '/api/admin_worklog/default_unit')
+    filters = _admin_filters(rng, today)
+    session.get('admin_worklog?count_only', '/api/admin_worklog', {**filters, 'count_only': 'true'})
+    for page in (1, 2):
+        session.get('admin_worklog?page', '/api/admin_worklog', {
+            **filters,
+            'page': page,
+            'per_page': 100,
+            'sort_by': rng.choice(SORT_KEYS),
+            'sort_order': rng.choice(['asc', 'desc']),
+        })
+
+
+def admin_csv_export(session, rng, today):
+    """管理者のCSV出力（件数確認のあと csv_export=true で全件取得）"""
+    filters = _admin_filters(rng, today)
+    session.get('admin_worklog?count_only', '/api/admin_worklog', {**filters, 'count_only': 'true'})
+    session.get('admin_worklog?csv_export', '/api/admin_worklog', {
+        **filters,
+        'csv_export': 'true',
+        'sort_by': 'date',
+        'sort_order': 'desc',
+    })
+
+
+def chat_conversation(session, rng, today):
+    """スレッド一覧 → 履歴 → 送信・編集・削除（chatService.js）"""
+    threads = session.get('chat/threads', '/api/chat/threads') or []
+    if not threads:
+        return
+    partner = rng.choice(threads)
+    session.get('chat/messages/<user_id>', f"/api/chat/messages/{partner['id']}")
+    sent = session.post('chat/messages', '/api/chat/messages', {
+        'receiver_id': partner['id'],
+        'message': 'ベンチマークのメッセージです',
+    })
+    if not sent or not sent.get('messages'):
+        return
+    own = [m for m in sent['messages'] if m['sender_id'] == session.user['id']]
+    if own:
+        message_id = own[-1]['id']
+        session.put('chat/messages/<message_id>', f'/api/chat/messages/{message_id}', {'message': '（編集済み）ベンチマーク'})
+        session.delete('chat/messages/<message_id>', f'/api/chat/messages/{message_id}')
+
+
+# シナリオ名 → (関数, 対象ユーザー, 重み)
+SCENARIOS = {
+    'work_history_browse': (work_history_browse, 'member', 30),
+    'work_history_legacy': (work_history_legacy, 'member', 5),
+    'work_history_request_cycle': (work_history_request_cycle, 'member', 10),
+    'admin_review': (admin_review, 'admin', 25),
+    'admin_csv_export': (admin_csv_export, 'admin', 5),
+    'chat_conversation': (chat_conversation, 'any', 25),
+}
+
+
+def build_schedule(rng, iterations, names=None):
+    """重みに従ってシナリオの実行順を決める（同じ乱数なら同じ順番）"""
+    names = names or list(SCENARIOS)
+    weights = [SCENARIOS[name][2] for name in names]
+    return rng.choices(names, weights, k=iterations)
@@ -0,0 +1,119 @@
+# bench/serialization_bench.py - 一覧レスポンスのシリアライズ速度を計測する
+#
+# 従来方式（行ごとに辞書を手組み + 標準 json）と、行シリアライザー + orjson を比較する。
+#
+# 使い方（backend ディレクトリで実行）:
+#   python -m bench.serialization_bench --rows 50000
+
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+
+from pytz import timezone
+
+from bench.payloads import REMARKS, STATUSES, UNITS, WORK_TYPES
+from utils.serializers import WORKLOG_HISTORY_FIELDS, serialize_worklog_history_rows
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_rows(count, seed=0):
+    """WORKLOG_HISTORY_FIELDS の順のカラムタプル（DB から取得した行の代わり）"""
+    rng = random.Random(seed)
+    base = date(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        rows.append((
+            i + 1,
+            base + timedelta(days=rng.randrange(365)),
+            f'MD-{rng.randrange(100, 999)}',
+            f'SN{rng.randrange(100000, 999999)}',
+            f'WO-{rng.randrange(10000, 99999)}',
+            f'PN-{rng.randrange(1000, 9999)}',
+            None,
+            rng.choice([rng.randrange(1, 50), None]),
+            rng.choice(UNITS),
+            rng.choice(WORK_TYPES),
+            rng.choice([30, 60, 90, 120, 480]),
+            rng.choice(REMARKS) or None,
+            rng.choice(STATUSES),
+            None,
+            None,
+            datetime(2024, 1, 1) + timedelta(seconds=rng.randrange(31536000)),
+        ))
+    return rows
+
+
+def legacy_serialize(logs):
+    """従来の実装（リクエストごとに jst を作り、行ごとに辞書を手組み）"""
+    jst = timezone('Asia/Tokyo')
+    work_rows = []
+    for log in logs:
+        work_rows.append({
+            'id': log.id,
+            'date': log.date.isoformat() if log.date else '',
+            'model': log.model or '',
+            'serialNumber': log.serial_number or '',
+            'workOrder': log.work_order or '',
+            'partNumber': log.part_number or '',
+            'orderNumber': log.order_number or '',
+            'quantity': str(log.quantity) if log.quantity is not None else '',
+            'unitName': log.unit_name,
+            'workType': log.work_type,
+            'minutes': str(log.minutes),
+            'remarks': log.remarks or '',
+            'status': log.status,
+            'editReason': log.edit_reason or '',
+            'originalId': log.original_id,
+            'updatedAt': log.updated_at.replace(tzinfo=dt_timezone.utc).astimezone(jst).isoformat() if log.updated_at else None
+        })
+    return work_rows
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='一覧レスポンスのシリアライズ速度のベンチマーク')
+    parser.add_argument('--rows', type=int, default=50000, help='行数')
+    parser.add_argument('--repeat', type=int, default=3, help='繰り返し回数（最良値を表示）')
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    names = [column for _, column, _ in WORKLOG_HISTORY_FIELDS]
+    # ORM オブジェクトの代わり（属性アクセスのみ。ORM の組み立てコストは含まない）
+    objects = [SimpleNamespace(**dict(zip(names, row))) for row in rows]
+
+    def legacy():
+        return json.dumps({'workRows': legacy_serialize(objects)}, sort_keys=True).encode('utf-8')
+
+    def compiled_stdlib():
+        return json.dumps({'workRows': serialize_worklog_history_rows(rows)}).encode('utf-8')
+
+    cases = [('従来（手組み + json）', legacy), ('行シリアライザー + json', compiled_stdlib)]
+    if orjson is not None:
+        def compiled_orjson():
+            return orjson.dumps({'workRows': serialize_worklog_history_rows(rows)})
+        cases.append(('行シリアライザー + orjson', compiled_orjson))
+
+    print(f"{args.rows:,} 行")
+    for name, func in cases:
+        elapsed, body = timed(func, args.repeat)
+        print(f"  {name:<26} {elapsed * 1000:9.1f} ms  {args.rows / elapsed:12,.0f} rows/s  {len(body):,} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,385 @@
+# bench/socket_fanout.py - Socket.IO 通知の同時接続負荷テスト
+#
+# 起動済みのサーバー（eventlet ワーカー1つ）に対して、ベンチ用ユーザーの JWT で
+# Socket.IO クライアントを段階的に増やしながら接続し、HTTP API から
+#   - 追加申請（管理者全員への worklog_request_added_with_data）
+#   - 追加申請の承認（申請者への worklog_approved_with_data）
+#   - チャット送信（相手への chat_messages_updated）
+# を一定のレートで発生させて、HTTP リクエスト開始から各クライアントが通知を受け取るまでの
+# 時間（エンドツーエンドの通知レイテンシ）と、サーバーの常駐メモリ（接続あたり）を計測する。
+#
+# 通知の p95 が --max-p95-ms を超えるか、--timeout 以内に届かない通知が出た段階を
+# 「送信が詰まり始めた」とみなし、その手前の接続数を1ワーカーの上限の目安として表示する。
+#
+# 申請・承認・チャットのデータは実際に書き込まれるため、bench.datagen で作成した
+# ベンチ用データベースに対して実行し、終わったら datagen --reset で作り直す。
+#
+# 使い方（backend ディレクトリで実行。websocket-client が必要）:
+#   python -m bench.socket_fanout --base-url http://localhost:5000 --server-pid <PID> \
+#       --steps 50,100,200,400,800 --rate 20 --duration 30
+
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import time
+from datetime import date, timedelta
+
+try:
+    import socketio
+    import websocket  # noqa: F401 （python-socketio のクライアントが WebSocket 接続に使う）
+except ImportError:
+    socketio = None
+
+from bench.datagen import BENCH_EMPLOYEE_ID_START, UNITS
+from bench.run import HttpTransport, login
+
+# 計測対象のイベント
+ADDED_EVENT = 'worklog_request_added_with_data'
+APPROVED_EVENT = 'worklog_approved_with_data'
+CHAT_EVENT = 'chat_messages_updated'
+
+METRICS_RSS = re.compile(r'^process_resident_memory_bytes\s+([0-9.e+]+)$', re.MULTILINE)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+class Tracker:
+    """送信した操作と、各接続が受け取るはずの通知の対応を管理する"""
+
+    def __init__(self):
+        self.pending = {}      # (種類, 識別子) → [送信時刻, 未受信の接続IDの集合]
+        self.latencies = []    # 通知1件ごとのレイテンシ（ミリ秒）
+        self.http_latencies = []
+        self.unexpected = 0
+
+    def expect(self, key, sent_at, connection_ids):
+        if connection_ids:
+            self.pending[key] = [sent_at, set(connection_ids)]
+
+    def received(self, key, connection_id, received_at):
+        entry = self.pending.get(key)
+        if entry is None or connection_id not in entry[1]:
+            self.unexpected += 1
+            return
+        self.latencies.append((received_at - entry[0]) * 1000)
+        entry[1].discard(connection_id)
+        if not entry[1]:
+            del self.pending[key]
+
+    def outstanding(self):
+        return sum(len(receivers) for _, receivers in self.pending.values())
+
+    def reset(self):
+        self.pending.clear()
+        self.latencies = []
+        self.http_latencies = []
+        self.unexpected = 0
+
+
+class SimulatedClient:
+    """1接続分の Socket.IO クライアント（ブラウザのタブ1つに相当）"""
+
+    def __init__(self, connection_id, user, token, tracker):
+        self.connection_id = connection_id
+        self.user = user
+        self.token = token
+        self.tracker = tracker
+        self.client = socketio.Client(reconnection=False)
+        self.client.on(ADDED_EVENT, self._on_added)
+        self.client.on(APPROVED_EVENT, self._on_approved)
+        self.client.on(CHAT_EVENT, self._on_chat)
+
+    def connect(self, base_url):
+        self.client.connect(
+            base_url, headers={'Authorization': f'Bearer {self.token}'},
+            transports=['websocket'], wait_timeout=30
+        )
+
+    def disconnect(self):
+        self.client.disconnect()
+
+    def _on_added(self, data):
+        self.tracker.received(('add', data.get('employee_name')), self.connection_id, time.perf_counter())
+
+    def _on_approved(self, data):
+        self.tracker.received(('approve', data.get('worklog_id')), self.connection_id, time.perf_counter())
+
+    def _on_chat(self, data):
+        received_at = time.perf_counter()
+        # 本文に埋め込んだ識別子で送信と対応付ける
+        for message in reversed(data.get('messages') or []):
+            text = message.get('message') or ''
+            if text.startswith('fanout:'):
+                self.tracker.received(('chat', text), self.connection_id, received_at)
+                return
+
+
+class Driver:
+    """HTTP API で申請・承認・チャットを発生させる"""
+
+    def __init__(self, transport, tracker, sessions, rng, today):
+        self.transport = transport
+        self.tracker = tracker
+        self.sessions = sessions      # ユーザーID → (ユーザー, トークン)
+        self.rng = rng
+        self.today = today
+        self.connections = {}         # ユーザーID → [接続ID]
+        self.partners = {}            # ユーザーID → [チャット相手のユーザーID]
+        self.approvable = []          # (工数ID, 申請者のユーザーID)
+        self.sequence = 0
+        self.errors = 0
+
+    def add_connection(self, user_id, connection_id):
+        self.connections.setdefault(user_id, []).append(connection_id)
+
+    def _post(self, user_id, path, body):
+        _, token = self.sessions[user_id]
+        started = time.perf_counter()
+        status, _, content, is_json = self.transport.request(
+            'POST', path, body=body, headers={'Authorization': f'Bearer {token}'}
+        )
+        self.tracker.http_latencies.append((time.perf_counter() - started) * 1000)
+        if status >= 400:
+            self.errors += 1
+            return None
+        return json.loads(content) if is_json else None
+
+    def _connected(self, role):
+        return [
+            user_id for user_id in self.connections
+            if (self.sessions[user_id][0]['role_level'] >= 2) == (role == 'admin')
+        ]
+
+    def submit(self):
+        # 通知は社員名で対応付けるため、通知待ちの社員は次の申請をしない
+        members = [
+            u for u in self._connected('member')
+            if ('add', self.sessions[u][0]['name']) not in self.tracker.pending
+        ]
+        if not members:
+            return
+        user_id = self.rng.choice(members)
+        user = self.sessions[user_id][0]
+        unit = self.rng.choice(UNITS)
+        receivers = [
+            connection_id
+            for admin_id in self._connected('admin')
+            if self.sessions[admin_id][0]['default_unit'] in (None, unit)
+            for connection_id in self.connections[admin_id]
+        ]
+        self.tracker.expect(('add', user['name']), time.perf_counter(), receivers)
+        result = self._post(user_id, '/api/worklog_history/add', {
+            'date': (self.today - timedelta(days=1)).isoformat(),
+            'unitName': unit,
+            'workType': '通常',
+            'minutes': '60',
+            'remarks': 'fanout',
+            'editReason': '負荷テスト',
+        })
+        if result and result.get('worklog'):
+            self.approvable.append((result['worklog']['id'], user_id))
+
+    def approve(self):
+        admins = self._connected('admin')
+        if not self.approvable or not admins:
+            return
+        worklog_id, applicant_id = self.approvable.pop(0)
+        self.tracker.expect(('approve', worklog_id), time.perf_counter(), self.connections.get(applicant_id, []))
+        self._post(self.rng.choice(admins), '/api/approval_rejection/approve_add', {'worklog_id': worklog_id})
+
+    def chat(self):
+        senders = [u for u in self.connections if self.partners.get(u)]
+        if not senders:
+            return
+        sender_id = self.rng.choice(senders)
+        receiver_id = self.rng.choice(self.partners[sender_id])
+        self.sequence += 1
+        text = f'fanout:{self.sequence}'
+        self.tracker.expect(('chat', text), time.perf_counter(), self.connections.get(receiver_id, []))
+        self._post(sender_id, '/api/chat/messages', {'receiver_id': receiver_id, 'message': text})
+
+    def load_partners(self, user_id):
+        _, token = self.sessions[user_id]
+        status, _, content, _ = self.transport.request(
+            'GET', '/api/chat/threads', headers={'Authorization': f'Bearer {token}'}
+        )
+        if status == 200:
+            self.partners[user_id] = [thread['id'] for thread in json.loads(content)]
+
+
+def server_rss(transport, server_pid, metrics_token):
+    """サーバーの常駐メモリ（バイト）。--server-pid が無ければ /api/metrics から読む"""
+    if server_pid:
+        try:
+            with open(f'/proc/{server_pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+    headers = {'Authorization': f'Bearer {metrics_token}'} if metrics_token else {}
+    status, _, content, _ = transport.request('GET', '/api/metrics', headers=headers)
+    if status != 200:
+        return None
+    match = METRICS_RSS.search(content.decode('utf-8'))
+    return float(match.group(1)) if match else None
+
+
+def run_step(driver, tracker, rate, duration, mix, timeout):
+    """rate 件/秒で duration 秒間操作を発生させ、通知を待って結果を返す"""
+    actions = {'submit': driver.submit, 'approve': driver.approve, 'chat': driver.chat}
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    pool = eventlet.GreenPool(1000)
+
+    tracker.reset()
+    started = time.perf_counter()
+    count = 0
+    while time.perf_counter() - started < duration:
+        # 一定間隔で発生させる（処理が遅れても送信の間隔は変えない）
+        next_at = started + count / rate
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            eventlet.sleep(delay)
+        pool.spawn_n(actions[driver.rng.choices(names, weights)[0]])
+        count += 1
+    pool.waitall()
+
+    deadline = time.perf_counter() + timeout
+    while tracker.outstanding() and time.perf_counter() < deadline:
+        eventlet.sleep(0.05)
+
+    return {
+        'actions': count,
+        'notifications': len(tracker.latencies),
+        'lost': tracker.outstanding(),
+        'unexpected': tracker.unexpected,
+        'p50_ms': percentile(tracker.latencies, 0.50),
+        'p95_ms': percentile(tracker.latencies, 0.95),
+        'p99_ms': percentile(tracker.latencies, 0.99),
+        'http_p95_ms': percentile(tracker.http_latencies, 0.95),
+    }
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition(':')
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {'submit', 'approve', 'chat'}
+    if unknown:
+        raise argparse.ArgumentTypeError(f'不明な操作: {", ".join(sorted(unknown))}')
+    return mix
+
+
+def format_ms(value):
+    return f'{value:8.1f}' if value is not None else '       -'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Socket.IO 通知の同時接続負荷テスト')
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--steps', default='25,50,100,200,400', help='接続数の段階（カンマ区切り、累積）')
+    parser.add_argument('--users', type=int, default=200, help='ログインするベンチ用ユーザー数（接続数が多い場合は複数タブとして再利用）')
+    parser.add_argument('--rate', type=float, default=10.0, help='1秒あたりの操作数')
+    parser.add_argument('--duration', type=float, default=20.0, help='各段階の計測時間（秒）')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('submit:4,approve:3,chat:3'), help='操作の比率')
+    parser.add_argument('--timeout', type=float, default=10.0, help='通知を待つ時間（秒）。超えたものは未着とする')
+    parser.add_argument('--max-p95-ms', type=float, default=500.0, help='送信が詰まったとみなす通知の p95（ミリ秒）')
+    parser.add_argument('--server-pid', type=int, help='サーバーのプロセスID（同じマシンの場合。省略時は /api/metrics から）')
+    parser.add_argument('--metrics-token', help='/api/metrics のトークン')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json-out', help='結果をJSONで書き出すファイル')
+    args = parser.parse_args()
+
+    if socketio is None:
+        sys.exit('python-socketio のクライアントと websocket-client が必要です（pip install websocket-client）')
+
+    steps = sorted(int(step) for step in args.steps.split(','))
+    transport = HttpTransport(args.base_url)
+    tracker = Tracker()
+    rng = random.Random(args.seed)
+
+    sessions = {}
+    for i in range(args.users):
+        user, token = login(transport, str(BENCH_EMPLOYEE_ID_START + i))
+        sessions[user['id']] = (user, token)
+    # 管理者（受信側）から先に接続する
+    user_ids = sorted(sessions, key=lambda user_id: -sessions[user_id][0]['role_level'])
+
+    driver = Driver(transport, tracker, sessions, rng, date.today())
+    for user_id in user_ids:
+        driver.load_partners(user_id)
+
+    clients = []
+    results = []
+    baseline_rss = server_rss(transport, args.server_pid, args.metrics_token)
+    print(f"{'接続数':>6} {'操作':>6} {'通知':>7} {'未着':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'HTTP p95':>8} {'RSS MB':>8} {'KB/接続':>8}")
+
+    try:
+        for step in steps:
+            while len(clients) < step:
+                user_id = user_ids[len(clients) % len(user_ids)]
+                user, token = sessions[user_id]
+                client = SimulatedClient(len(clients), user, token, tracker)
+                client.connect(args.base_url)
+                clients.append(client)
+                driver.add_connection(user_id, client.connection_id)
+            eventlet.sleep(1)
+
+            rss = server_rss(transport, args.server_pid, args.metrics_token)
+            result = run_step(driver, tracker, args.rate, args.duration, args.mix, args.timeout)
+            result['connections'] = step
+            result['rss_bytes'] = rss
+            result['rss_per_connection_bytes'] = (
+                (rss - baseline_rss) / step if rss is not None and baseline_rss is not None else None
+            )
+            results.append(result)
+
+            rss_mb = f'{rss / 1048576:8.1f}' if rss is not None else '       -'
+            per_connection = result['rss_per_connection_bytes']
+            per_connection_kb = f'{per_connection / 1024:8.1f}' if per_connection is not None else '       -'
+            print(f"{step:>6} {result['actions']:>6} {result['notifications']:>7} {result['lost']:>5} "
+                  f"{format_ms(result['p50_ms'])} {format_ms(result['p95_ms'])} {format_ms(result['p99_ms'])} "
+                  f"{format_ms(result['http_p95_ms'])} {rss_mb} {per_connection_kb}")
+    finally:
+        for client in clients:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+
+    saturated = next(
+        (r for r in results if r['lost'] or (r['p95_ms'] is not None and r['p95_ms'] > args.max_p95_ms)),
+        None
+    )
+    print()
+    if saturated is None:
+        print(f"{steps[-1]} 接続まで通知の p95 は {args.max_p95_ms:.0f}ms 以内でした（上限に達していません）")
+    else:
+        ok = [r['connections'] for r in results if r['connections'] < saturated['connections']]
+        print(f"{saturated['connections']} 接続で通知が詰まり始めました"
+              f"（p95 {saturated['p95_ms'] or 0:.1f}ms、未着 {saturated['lost']} 件）。"
+              f"1ワーカーの上限の目安: {ok[-1] if ok else '-'} 接続（{args.rate:g} 操作/秒）")
+    if driver.errors:
+        print(f"HTTP エラー {driver.errors} 件", file=sys.stderr)
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump({'params': {k: v for k, v in vars(args).items() if k != 'metrics_token'},
+                       'steps': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# bench/time_format_bench.py - 日本時間への変換・文字列化の速度を計測する
+#
+# 使い方（backend ディレクトリで実行）:
+#   python -m bench.time_format_bench --rows 100000
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from utils.time_format import JST, format_jst, format_jst_column
+
+try:
+    import pytz
+except ImportError:
+    pytz = None
+
+
+def make_values(count, seed=0):
+    """UTC の naive datetime（1割は None）"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    return [
+        None if rng.random() < 0.1 else start + timedelta(seconds=rng.randrange(31536000), microseconds=rng.randrange(1000000))
+        for _ in range(count)
+    ]
+
+
+def timed(func, values, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(values)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='日本時間の文字列化のベンチマーク')
+    parser.add_argument('--rows', type=int, default=100000, help='件数')
+    parser.add_argument('--repeat', type=int, default=5, help='繰り返し回数（最良値を表示）')
+    args = parser.parse_args()
+
+    values = make_values(args.rows)
+    cases = []
+
+    if pytz is not None:
+        def pytz_per_call(values):
+            # 従来の chat.py の to_jst（呼び出しごとに timezone() を引く）
+            result = []
+            for dt in values:
+                if not dt:
+                    result.append(None)
+                    continue
+                result.append(pytz.utc.localize(dt).astimezone(pytz.timezone('Asia/Tokyo')).isoformat())
+            return result
+
+        def pytz_per_request(values):
+            # 従来の worklog_history.py（リクエストごとに jst を作り行ごとに変換）
+            jst = pytz.timezone('Asia/Tokyo')
+            return [dt.replace(tzinfo=dt_timezone.utc).astimezone(jst).isoformat() if dt else None for dt in values]
+
+        cases += [('pytz（呼び出しごと）', pytz_per_call), ('pytz（リクエストごと）', pytz_per_request)]
+
+    def zoneinfo_astimezone(values):
+        return [dt.replace(tzinfo=dt_timezone.utc).astimezone(JST).isoformat() if dt else None for dt in values]
+
+    def per_value(values):
+        return [format_jst(dt) for dt in values]
+
+    cases += [
+        ('zoneinfo astimezone', zoneinfo_astimezone),
+        ('format_jst（1件ずつ）', per_value),
+        ('format_jst_column', format_jst_column),
+    ]
+
+    expected = zoneinfo_astimezone(values)
+    print(f"{args.rows:,} 件")
+    for name, func in cases:
+        elapsed, result = timed(func, values, args.repeat)
+        mark = '' if result == expected else '  ※結果が一致しません'
+        print(f"  {name:<24} {elapsed * 1000:8.1f} ms  {args.rows / elapsed:12,.0f} 件/s{mark}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+from .worklog_import import import_worklogs_command
+from .worklog_partition import worklog_partitions_command
+from .email_outbox import email_outbox_command
+from .approval_digest import approval_digest_command
+from .scheduler import scheduler_command
+
+
+def register_commands(app):
+    """すべてのCLIコマンドをアプリケーションに登録する"""
+    app.cli.add_command(import_worklogs_command)
+    app.cli.add_command(worklog_partitions_command)
+    app.cli.add_command(email_outbox_command)
+    app.cli.add_command(approval_digest_command)
+    app.cli.add_command(scheduler_command)
+
+
+    # 他のコマンドをここに追加
@@ -0,0 +1,28 @@
+# commands/approval_digest.py
+
+import click
+from flask.cli import with_appcontext
+
+from services.approval_digest import send_approval_digests
+
+
+@click.group('approval-digest')
+def approval_digest_command():
+    """未処理申請のダイジェストメール"""
+
+
+@approval_digest_command.command('send')
+@click.option('--date', 'digest_date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='ダイジェストの日付（省略時は日本時間の今日）')
+@click.option('--dry-run', is_flag=True, help='送信せずに対象の一覧だけ表示する')
+@with_appcontext
+def send_command(digest_date, dry_run):
+    """承認待ちの申請がある管理者にダイジェストを送る（同じ日付では1人1通まで）
+
+    例: flask approval-digest send --date 2025-08-13
+    """
+    result = send_approval_digests(digest_date.date() if digest_date else None, dry_run=dry_run)
+    label = '送信対象' if dry_run else '送信キューに登録'
+    click.echo(f"{label}: {len(result['targets']) if dry_run else result['sent']}件（送信済み: {result['already_sent']}件）")
+    for employee_id, total in result['targets']:
+        click.echo(f"  {employee_id}: 未処理 {total}件")
@@ -0,0 +1,46 @@
+# commands/email_outbox.py
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func
+
+from models import db, EmailOutbox
+from services.email_outbox import EmailOutboxWorker
+
+
+@click.group('email-outbox')
+def email_outbox_command():
+    """メール送信キューの管理"""
+
+
+@email_outbox_command.command('drain')
+@with_appcontext
+def drain_command():
+    """送信待ちのメールをこのプロセスで送信する
+
+    例: SMTP_SERVER=localhost SMTP_PORT=8025 SMTP_SECURITY=none flask email-outbox drain
+    """
+    worker = EmailOutboxWorker(current_app._get_current_object())
+    processed = worker.drain()
+    click.echo(f"処理件数: {processed}（SMTP接続数: {worker.pool.opened}）")
+
+
+@email_outbox_command.command('status')
+@with_appcontext
+def status_command():
+    """ステータス別の件数を表示する"""
+    rows = db.session.query(EmailOutbox.status, func.count()).group_by(EmailOutbox.status).all()
+    for status, count in sorted(rows):
+        click.echo(f"{status}: {count}")
+
+
+@email_outbox_command.command('retry-failed')
+@with_appcontext
+def retry_failed_command():
+    """送信失敗（failed）のメールを送信待ちに戻す"""
+    count = EmailOutbox.query.filter_by(status='failed').update({
+        'status': 'pending', 'attempts': 0, 'next_attempt_at': func.now()
+    }, synchronize_session=False)
+    db.session.commit()
+    click.echo(f"送信待ちに戻した件数: {count}")
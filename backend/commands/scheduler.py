@@ -0,0 +1,63 @@
+# commands/scheduler.py
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from utils.time_format import format_jst
+
+
+def _scheduler():
+    return current_app.extensions['scheduler']
+
+
+@click.group('scheduler')
+def scheduler_command():
+    """定期ジョブの実行と確認"""
+
+
+@scheduler_command.command('run')
+@with_appcontext
+def run_command():
+    """定期ジョブを実行し続ける（Webプロセスとは別に動かす場合）
+
+    例: SCHEDULER_ENABLED=false で Web を起動し、別プロセスで flask scheduler run
+    """
+    scheduler = _scheduler()
+    click.echo(f"定期ジョブを開始します（{scheduler.worker_id}、{len(scheduler.jobs)}件）")
+    scheduler.run_forever()
+
+
+@scheduler_command.command('list')
+@with_appcontext
+def list_command():
+    """登録されているジョブと前回の実行結果を表示する"""
+    for job, row in _scheduler().status():
+        if row is None:
+            click.echo(f"{job.name}（{job.describe()}）: 未登録")
+            continue
+        click.echo(
+            f"{job.name}（{job.describe()}）: 次回 {format_jst(row.next_run_at)} / "
+            f"前回 {row.last_status or '-'} {row.last_duration_ms if row.last_duration_ms is not None else '-'}ms"
+            + (f" / 実行中: {row.locked_by}" if row.locked_by else '')
+        )
+        if row.last_status == 'failure' and row.last_error:
+            click.echo(f"  {row.last_error}")
+
+
+@scheduler_command.command('run-job')
+@click.argument('name')
+@with_appcontext
+def run_job_command(name):
+    """ジョブを今すぐ実行する
+
+    例: flask scheduler run-job approval_digest
+    """
+    try:
+        result = _scheduler().run_job(name)
+    except KeyError as e:
+        raise click.ClickException(str(e))
+    if result is None:
+        click.echo(f"{name} は他のプロセスで実行中です")
+    else:
+        click.echo(f"{name}: {'成功' if result else '失敗'}")
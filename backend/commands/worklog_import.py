@@ -0,0 +1,39 @@
+# commands/worklog_import.py
+
+import click
+from flask.cli import with_appcontext
+
+from services.worklog_import import import_worklogs
+
+
+@click.command('import-worklogs')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--dry-run', is_flag=True, help='検証のみ行い、書き込みはしない')
+@click.option('--errors-out', type=click.Path(dir_okay=False), help='行ごとのエラーを書き出すCSVファイル')
+@with_appcontext
+def import_worklogs_command(path, dry_run, errors_out):
+    """CSV / XLSX の工数データを一括で取り込む
+
+    例: flask import-worklogs history_2023.xlsx --errors-out errors.csv
+    """
+    with open(path, 'rb') as f:
+        result = import_worklogs(f, path, dry_run=dry_run)
+
+    click.echo(f"全件数: {result['total']}")
+    click.echo(f"有効件数: {result['valid']}")
+    click.echo(f"取り込み件数: {result['inserted']}")
+    click.echo(f"重複スキップ: {result['skipped']}")
+    click.echo(f"エラー件数: {len(result['errors'])}")
+
+    if errors_out:
+        import csv
+        with open(errors_out, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=['row', 'message'])
+            writer.writeheader()
+            writer.writerows(result['errors'])
+        click.echo(f"エラー一覧を出力しました: {errors_out}")
+    else:
+        for error in result['errors'][:20]:
+            click.echo(f"  行 {error['row']}: {error['message']}")
+        if len(result['errors']) > 20:
+            click.echo('  ...（--errors-out で全件を出力できます）')
@@ -0,0 +1,41 @@
+# commands/worklog_partition.py
+
+import click
+from flask.cli import with_appcontext
+
+from services.worklog_partition import ensure_worklog_partitions, archive_worklog_partitions
+
+
+@click.group('worklog-partitions')
+def worklog_partitions_command():
+    """工数テーブルの月次パーティション管理"""
+
+
+@worklog_partitions_command.command('ensure')
+@click.option('--months-ahead', type=int, default=None, help='先行作成する月数（省略時は設定値）')
+@with_appcontext
+def ensure_command(months_ahead):
+    """当月から先の月次パーティションを作成する
+
+    デフォルトパーティションに入っている月の行も、その月のパーティションへ移す。
+    """
+    created = ensure_worklog_partitions(months_ahead)
+    click.echo(f"作成・移動したパーティション数: {len(created)}")
+    for name, moved in created:
+        click.echo(f"  {name}  移動した行: {moved}")
+
+
+@worklog_partitions_command.command('archive')
+@click.option('--older-than-years', type=int, default=None, help='この年数より古い月をアーカイブ（省略時は設定値）')
+@click.option('--dry-run', is_flag=True, help='対象の一覧だけ表示する')
+@with_appcontext
+def archive_command(older_than_years, dry_run):
+    """古い月のパーティションをアーカイブスキーマへ移す
+
+    例: flask worklog-partitions archive --older-than-years 3
+    """
+    names = archive_worklog_partitions(older_than_years, dry_run=dry_run)
+    label = 'アーカイブ対象' if dry_run else 'アーカイブ済み'
+    click.echo(f"{label}: {len(names)}件")
+    for name in names:
+        click.echo(f"  {name}")
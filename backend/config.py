@@ -20,6 +20,65 @@ class Config:
     SMTP_USERNAME = os.getenv('SMTP_USERNAME')
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
     SENDER_EMAIL = os.getenv('SENDER_EMAIL')
+    SMTP_SECURITY = os.getenv('SMTP_SECURITY')  # ssl / starttls / none（未設定の場合は465番ならssl、それ以外はstarttls）
+    SMTP_TIMEOUT = int(os.getenv('SMTP_TIMEOUT', 30))
+    SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', 2))  # ワーカーごとのSMTP最大接続数
+
+    # メール送信キュー（email_outbox）
+    EMAIL_WORKER_ENABLED = os.getenv('EMAIL_WORKER_ENABLED', 'true').lower() == 'true'  # このプロセスで送信ワーカーを動かす
+    EMAIL_WORKER_CONCURRENCY = int(os.getenv('EMAIL_WORKER_CONCURRENCY', 2))
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 20))
+    EMAIL_OUTBOX_POLL_INTERVAL = int(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', 10))  # 秒
+    EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', 5))
+    EMAIL_RETRY_BASE_SECONDS = int(os.getenv('EMAIL_RETRY_BASE_SECONDS', 30))  # 最初の再試行までの秒数（以降は倍々）
+    EMAIL_TEMPLATES_AUTO_RELOAD = os.getenv('EMAIL_TEMPLATES_AUTO_RELOAD', 'false').lower() == 'true'  # メールテンプレートの変更を再起動なしで反映（DEBUG時は常に反映）
+    EMAIL_OUTBOX_RETENTION_DAYS = int(os.getenv('EMAIL_OUTBOX_RETENTION_DAYS', 30))  # 送信済みメールの保存日数
+
+    # 定期ジョブ
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true'  # Webプロセス内で実行（false の場合は flask scheduler run）
+    SCHEDULER_POLL_INTERVAL = int(os.getenv('SCHEDULER_POLL_INTERVAL', 30))  # 秒
+    APPROVAL_DIGEST_ENABLED = os.getenv('APPROVAL_DIGEST_ENABLED', 'true').lower() == 'true'
+    APPROVAL_DIGEST_TIME = os.getenv('APPROVAL_DIGEST_TIME', '08:00')  # 日本時間
+    CHAT_MESSAGE_RETENTION_DAYS = int(os.getenv('CHAT_MESSAGE_RETENTION_DAYS', 0))  # 既読メッセージの保存日数（0は削除しない）
+    PASSWORD_RESET_RETENTION_DAYS = int(os.getenv('PASSWORD_RESET_RETENTION_DAYS', 7))  # 使用済み・期限切れのリセットリクエストの保存日数
+
+    # パスワードのハッシュ計算（eventlet のハブを止めないようにスレッドプールで実行）
+    PASSWORD_HASH_OFFLOAD = os.getenv('PASSWORD_HASH_OFFLOAD', 'true').lower() == 'true'
+    PASSWORD_HASH_THREADS = int(os.getenv('PASSWORD_HASH_THREADS', 4))  # 同時に計算できる数（CPUコア数が目安）
+
+    # 工数テーブルの月次パーティション
+    WORKLOG_PARTITION_MONTHS_AHEAD = int(os.getenv('WORKLOG_PARTITION_MONTHS_AHEAD', 3))  # 先行作成する月数
+    WORKLOG_ARCHIVE_YEARS = int(os.getenv('WORKLOG_ARCHIVE_YEARS', 3))  # この年数より古い月をアーカイブ
+
+    # レスポンス圧縮（gzip / brotli）
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # これ未満のバイト数は圧縮しない
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_LEVEL = int(os.getenv('COMPRESS_BROTLI_LEVEL', 4))
+
+    # リクエスト計測
+    INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION_ENABLED', 'true').lower() == 'true'
+    SLOW_REQUEST_THRESHOLD_MS = int(os.getenv('SLOW_REQUEST_THRESHOLD_MS', 1000))  # これ以上かかったリクエストをログに出す
+    SLOW_REQUEST_LOG_STATEMENTS = int(os.getenv('SLOW_REQUEST_LOG_STATEMENTS', 5))  # ログに出す遅いSQL文の件数
+
+    # オンデマンドプロファイリング
+    PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', 'true').lower() == 'true'
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))  # 自動で抽出する割合（0〜1）
+    if os.getenv('PROFILE_DIR'):
+        PROFILE_DIR = os.getenv('PROFILE_DIR')  # 未設定の場合は instance/profiles
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 200))
+
+    # /api/metrics の認証トークン（未設定の場合は管理者のログインでのみ取得できる）
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # 複数ワーカー間の Socket.IO 通知（未設定の場合は1プロセスのみ）
+    # redis://host:6379/0 → Redis、postgresql → DATABASE_URL の LISTEN/NOTIFY
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = os.getenv('SOCKETIO_CHANNEL', 'worklog_socketio')
+    SOCKETIO_QUEUE_RETENTION_SECONDS = int(os.getenv('SOCKETIO_QUEUE_RETENTION_SECONDS', 300))  # 大きなメッセージの保存期間（PostgreSQL）
+
+    # PostgreSQL の変更通知（LISTEN/NOTIFY）によるリアルタイム通知（無効時は画面からの変更だけをコミット後に通知）
+    CHANGE_FEED_ENABLED = os.getenv('CHANGE_FEED_ENABLED', 'true').lower() == 'true'
 
 class DevelopmentConfig(Config):
     """開発環境設定"""
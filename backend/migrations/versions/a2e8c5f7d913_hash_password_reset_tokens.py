@@ -0,0 +1,46 @@
+"""hash password reset tokens and index unused ones
+
+Revision ID: a2e8c5f7d913
+Revises: f1a9d6c3e487
+Create Date: 2025-08-19 10:14:52.306118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2e8c5f7d913'
+down_revision = 'f1a9d6c3e487'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('password_reset_requests', sa.Column('token_hash', sa.String(length=64), nullable=True))
+
+    # 未使用のトークンはそのまま使えるようにハッシュへ移し替える（使用済みはもう検索しない）
+    op.execute("""
+        UPDATE password_reset_requests
+        SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex')
+        WHERE token IS NOT NULL AND NOT is_used
+    """)
+
+    # token の一意制約も列と一緒に削除される
+    op.drop_column('password_reset_requests', 'token')
+
+    op.create_index(
+        'ix_password_reset_requests_token_hash_unused',
+        'password_reset_requests',
+        ['token_hash'],
+        unique=True,
+        postgresql_where=sa.text('NOT is_used AND token_hash IS NOT NULL')
+    )
+
+
+def downgrade():
+    # ハッシュからトークンは復元できないため、未使用のトークンは無効になる
+    op.drop_index('ix_password_reset_requests_token_hash_unused', table_name='password_reset_requests')
+    op.add_column('password_reset_requests', sa.Column('token', sa.String(length=100), nullable=True))
+    op.create_unique_constraint('password_reset_requests_token_key', 'password_reset_requests', ['token'])
+    op.drop_column('password_reset_requests', 'token_hash')
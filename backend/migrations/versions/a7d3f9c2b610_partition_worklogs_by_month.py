@@ -0,0 +1,213 @@
+"""partition worklogs by month and add archive schema
+
+Revision ID: a7d3f9c2b610
+Revises: 1cb167a10742
+Create Date: 2025-07-14 10:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3f9c2b610'
+down_revision = '1cb167a10742'
+branch_labels = None
+depends_on = None
+
+
+# worklogs のカラム定義（パーティション親・アーカイブ親・ダウングレードで共通）
+WORKLOG_COLUMNS = """
+    id integer NOT NULL DEFAULT nextval('worklogs_id_seq'),
+    employee_id varchar(10) NOT NULL,
+    row_number integer,
+    date date NOT NULL,
+    model varchar(50),
+    serial_number varchar(50),
+    work_order varchar(50),
+    part_number varchar(50),
+    order_number varchar(50),
+    quantity integer,
+    unit_name varchar(50) NOT NULL,
+    work_type varchar(50) NOT NULL,
+    minutes integer NOT NULL,
+    remarks text,
+    status varchar(20),
+    edit_reason text,
+    original_id integer,
+    created_at timestamp,
+    updated_at timestamp
+"""
+
+COLUMN_NAMES = """
+    id, employee_id, row_number, date, model, serial_number, work_order, part_number,
+    order_number, quantity, unit_name, work_type, minutes, remarks, status, edit_reason,
+    original_id, created_at, updated_at
+"""
+
+INDEXES = (
+    ('idx_worklog_date', 'date'),
+    ('idx_worklog_employee_date', 'employee_id, date'),
+    ('idx_worklog_employee_id', 'employee_id'),
+    ('idx_worklog_status', 'status'),
+    ('idx_worklog_status_date', 'status, date'),
+    ('idx_worklog_unit_date', 'unit_name, date'),
+    ('idx_worklog_unit_name', 'unit_name'),
+    ('idx_worklog_original_id', 'original_id'),
+)
+
+
+def _drop_constraints_and_indexes(table):
+    """既存テーブルの制約・インデックスを名前に関係なく削除する（環境ごとに名前が異なるため）"""
+    op.execute(f"""
+        DO $$
+        DECLARE r record;
+        BEGIN
+            FOR r IN SELECT conname FROM pg_constraint WHERE conrelid = '{table}'::regclass LOOP
+                EXECUTE format('ALTER TABLE {table} DROP CONSTRAINT IF EXISTS %I', r.conname);
+            END LOOP;
+            FOR r IN SELECT indexrelid::regclass::text AS name FROM pg_index WHERE indrelid = '{table}'::regclass LOOP
+                EXECUTE format('DROP INDEX IF EXISTS %s', r.name);
+            END LOOP;
+        END $$;
+    """)
+
+
+def upgrade():
+    # ID採番用シーケンス（旧テーブルを削除しても残るように所有関係を外す）
+    op.execute("CREATE SEQUENCE IF NOT EXISTS worklogs_id_seq")
+    op.execute("ALTER TABLE worklogs ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE worklogs_id_seq OWNED BY NONE")
+
+    op.execute("ALTER TABLE worklogs RENAME TO worklogs_legacy")
+    _drop_constraints_and_indexes('worklogs_legacy')
+
+    # 日付による月次レンジパーティション
+    # パーティションキーを含める必要があるため主キーは (id, date)、
+    # 自己参照の外部キー（original_id）はパーティションテーブルでは張れないため外す
+    op.execute(f"""
+        CREATE TABLE worklogs (
+            {WORKLOG_COLUMNS},
+            CONSTRAINT worklogs_pkey PRIMARY KEY (id, date),
+            CONSTRAINT worklogs_employee_id_fkey FOREIGN KEY (employee_id) REFERENCES users (employee_id)
+        ) PARTITION BY RANGE (date)
+    """)
+    op.execute("ALTER SEQUENCE worklogs_id_seq OWNED BY worklogs.id")
+    for name, columns in INDEXES:
+        op.execute(f"CREATE INDEX {name} ON worklogs ({columns})")
+
+    # 範囲外の日付を受け止めるデフォルトパーティション
+    op.execute("CREATE TABLE worklogs_default PARTITION OF worklogs DEFAULT")
+
+    # 指定期間の月次パーティションを作成する関数（作成済みの月はスキップ）
+    op.execute("""
+        CREATE OR REPLACE FUNCTION worklogs_ensure_partitions(from_date date, to_date date)
+        RETURNS integer
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            month_start date := date_trunc('month', from_date)::date;
+            partition_name text;
+            created integer := 0;
+        BEGIN
+            WHILE month_start <= to_date LOOP
+                partition_name := 'worklogs_p' || to_char(month_start, 'YYYYMM');
+                IF to_regclass('public.' || partition_name) IS NULL
+                   AND to_regclass('worklog_archive.' || partition_name) IS NULL THEN
+                    BEGIN
+                        EXECUTE format(
+                            'CREATE TABLE %I PARTITION OF worklogs FOR VALUES FROM (%L) TO (%L)',
+                            partition_name, month_start, (month_start + interval '1 month')::date
+                        );
+                        created := created + 1;
+                    EXCEPTION WHEN others THEN
+                        -- デフォルトパーティションに同じ月の行がある場合などは作成せずに続行
+                        RAISE NOTICE 'partition % not created: %', partition_name, SQLERRM;
+                    END;
+                END IF;
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+            RETURN created;
+        END;
+        $$
+    """)
+
+    # 既存データの期間 + 先3か月分のパーティションを作成
+    op.execute("""
+        SELECT worklogs_ensure_partitions(
+            COALESCE((SELECT MIN(date) FROM worklogs_legacy), CURRENT_DATE),
+            (CURRENT_DATE + interval '3 months')::date
+        )
+    """)
+
+    op.execute(f"INSERT INTO worklogs ({COLUMN_NAMES}) SELECT {COLUMN_NAMES} FROM worklogs_legacy")
+    op.execute("SELECT setval('worklogs_id_seq', COALESCE((SELECT MAX(id) FROM worklogs), 0) + 1, false)")
+    op.execute("DROP TABLE worklogs_legacy")
+
+    # アーカイブ層：古い月のパーティションを切り離して移す先
+    op.execute("CREATE SCHEMA IF NOT EXISTS worklog_archive")
+    op.execute(f"""
+        CREATE TABLE worklog_archive.worklogs (
+            {WORKLOG_COLUMNS},
+            CONSTRAINT worklogs_archive_pkey PRIMARY KEY (id, date)
+        ) PARTITION BY RANGE (date)
+    """)
+    op.execute("ALTER TABLE worklog_archive.worklogs ALTER COLUMN id DROP DEFAULT")
+    op.execute("CREATE INDEX idx_worklog_archive_date ON worklog_archive.worklogs (date)")
+    op.execute("CREATE INDEX idx_worklog_archive_employee_date ON worklog_archive.worklogs (employee_id, date)")
+
+    # 稼働中 + アーカイブを横断して読むためのビュー（管理画面・CSV出力用）
+    op.execute(f"""
+        CREATE VIEW worklogs_with_archive AS
+        SELECT {COLUMN_NAMES} FROM worklogs
+        UNION ALL
+        SELECT {COLUMN_NAMES} FROM worklog_archive.worklogs
+    """)
+
+
+def downgrade():
+    op.execute("DROP VIEW IF EXISTS worklogs_with_archive")
+
+    op.execute("ALTER SEQUENCE worklogs_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE worklogs RENAME TO worklogs_partitioned")
+    op.execute("ALTER TABLE worklogs_partitioned ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER TABLE worklogs_partitioned DROP CONSTRAINT worklogs_employee_id_fkey")
+    op.execute("ALTER TABLE worklogs_partitioned RENAME CONSTRAINT worklogs_pkey TO worklogs_partitioned_pkey")
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    op.execute(f"""
+        CREATE TABLE worklogs (
+            {WORKLOG_COLUMNS},
+            CONSTRAINT worklogs_pkey PRIMARY KEY (id),
+            CONSTRAINT worklogs_employee_id_fkey FOREIGN KEY (employee_id) REFERENCES users (employee_id),
+            CONSTRAINT worklogs_original_id_fkey FOREIGN KEY (original_id) REFERENCES worklogs (id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE worklogs_id_seq OWNED BY worklogs.id")
+
+    # 稼働中・アーカイブの両方を戻す
+    # 外部キーを満たすため編集元（original_id が NULL）の行から投入し、編集元が無い参照は外す
+    op.execute(f"""
+        INSERT INTO worklogs ({COLUMN_NAMES})
+        WITH all_rows AS (
+            SELECT {COLUMN_NAMES} FROM worklogs_partitioned
+            UNION ALL
+            SELECT {COLUMN_NAMES} FROM worklog_archive.worklogs
+        )
+        SELECT
+            a.id, a.employee_id, a.row_number, a.date, a.model, a.serial_number, a.work_order,
+            a.part_number, a.order_number, a.quantity, a.unit_name, a.work_type, a.minutes,
+            a.remarks, a.status, a.edit_reason,
+            CASE WHEN EXISTS (SELECT 1 FROM all_rows o WHERE o.id = a.original_id) THEN a.original_id END,
+            a.created_at, a.updated_at
+        FROM all_rows a
+        ORDER BY (a.original_id IS NOT NULL), a.id
+    """)
+
+    for name, columns in INDEXES:
+        op.execute(f"CREATE INDEX {name} ON worklogs ({columns})")
+
+    op.execute("DROP TABLE worklogs_partitioned CASCADE")
+    op.execute("DROP SCHEMA worklog_archive CASCADE")
+    op.execute("DROP FUNCTION IF EXISTS worklogs_ensure_partitions(date, date)")
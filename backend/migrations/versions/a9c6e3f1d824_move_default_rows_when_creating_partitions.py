@@ -0,0 +1,110 @@
+"""create worklog partitions for months that already have rows in the default partition
+
+Revision ID: a9c6e3f1d824
+Revises: f4b2d7e9c315
+Create Date: 2025-09-03 15:47:02.911357
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c6e3f1d824'
+down_revision = 'f4b2d7e9c315'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 以前の関数はデフォルトパーティションに同じ月の行があると作成に失敗し、
+    # そのエラーを NOTICE にして飛ばしていた（その月はずっとデフォルトパーティションに残る）。
+    # 新しい関数は、その月の行をデフォルトパーティションから新しいテーブルへ移してから
+    # パーティションとして接続する。アーカイブ済みの月の行はアーカイブのパーティションへ移す。
+    # 行の移動はパーティションを直接操作するため、worklogs の文単位のトリガー
+    # （ID の確認・変更通知、f4b2d7e9c315）は動かない。
+    # 作成・移動した月を (パーティション名, 移動した行数) として返し、エラーはそのまま呼び出し元に返す。
+    op.execute("DROP FUNCTION IF EXISTS worklogs_ensure_partitions(date, date)")
+    op.execute("""
+        CREATE FUNCTION worklogs_ensure_partitions(from_date date, to_date date)
+        RETURNS TABLE (partition_name text, moved_rows bigint)
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            month_start date := date_trunc('month', from_date)::date;
+            month_end date;
+            month_table text;
+        BEGIN
+            WHILE month_start <= to_date LOOP
+                month_end := (month_start + interval '1 month')::date;
+                month_table := 'worklogs_p' || to_char(month_start, 'YYYYMM');
+
+                IF to_regclass('worklog_archive.' || month_table) IS NOT NULL THEN
+                    -- アーカイブ済みの月: デフォルトパーティションに入った行だけをアーカイブへ移す
+                    EXECUTE format(
+                        'WITH moved AS (DELETE FROM worklogs_default WHERE date >= %L AND date < %L RETURNING *) '
+                        'INSERT INTO worklog_archive.%I SELECT * FROM moved',
+                        month_start, month_end, month_table
+                    );
+                    GET DIAGNOSTICS moved_rows = ROW_COUNT;
+                    IF moved_rows > 0 THEN
+                        partition_name := 'worklog_archive.' || month_table;
+                        RETURN NEXT;
+                    END IF;
+                ELSIF to_regclass(month_table) IS NULL THEN
+                    -- 移動中にデフォルトパーティションへ同じ月の行が書き込まれないようにする
+                    LOCK TABLE worklogs_default IN EXCLUSIVE MODE;
+                    EXECUTE format('CREATE TABLE %I (LIKE worklogs INCLUDING DEFAULTS)', month_table);
+                    EXECUTE format(
+                        'WITH moved AS (DELETE FROM worklogs_default WHERE date >= %L AND date < %L RETURNING *) '
+                        'INSERT INTO %I SELECT * FROM moved',
+                        month_start, month_end, month_table
+                    );
+                    GET DIAGNOSTICS moved_rows = ROW_COUNT;
+                    EXECUTE format(
+                        'ALTER TABLE worklogs ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                        month_table, month_start, month_end
+                    );
+                    partition_name := month_table;
+                    RETURN NEXT;
+                END IF;
+
+                month_start := month_end;
+            END LOOP;
+        END;
+        $$
+    """)
+
+
+def downgrade():
+    op.execute("DROP FUNCTION IF EXISTS worklogs_ensure_partitions(date, date)")
+    op.execute("""
+        CREATE FUNCTION worklogs_ensure_partitions(from_date date, to_date date)
+        RETURNS integer
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            month_start date := date_trunc('month', from_date)::date;
+            partition_name text;
+            created integer := 0;
+        BEGIN
+            WHILE month_start <= to_date LOOP
+                partition_name := 'worklogs_p' || to_char(month_start, 'YYYYMM');
+                IF to_regclass('public.' || partition_name) IS NULL
+                   AND to_regclass('worklog_archive.' || partition_name) IS NULL THEN
+                    BEGIN
+                        EXECUTE format(
+                            'CREATE TABLE %I PARTITION OF worklogs FOR VALUES FROM (%L) TO (%L)',
+                            partition_name, month_start, (month_start + interval '1 month')::date
+                        );
+                        created := created + 1;
+                    EXCEPTION WHEN others THEN
+                        -- デフォルトパーティションに同じ月の行がある場合などは作成せずに続行
+                        RAISE NOTICE 'partition % not created: %', partition_name, SQLERRM;
+                    END;
+                END IF;
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+            RETURN created;
+        END;
+        $$
+    """)
@@ -0,0 +1,33 @@
+"""add socketio_messages table for the PostgreSQL message queue
+
+Revision ID: b4e1c8d2f903
+Revises: a7d3f9c2b610
+Create Date: 2025-08-04 15:20:47.118306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e1c8d2f903'
+down_revision = 'a7d3f9c2b610'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NOTIFY のペイロード上限（8000バイト）を超える Socket.IO メッセージの一時置き場
+    # （utils/socketio_queue.py が書き込み、一定時間後に削除する）
+    op.execute("""
+        CREATE UNLOGGED TABLE socketio_messages (
+            id bigserial PRIMARY KEY,
+            payload text NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("CREATE INDEX ix_socketio_messages_created_at ON socketio_messages (created_at)")
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS socketio_messages")
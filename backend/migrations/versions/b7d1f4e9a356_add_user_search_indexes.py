@@ -0,0 +1,32 @@
+"""add prefix search indexes on users
+
+Revision ID: b7d1f4e9a356
+Revises: a2e8c5f7d913
+Create Date: 2025-08-20 09:41:27.518304
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d1f4e9a356'
+down_revision = 'a2e8c5f7d913'
+branch_labels = None
+depends_on = None
+
+# ユーザー一覧の前方一致検索（LIKE 'xxx%'）に使うカラム
+PREFIX_COLUMNS = ('employee_id', 'name', 'department_name')
+
+
+def upgrade():
+    # varchar_pattern_ops はロケールに関係なく LIKE の前方一致でインデックスを使える
+    for column in PREFIX_COLUMNS:
+        op.create_index(
+            f'ix_users_{column}_prefix', 'users', [column],
+            postgresql_ops={column: 'varchar_pattern_ops'}
+        )
+
+
+def downgrade():
+    for column in PREFIX_COLUMNS:
+        op.drop_index(f'ix_users_{column}_prefix', table_name='users')
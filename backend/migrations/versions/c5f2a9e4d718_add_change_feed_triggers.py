@@ -0,0 +1,122 @@
+"""add change feed triggers on worklogs and chat_messages
+
+Revision ID: c5f2a9e4d718
+Revises: b4e1c8d2f903
+Create Date: 2025-08-06 10:41:09.552730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f2a9e4d718'
+down_revision = 'b4e1c8d2f903'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 工数: 申請・却下に関わるステータスの変化だけを通知する（下書きの保存や承認済みデータの
+    # 取込みでは通知しない）。NOTIFY はコミット時に配信され、ロールバックされたものは届かない。
+    op.execute("""
+        CREATE OR REPLACE FUNCTION worklogs_change_notify()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            row_data worklogs%ROWTYPE;
+            old_status text;
+            new_status text;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                row_data := OLD;
+                old_status := OLD.status;
+            ELSIF TG_OP = 'INSERT' THEN
+                row_data := NEW;
+                new_status := NEW.status;
+            ELSE
+                IF OLD.status IS NOT DISTINCT FROM NEW.status THEN
+                    RETURN NULL;
+                END IF;
+                row_data := NEW;
+                old_status := OLD.status;
+                new_status := NEW.status;
+            END IF;
+
+            IF COALESCE(old_status, '') NOT LIKE 'pending\\_%' AND COALESCE(old_status, '') NOT LIKE 'rejected\\_%'
+               AND COALESCE(new_status, '') NOT LIKE 'pending\\_%' AND COALESCE(new_status, '') NOT LIKE 'rejected\\_%' THEN
+                RETURN NULL;
+            END IF;
+
+            PERFORM pg_notify('worklog_changes', json_build_object(
+                'op', TG_OP,
+                'id', row_data.id,
+                'employee_id', row_data.employee_id,
+                'unit_name', row_data.unit_name,
+                'original_id', row_data.original_id,
+                'old_status', old_status,
+                'status', new_status
+            )::text);
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER worklogs_change_notify
+        AFTER INSERT OR UPDATE OR DELETE ON worklogs
+        FOR EACH ROW EXECUTE FUNCTION worklogs_change_notify()
+    """)
+
+    # チャット: 送信者・受信者の組み合わせ単位で通知する（メッセージIDは含めない）。
+    # 同じトランザクション内の同じ内容の通知は PostgreSQL が1件にまとめるため、
+    # 一括既読などで大量の通知にならない。
+    op.execute("""
+        CREATE OR REPLACE FUNCTION chat_messages_change_notify()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            op text := TG_OP;
+            sender integer;
+            receiver integer;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                sender := OLD.sender_id;
+                receiver := OLD.receiver_id;
+            ELSE
+                sender := NEW.sender_id;
+                receiver := NEW.receiver_id;
+            END IF;
+
+            IF TG_OP = 'UPDATE' THEN
+                IF OLD.message IS DISTINCT FROM NEW.message THEN
+                    op := 'UPDATE';
+                ELSIF NEW.is_read AND NOT OLD.is_read THEN
+                    op := 'READ';
+                ELSE
+                    RETURN NULL;
+                END IF;
+            END IF;
+
+            PERFORM pg_notify('chat_changes', json_build_object(
+                'op', op,
+                'sender_id', sender,
+                'receiver_id', receiver
+            )::text);
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER chat_messages_change_notify
+        AFTER INSERT OR UPDATE OR DELETE ON chat_messages
+        FOR EACH ROW EXECUTE FUNCTION chat_messages_change_notify()
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS chat_messages_change_notify ON chat_messages")
+    op.execute("DROP FUNCTION IF EXISTS chat_messages_change_notify()")
+    op.execute("DROP TRIGGER IF EXISTS worklogs_change_notify ON worklogs")
+    op.execute("DROP FUNCTION IF EXISTS worklogs_change_notify()")
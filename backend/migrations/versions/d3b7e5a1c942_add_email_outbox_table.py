@@ -0,0 +1,44 @@
+"""add email_outbox table
+
+Revision ID: d3b7e5a1c942
+Revises: c5f2a9e4d718
+Create Date: 2025-08-11 09:27:53.204615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3b7e5a1c942'
+down_revision = 'c5f2a9e4d718'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('recipients', sa.JSON(), nullable=False),
+        sa.Column('subject', sa.Text(), nullable=False),
+        sa.Column('html_content', sa.Text(), nullable=False),
+        sa.Column('text_content', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=10), server_default='pending', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # ワーカーが取り出す未送信分だけの部分インデックス（送信済みの行が増えても小さいまま）
+    op.execute("""
+        CREATE INDEX ix_email_outbox_due ON email_outbox (next_attempt_at)
+        WHERE status IN ('pending', 'sending')
+    """)
+
+
+def downgrade():
+    op.drop_table('email_outbox')
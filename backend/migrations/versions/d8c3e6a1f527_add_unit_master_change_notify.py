@@ -0,0 +1,45 @@
+"""notify unit master changes so every worker drops its cached unit/work-type map
+
+Revision ID: d8c3e6a1f527
+Revises: b7d1f4e9a356
+Create Date: 2025-08-27 14:06:52.180934
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8c3e6a1f527'
+down_revision = 'b7d1f4e9a356'
+branch_labels = None
+depends_on = None
+
+# ユニット名と工事区分の対応表（services/worklog.get_unit_work_type_map）の元になるテーブル
+UNIT_MASTER_TABLES = ('unit_names', 'work_types', 'unit_work_types')
+
+
+def upgrade():
+    # 文単位のトリガーでテーブル名だけを通知する（同じトランザクション内の同じ通知は1件にまとまる）
+    op.execute("""
+        CREATE OR REPLACE FUNCTION unit_master_change_notify()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            PERFORM pg_notify('unit_master_changes', TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$
+    """)
+    for table in UNIT_MASTER_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_notify
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION unit_master_change_notify()
+        """)
+
+
+def downgrade():
+    for table in UNIT_MASTER_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_notify ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS unit_master_change_notify()")
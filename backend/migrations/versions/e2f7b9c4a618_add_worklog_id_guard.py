@@ -0,0 +1,62 @@
+"""guard worklogs.id uniqueness and original_id references on the partitioned table
+
+Revision ID: e2f7b9c4a618
+Revises: d8c3e6a1f527
+Create Date: 2025-08-28 10:22:14.603518
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f7b9c4a618'
+down_revision = 'd8c3e6a1f527'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # パーティション化（a7d3f9c2b610）で主キーが (id, date) になり、original_id の外部キーも
+    # 外したため、その代わりにトリガーで確認する（行単位の BEFORE トリガーは PostgreSQL 13 以降）。
+    #   - id: 稼働中の別の日付・アーカイブに同じ id があれば unique_violation
+    #     （同じ (id, date) は主キーと INSERT ... ON CONFLICT (id, date) が扱う）
+    #   - original_id: 稼働中・アーカイブのどちらにも無い id なら foreign_key_violation
+    # id は通常 worklogs_id_seq から採番されるため、明示的に同じ id を指定した
+    # 並行 INSERT 同士は直列化しない（大量取込みでロックを取り続けないため）。
+    # 参照されている行の削除は確認しない（日付の変更による移動も削除→追加として扱われるため）。
+    op.execute("""
+        CREATE OR REPLACE FUNCTION worklogs_check_id()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' OR NEW.id IS DISTINCT FROM OLD.id THEN
+                IF EXISTS (SELECT 1 FROM worklogs WHERE id = NEW.id AND date <> NEW.date)
+                   OR EXISTS (SELECT 1 FROM worklog_archive.worklogs WHERE id = NEW.id) THEN
+                    RAISE EXCEPTION 'worklogs.id % is already used', NEW.id
+                        USING ERRCODE = 'unique_violation';
+                END IF;
+            END IF;
+
+            IF NEW.original_id IS NOT NULL
+               AND (TG_OP = 'INSERT' OR NEW.original_id IS DISTINCT FROM OLD.original_id)
+               AND NOT EXISTS (SELECT 1 FROM worklogs WHERE id = NEW.original_id)
+               AND NOT EXISTS (SELECT 1 FROM worklog_archive.worklogs WHERE id = NEW.original_id) THEN
+                RAISE EXCEPTION 'worklogs.original_id % does not exist', NEW.original_id
+                    USING ERRCODE = 'foreign_key_violation';
+            END IF;
+
+            RETURN NEW;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER worklogs_check_id
+        BEFORE INSERT OR UPDATE OF id, original_id ON worklogs
+        FOR EACH ROW EXECUTE FUNCTION worklogs_check_id()
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS worklogs_check_id ON worklogs")
+    op.execute("DROP FUNCTION IF EXISTS worklogs_check_id()")
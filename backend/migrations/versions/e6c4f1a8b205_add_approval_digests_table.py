@@ -0,0 +1,36 @@
+"""add approval_digests table
+
+Revision ID: e6c4f1a8b205
+Revises: d3b7e5a1c942
+Create Date: 2025-08-13 14:05:38.719260
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6c4f1a8b205'
+down_revision = 'd3b7e5a1c942'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 管理者・日付ごとに1件（再実行しても同じ日のダイジェストを二重に送らない）
+    op.create_table(
+        'approval_digests',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('admin_id', sa.Integer(), nullable=False),
+        sa.Column('digest_date', sa.Date(), nullable=False),
+        sa.Column('pending_total', sa.Integer(), nullable=False),
+        sa.Column('outbox_id', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['admin_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('admin_id', 'digest_date', name='uq_approval_digests_admin_date')
+    )
+
+
+def downgrade():
+    op.drop_table('approval_digests')
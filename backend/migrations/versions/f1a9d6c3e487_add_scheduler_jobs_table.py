@@ -0,0 +1,37 @@
+"""add scheduler_jobs table
+
+Revision ID: f1a9d6c3e487
+Revises: e6c4f1a8b205
+Create Date: 2025-08-18 11:32:16.048872
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a9d6c3e487'
+down_revision = 'e6c4f1a8b205'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 定期ジョブごとの実行権（locked_by / locked_until）と次回実行時刻
+    op.create_table(
+        'scheduler_jobs',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_status', sa.String(length=10), nullable=True),
+        sa.Column('last_duration_ms', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('scheduler_jobs')
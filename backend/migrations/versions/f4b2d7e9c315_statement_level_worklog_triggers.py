@@ -0,0 +1,258 @@
+"""run the worklogs id guard and change feed once per statement with transition tables
+
+Revision ID: f4b2d7e9c315
+Revises: e2f7b9c4a618
+Create Date: 2025-09-02 09:14:37.208416
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b2d7e9c315'
+down_revision = 'e2f7b9c4a618'
+branch_labels = None
+depends_on = None
+
+
+# 変更通知の対象ステータス（申請・却下に関わるもの）
+NOTIFY_STATUS_CONDITION = """
+    (COALESCE({alias}.status, '') LIKE 'pending\\_%' OR COALESCE({alias}.status, '') LIKE 'rejected\\_%')
+"""
+
+# 行ごとの変更レコード（c5f2a9e4d718 の worklogs_change_notify と同じ形）
+WORKLOG_CHANGE_JSON = """
+    json_build_object(
+        'op', '{op}',
+        'id', {row}.id,
+        'employee_id', {row}.employee_id,
+        'unit_name', {row}.unit_name,
+        'original_id', {row}.original_id,
+        'old_status', {old_status},
+        'status', {new_status}
+    )::text
+"""
+
+
+def upgrade():
+    # 行単位のトリガーは一括取込み（INSERT ... SELECT）の全行で、稼働中の全パーティションと
+    # アーカイブを1行ずつ探すため、文単位のトリガーで遷移テーブルをまとめて確認する。
+    # 遷移テーブルを使うトリガーは1つのイベントにしか付けられないため INSERT / UPDATE / DELETE で分ける。
+    # 文単位のトリガーはパーティションに複製されないため、パーティションを直接操作した場合
+    # （worklogs_ensure_partitions によるデフォルトパーティションからの移動）は動かない。
+    op.execute("DROP TRIGGER IF EXISTS worklogs_check_id ON worklogs")
+    op.execute("DROP FUNCTION IF EXISTS worklogs_check_id()")
+    op.execute("DROP TRIGGER IF EXISTS worklogs_change_notify ON worklogs")
+    op.execute("DROP FUNCTION IF EXISTS worklogs_change_notify()")
+
+    # id: 稼働中の別の日付・アーカイブに同じ id があれば unique_violation
+    # original_id: 稼働中・アーカイブのどちらにも無い id なら foreign_key_violation
+    # UPDATE は id / original_id が変わった行だけを確認する（行の移動による日付の変更は対象外）
+    op.execute("""
+        CREATE OR REPLACE FUNCTION worklogs_check_ids()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            bad_id integer;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT n.id INTO bad_id
+                FROM new_rows n
+                WHERE EXISTS (SELECT 1 FROM worklogs w WHERE w.id = n.id AND w.date <> n.date)
+                   OR EXISTS (SELECT 1 FROM worklog_archive.worklogs a WHERE a.id = n.id)
+                LIMIT 1;
+            ELSE
+                SELECT n.id INTO bad_id
+                FROM new_rows n
+                WHERE NOT EXISTS (SELECT 1 FROM old_rows o WHERE o.id = n.id)
+                  AND (EXISTS (SELECT 1 FROM worklogs w WHERE w.id = n.id AND w.date <> n.date)
+                       OR EXISTS (SELECT 1 FROM worklog_archive.worklogs a WHERE a.id = n.id))
+                LIMIT 1;
+            END IF;
+            IF bad_id IS NOT NULL THEN
+                RAISE EXCEPTION 'worklogs.id % is already used', bad_id
+                    USING ERRCODE = 'unique_violation';
+            END IF;
+
+            IF TG_OP = 'INSERT' THEN
+                SELECT n.original_id INTO bad_id
+                FROM new_rows n
+                WHERE n.original_id IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM worklogs w WHERE w.id = n.original_id)
+                  AND NOT EXISTS (SELECT 1 FROM worklog_archive.worklogs a WHERE a.id = n.original_id)
+                LIMIT 1;
+            ELSE
+                SELECT n.original_id INTO bad_id
+                FROM new_rows n
+                WHERE n.original_id IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM old_rows o WHERE o.id = n.id AND o.original_id = n.original_id)
+                  AND NOT EXISTS (SELECT 1 FROM worklogs w WHERE w.id = n.original_id)
+                  AND NOT EXISTS (SELECT 1 FROM worklog_archive.worklogs a WHERE a.id = n.original_id)
+                LIMIT 1;
+            END IF;
+            IF bad_id IS NOT NULL THEN
+                RAISE EXCEPTION 'worklogs.original_id % does not exist', bad_id
+                    USING ERRCODE = 'foreign_key_violation';
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER worklogs_check_ids_insert
+        AFTER INSERT ON worklogs
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION worklogs_check_ids()
+    """)
+    op.execute("""
+        CREATE TRIGGER worklogs_check_ids_update
+        AFTER UPDATE ON worklogs
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION worklogs_check_ids()
+    """)
+
+    # 変更通知: 通知の対象になる行だけを遷移テーブルから選んで送る（通知の内容は行単位のときと同じ）
+    insert_condition = NOTIFY_STATUS_CONDITION.format(alias='n')
+    update_condition = (
+        f"o.status IS DISTINCT FROM n.status AND ({NOTIFY_STATUS_CONDITION.format(alias='o')} "
+        f"OR {NOTIFY_STATUS_CONDITION.format(alias='n')})"
+    )
+    delete_condition = NOTIFY_STATUS_CONDITION.format(alias='o')
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION worklogs_change_notify()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM pg_notify('worklog_changes', {WORKLOG_CHANGE_JSON.format(
+                    op='INSERT', row='n', old_status='NULL', new_status='n.status')})
+                FROM new_rows n
+                WHERE {insert_condition};
+            ELSIF TG_OP = 'UPDATE' THEN
+                PERFORM pg_notify('worklog_changes', {WORKLOG_CHANGE_JSON.format(
+                    op='UPDATE', row='n', old_status='o.status', new_status='n.status')})
+                FROM old_rows o
+                JOIN new_rows n ON n.id = o.id
+                WHERE {update_condition};
+            ELSE
+                PERFORM pg_notify('worklog_changes', {WORKLOG_CHANGE_JSON.format(
+                    op='DELETE', row='o', old_status='o.status', new_status='NULL')})
+                FROM old_rows o
+                WHERE {delete_condition};
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER worklogs_change_notify_insert
+        AFTER INSERT ON worklogs
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION worklogs_change_notify()
+    """)
+    op.execute("""
+        CREATE TRIGGER worklogs_change_notify_update
+        AFTER UPDATE ON worklogs
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION worklogs_change_notify()
+    """)
+    op.execute("""
+        CREATE TRIGGER worklogs_change_notify_delete
+        AFTER DELETE ON worklogs
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION worklogs_change_notify()
+    """)
+
+
+def downgrade():
+    for trigger in (
+        'worklogs_check_ids_insert', 'worklogs_check_ids_update',
+        'worklogs_change_notify_insert', 'worklogs_change_notify_update', 'worklogs_change_notify_delete',
+    ):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON worklogs")
+    op.execute("DROP FUNCTION IF EXISTS worklogs_check_ids()")
+    op.execute("DROP FUNCTION IF EXISTS worklogs_change_notify()")
+
+    # 行単位のトリガー（c5f2a9e4d718 / e2f7b9c4a618）に戻す
+    op.execute("""
+        CREATE OR REPLACE FUNCTION worklogs_change_notify()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            row_data worklogs%ROWTYPE;
+            old_status text;
+            new_status text;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                row_data := OLD;
+                old_status := OLD.status;
+            ELSIF TG_OP = 'INSERT' THEN
+                row_data := NEW;
+                new_status := NEW.status;
+            ELSE
+                IF OLD.status IS NOT DISTINCT FROM NEW.status THEN
+                    RETURN NULL;
+                END IF;
+                row_data := NEW;
+                old_status := OLD.status;
+                new_status := NEW.status;
+            END IF;
+
+            IF COALESCE(old_status, '') NOT LIKE 'pending\\_%' AND COALESCE(old_status, '') NOT LIKE 'rejected\\_%'
+               AND COALESCE(new_status, '') NOT LIKE 'pending\\_%' AND COALESCE(new_status, '') NOT LIKE 'rejected\\_%' THEN
+                RETURN NULL;
+            END IF;
+
+            PERFORM pg_notify('worklog_changes', json_build_object(
+                'op', TG_OP,
+                'id', row_data.id,
+                'employee_id', row_data.employee_id,
+                'unit_name', row_data.unit_name,
+                'original_id', row_data.original_id,
+                'old_status', old_status,
+                'status', new_status
+            )::text);
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER worklogs_change_notify
+        AFTER INSERT OR UPDATE OR DELETE ON worklogs
+        FOR EACH ROW EXECUTE FUNCTION worklogs_change_notify()
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION worklogs_check_id()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' OR NEW.id IS DISTINCT FROM OLD.id THEN
+                IF EXISTS (SELECT 1 FROM worklogs WHERE id = NEW.id AND date <> NEW.date)
+                   OR EXISTS (SELECT 1 FROM worklog_archive.worklogs WHERE id = NEW.id) THEN
+                    RAISE EXCEPTION 'worklogs.id % is already used', NEW.id
+                        USING ERRCODE = 'unique_violation';
+                END IF;
+            END IF;
+
+            IF NEW.original_id IS NOT NULL
+               AND (TG_OP = 'INSERT' OR NEW.original_id IS DISTINCT FROM OLD.original_id)
+               AND NOT EXISTS (SELECT 1 FROM worklogs WHERE id = NEW.original_id)
+               AND NOT EXISTS (SELECT 1 FROM worklog_archive.worklogs WHERE id = NEW.original_id) THEN
+                RAISE EXCEPTION 'worklogs.original_id % does not exist', NEW.original_id
+                    USING ERRCODE = 'foreign_key_violation';
+            END IF;
+
+            RETURN NEW;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER worklogs_check_id
+        BEFORE INSERT OR UPDATE OF id, original_id ON worklogs
+        FOR EACH ROW EXECUTE FUNCTION worklogs_check_id()
+    """)
@@ -8,9 +8,12 @@ migrate = Migrate()
 # モデルのインポート（順番注意）
 from .user import User
 from .password_reset import PasswordResetRequest
-from .worklog import WorkLog
+from .worklog import WorkLog, WorkLogWithArchive
 from .chat_permission import ChatPermission
 from .chat_message import ChatMessage
 from .unit_name import UnitName
 from .work_type import WorkType
-from .unit_work_type import UnitWorkType
\ No newline at end of file
+from .unit_work_type import UnitWorkType
+from .email_outbox import EmailOutbox
+from .approval_digest import ApprovalDigest
+from .scheduler_job import SchedulerJob
\ No newline at end of file
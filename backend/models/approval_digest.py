@@ -0,0 +1,20 @@
+# models/approval_digest.py
+
+from . import db
+
+class ApprovalDigest(db.Model):
+    """未処理申請ダイジェストの送信記録（管理者・日付ごとに1件）"""
+    __tablename__ = 'approval_digests'
+    __table_args__ = (
+        db.UniqueConstraint('admin_id', 'digest_date', name='uq_approval_digests_admin_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    admin_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    digest_date = db.Column(db.Date, nullable=False)
+    pending_total = db.Column(db.Integer, nullable=False)  # 送信時点の未処理申請数
+    outbox_id = db.Column(db.BigInteger, nullable=True)    # 登録した email_outbox の行
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+
+    def __repr__(self):
+        return f'<ApprovalDigest {self.admin_id} {self.digest_date}>'
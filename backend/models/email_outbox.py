@@ -0,0 +1,24 @@
+# models/email_outbox.py
+
+from . import db
+
+class EmailOutbox(db.Model):
+    """メール送信キュー（services/email_outbox.py のワーカーが送信する）"""
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    recipients = db.Column(db.JSON, nullable=False)  # 宛先メールアドレスのリスト（1通でまとめて送る）
+    subject = db.Column(db.Text, nullable=False)
+    html_content = db.Column(db.Text, nullable=False)
+    text_content = db.Column(db.Text, nullable=True)
+    # pending: 送信待ち / sending: 送信中 / sent: 送信済み / failed: 送信失敗（再試行しない）
+    status = db.Column(db.String(10), nullable=False, default='pending', server_default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_attempt_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+    locked_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+    sent_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.status}>'
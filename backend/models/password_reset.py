@@ -1,13 +1,30 @@
+import hashlib
 from datetime import datetime
 from . import db
 
+
+def hash_reset_token(token):
+    """リセットトークンの保存・検索用ハッシュ（SHA-256 の16進64文字）
+
+    トークン自体は推測困難な乱数なので、ソルトなしの高速なハッシュで十分。
+    DBが漏えいしてもトークンを復元できず、インデックスも固定長で小さく保てる。
+    """
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
 class PasswordResetRequest(db.Model):
     """パスワードリセットリクエストモデル"""
     __tablename__ = 'password_reset_requests'
+    __table_args__ = (
+        # 検索対象は未使用のトークンだけなので、使用済みの行はインデックスに含めない
+        db.Index('ix_password_reset_requests_token_hash_unused', 'token_hash', unique=True,
+                 postgresql_where=db.text('NOT is_used AND token_hash IS NOT NULL')),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    token = db.Column(db.String(100), unique=True, nullable=True)
+    # トークンのハッシュ（トークン自体は保存しない。未使用分のみ部分インデックスで検索）
+    token_hash = db.Column(db.String(64), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     expires_at = db.Column(db.DateTime, nullable=True)
     is_used = db.Column(db.Boolean, default=False, nullable=False)
@@ -27,6 +44,11 @@ class PasswordResetRequest(db.Model):
     def __repr__(self):
         return f'<PasswordResetRequest {self.id}>'
     
+    @classmethod
+    def find_unused(cls, token):
+        """未使用のリセットリクエストをトークンから探す（見つからなければNone）"""
+        return cls.query.filter_by(token_hash=hash_reset_token(token), is_used=False).first()
+
     def is_expired(self):
         """トークンが期限切れかどうか確認"""
         if not self.expires_at:
@@ -0,0 +1,20 @@
+# models/scheduler_job.py
+
+from . import db
+
+class SchedulerJob(db.Model):
+    """定期ジョブの実行状態（services/scheduler.py が排他制御と次回実行時刻の管理に使う）"""
+    __tablename__ = 'scheduler_jobs'
+
+    name = db.Column(db.String(100), primary_key=True)
+    next_run_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    locked_by = db.Column(db.String(100), nullable=True)      # 実行中のプロセス（ホスト名:PID）
+    locked_until = db.Column(db.DateTime(timezone=True), nullable=True)  # この時刻を過ぎたら他のプロセスが実行できる
+    last_started_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    last_finished_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    last_status = db.Column(db.String(10), nullable=True)     # success / failure
+    last_duration_ms = db.Column(db.Integer, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    def __repr__(self):
+        return f'<SchedulerJob {self.name}>'
@@ -1,10 +1,18 @@
 from datetime import datetime
+from utils.passwords import verify_password
 from . import db
 from .chat_message import ChatMessage
 
 class User(db.Model):
     """ユーザーモデル"""
     __tablename__ = 'users'
+    __table_args__ = (
+        # ユーザー一覧の前方一致検索（LIKE 'xxx%'）用
+        db.Index('ix_users_employee_id_prefix', 'employee_id', postgresql_ops={'employee_id': 'varchar_pattern_ops'}),
+        db.Index('ix_users_name_prefix', 'name', postgresql_ops={'name': 'varchar_pattern_ops'}),
+        db.Index('ix_users_department_name_prefix', 'department_name',
+                 postgresql_ops={'department_name': 'varchar_pattern_ops'}),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.String(10), unique=True, nullable=False)
@@ -36,6 +44,10 @@ class User(db.Model):
             'sound_enabled': self.sound_enabled
 
         }
+
+    def check_password(self, password):
+        """パスワードが正しいか確認する"""
+        return verify_password(self.password_hash, password)
     
     
     sent_messages = db.relationship(
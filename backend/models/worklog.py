@@ -21,12 +21,19 @@ class WorkLog(db.Model):
     remarks = db.Column(db.Text)
     status = db.Column(db.String(20), default='draft')  # draft, pending, approved, rejected
     edit_reason = db.Column(db.Text)  # 編集理由
-    original_id = db.Column(db.Integer, db.ForeignKey('worklogs.id'))  # 編集元のID
+    # 編集元のID（月次パーティション化により外部キー制約は張らない）
+    original_id = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # 編集元への参照関係
-    original = db.relationship("WorkLog", remote_side=[id], backref="edits", uselist=False)
+    original = db.relationship(
+        "WorkLog",
+        primaryjoin="foreign(WorkLog.original_id) == WorkLog.id",
+        remote_side=[id],
+        backref="edits",
+        uselist=False
+    )
     
     def to_dict(self):
         """工数記録を辞書形式で返す"""
@@ -50,4 +57,20 @@ class WorkLog(db.Model):
             'originalId': self.original_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+
+
+# 稼働中 + アーカイブ済みの工数を横断して読むビュー（読み取り専用）
+# create_all の対象にならないよう別の MetaData に定義する
+archive_view_metadata = db.MetaData()
+
+
+class WorkLogWithArchive(db.Model):
+    """工数記録（アーカイブを含む読み取り専用ビュー）"""
+    __table__ = db.Table(
+        'worklogs_with_archive',
+        archive_view_metadata,
+        *[db.Column(c.name, c.type, primary_key=c.primary_key) for c in WorkLog.__table__.columns]
+    )
+
+    to_dict = WorkLog.to_dict
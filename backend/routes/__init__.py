@@ -9,6 +9,8 @@ from .admin_unit import admin_unit_bp
 from .admin_user import admin_user_bp
 from .admin_worklog import admin_worklog_bp
 from .approval_rejection import approval_rejection_bp
+from .admin_profile import admin_profile_bp
+from .batch import batch_bp
 
 
 def register_routes(app):
@@ -24,6 +26,8 @@ def register_routes(app):
     app.register_blueprint(admin_user_bp, url_prefix="/api")
     app.register_blueprint(admin_worklog_bp, url_prefix="/api")
     app.register_blueprint(approval_rejection_bp, url_prefix="/api")
+    app.register_blueprint(admin_profile_bp, url_prefix="/api")
+    app.register_blueprint(batch_bp, url_prefix="/api")
 
 
     # 他のBlueprintをここに追加
\ No newline at end of file
@@ -0,0 +1,43 @@
+# routes/admin_profile.py - 保存済みプロファイルの一覧・ダウンロード
+
+from flask import Blueprint, jsonify, current_app, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from models import User
+from utils.profiling import find_profile, list_profiles
+
+# Blueprintの作成
+admin_profile_bp = Blueprint('admin_profile', __name__)
+
+
+@admin_profile_bp.route('/admin/profiles', methods=['GET'])
+@jwt_required()
+def get_profiles():
+    """保存済みプロファイルの一覧を取得する（新しい順）"""
+    # 管理者権限の確認
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+
+    if not user or user.role_level < 2:
+        return jsonify({'error': '管理者権限が必要です'}), 403
+
+    return jsonify({'profiles': list_profiles(current_app)}), 200
+
+
+@admin_profile_bp.route('/admin/profiles/<profile_id>', methods=['GET'])
+@jwt_required()
+def download_profile(profile_id):
+    """プロファイルをダウンロードする（speedscope 形式は https://www.speedscope.app で表示できる）"""
+    # 管理者権限の確認
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+
+    if not user or user.role_level < 2:
+        return jsonify({'error': '管理者権限が必要です'}), 403
+
+    path, meta = find_profile(current_app, profile_id)
+    if path is None:
+        return jsonify({'error': 'プロファイルが見つかりません'}), 404
+
+    mimetype = 'application/json' if meta['format'] == 'speedscope' else 'application/octet-stream'
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=path.rsplit('/', 1)[-1])
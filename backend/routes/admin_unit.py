@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 
 from models import db, User, UnitName, WorkType, UnitWorkType
+from services.worklog import invalidate_unit_work_type_map
 
 # Blueprintの作成
 admin_unit_bp = Blueprint('admin_unit', __name__)
@@ -70,6 +71,7 @@ def create_unit_name():
         
         db.session.add(unit_name)
         db.session.commit()
+        invalidate_unit_work_type_map()
         
         return jsonify({
             'message': 'ユニット名が追加されました',
@@ -124,6 +126,7 @@ def update_unit_name(unit_id):
         
         unit_name.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_unit_work_type_map()
         
         # 更新後のデータを取得
         updated_unit = UnitName.query.get(unit_id)
@@ -154,6 +157,7 @@ def delete_unit_name(unit_id):
             
         db.session.delete(unit_name)
         db.session.commit()
+        invalidate_unit_work_type_map()
         
         return jsonify({
             'message': 'ユニット名が削除されました'
@@ -215,6 +219,7 @@ def create_work_type():
         
         db.session.add(work_type)
         db.session.commit()
+        invalidate_unit_work_type_map()
         
         return jsonify({
             'message': '工事区分が追加されました',
@@ -256,6 +261,7 @@ def update_work_type(work_type_id):
             work_type.name = data['name']
             work_type.updated_at = datetime.utcnow()
             db.session.commit()
+            invalidate_unit_work_type_map()
         
         return jsonify({
             'message': '工事区分が更新されました',
@@ -284,6 +290,7 @@ def delete_work_type(work_type_id):
             
         db.session.delete(work_type)
         db.session.commit()
+        invalidate_unit_work_type_map()
         
         return jsonify({
             'message': '工事区分が削除されました'
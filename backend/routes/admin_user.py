@@ -1,9 +1,11 @@
 # routes/admin_user.py
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User
-from werkzeug.security import generate_password_hash
+from routes.user import user_list_response
+from services.user_import import import_users, read_user_file
+from utils.passwords import hash_password
 from sqlalchemy.exc import IntegrityError
 
 admin_user_bp = Blueprint("admin_user", __name__)
@@ -12,8 +14,7 @@ admin_user_bp = Blueprint("admin_user", __name__)
 @admin_user_bp.route("/admin_users", methods=["GET"])
 @jwt_required()
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    return user_list_response()
 
 # 新規ユーザー作成
 @admin_user_bp.route("/admin_users", methods=["POST"])
@@ -40,7 +41,7 @@ def create_user():
             department_name=data["department_name"],
             position=data["position"],
             email=data.get("email"),  # メールアドレスはオプション
-            password_hash=generate_password_hash(data["password"]),
+            password_hash=hash_password(data["password"]),
             role_level=int(data.get("role_level", 1))  # デフォルトは一般ユーザー
         )
         
@@ -56,6 +57,47 @@ def create_user():
         db.session.rollback()
         return jsonify({"error": "アカウント作成中にエラーが発生しました: " + str(e)}), 500
 
+# ユーザー一括登録（CSV / JSON）
+@admin_user_bp.route("/admin_users/bulk", methods=["POST"])
+@jwt_required()
+def bulk_create_users():
+    """
+    ユーザーをまとめて登録し、行ごとの結果を返す
+    form data:
+        file: CSV ファイル（見出し: 社員ID, 氏名, 部署, 役職, メールアドレス, パスワード, 権限）
+    JSON:
+        {"users": [{"employee_id", "name", "department_name", "position", "password", "email", "role_level"}]}
+    query params:
+        dry_run: true の場合は検証のみ（書き込みなし）
+    """
+    # 管理者権限の確認
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    if not user or user.role_level < 2:
+        return jsonify({"error": "管理者権限が必要です"}), 403
+
+    dry_run = request.args.get("dry_run") == "true"
+
+    try:
+        upload = request.files.get("file")
+        if upload and upload.filename:
+            rows, first_row = read_user_file(upload.stream, upload.filename), 2
+        else:
+            data = request.get_json(silent=True) or {}
+            rows, first_row = data.get("users"), 1
+            if not isinstance(rows, list):
+                return jsonify({"error": "ファイルまたは users を指定してください"}), 400
+
+        result = import_users(rows, dry_run=dry_run, first_row=first_row)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"ユーザー一括登録エラー: {str(e)}")
+        return jsonify({"error": "ユーザー一括登録中にエラーが発生しました: " + str(e)}), 500
+
+    return jsonify(result), 200
+
 # ユーザー更新
 @admin_user_bp.route("/admin_users/<int:user_id>", methods=["PUT"])
 @jwt_required()
@@ -95,7 +137,7 @@ def update_user(user_id):
         
         # パスワード変更がある場合のみ更新
         if "password" in data and data["password"]:
-            user.password_hash = generate_password_hash(data["password"])
+            user.password_hash = hash_password(data["password"])
         
         db.session.commit()
         return jsonify({"message": "ユーザー情報が更新されました", "user": user.to_dict()})
@@ -1,16 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 from datetime import datetime
 import json
 
 from models import db, User, WorkLog
 from services.worklog import validate_worklog_data
+from services.worklog_partition import worklog_read_source
+from services.read_models import admin_worklog_conditions, admin_worklog_rows, count_admin_worklogs
+from utils.auth_helpers import load_current_user
+from utils.serializers import ADMIN_WORKLOG_FIELDS, ADMIN_WORKLOG_USER_FIELDS, cached_rows_serializer, select_fields
 from sqlalchemy import or_
 
 
 # Blueprintの作成
 admin_worklog_bp = Blueprint('admin_worklog', __name__)
 
+# 取り込み結果で返すエラー件数の上限
+IMPORT_ERROR_LIMIT = 1000
+
 
 # 工数履歴を取得
 @admin_worklog_bp.route('/admin_worklog', methods=['GET'])
@@ -28,166 +35,79 @@ def get_admin_worklog():
     sort_by = request.args.get('sort_by', 'date')
     sort_order = request.args.get('sort_order', 'desc')
     
-    # 基本クエリの構築
-    query = WorkLog.query
-    
     # 日付範囲フィルター（空文字の場合は全期間取得）
+    start_date_obj = None
     if start_date and start_date.strip():
         try:
             start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-            query = query.filter(WorkLog.date >= start_date_obj)
         except ValueError:
             return jsonify({'error': '開始日の形式が正しくありません (YYYY-MM-DD)'}), 400
     
+    end_date_obj = None
     if end_date and end_date.strip():
         try:
             end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
-            query = query.filter(WorkLog.date <= end_date_obj)
         except ValueError:
             return jsonify({'error': '終了日の形式が正しくありません (YYYY-MM-DD)'}), 400
-    
-    # ユニット名フィルター
-    if unit_name:
-        query = query.filter(WorkLog.unit_name == unit_name)
-    
-    # 部署フィルター（Userテーブルとのジョイン）
-    if department:
-        query = query.join(User, WorkLog.employee_id == User.employee_id)\
-                    .filter(User.department_name == department)
-    
-    # 社員IDフィルター
-    if employee_id:
-        query = query.filter(WorkLog.employee_id.like(f'%{employee_id}%'))
-    
-    # ステータスフィルター（修正箇所）
-    if status:
-        if status == 'pending':
-            # 申請中データ全種類を取得（pending_add, pending_edit, pending_delete）
-            query = query.filter(
-                or_(
-                    WorkLog.status == 'pending_add',
-                    WorkLog.status == 'pending_edit', 
-                    WorkLog.status == 'pending_delete'
-                )
-            )
-        else:
-            # 通常の単一ステータスフィルター
-            query = query.filter(WorkLog.status == status)
-    
-    # 動的ソート実装
-    if sort_by == 'date':
-        if sort_order == 'asc':
-            query = query.order_by(WorkLog.date.asc())
-        else:
-            query = query.order_by(WorkLog.date.desc())
-    elif sort_by == 'employee_id':
-        if sort_order == 'asc':
-            query = query.order_by(WorkLog.employee_id.asc())
-        else:
-            query = query.order_by(WorkLog.employee_id.desc())
-    elif sort_by == 'minutes':
-        if sort_order == 'asc':
-            query = query.order_by(WorkLog.minutes.asc())
-        else:
-            query = query.order_by(WorkLog.minutes.desc())
-    elif sort_by == 'status':
-        if sort_order == 'asc':
-            query = query.order_by(WorkLog.status.asc())
-        else:
-            query = query.order_by(WorkLog.status.desc())
-    elif sort_by == 'unit_name':
-        if sort_order == 'asc':
-            query = query.order_by(WorkLog.unit_name.asc())
-        else:
-            query = query.order_by(WorkLog.unit_name.desc())
-    elif sort_by == 'work_type':
-        if sort_order == 'asc':
-            query = query.order_by(WorkLog.work_type.asc())
-        else:
-            query = query.order_by(WorkLog.work_type.desc())
-    else:
-        # デフォルトは日付降順
-        query = query.order_by(WorkLog.date.desc())
-    
+
     # CSV出力または件数取得の場合は特別処理
     csv_export = request.args.get('csv_export') == 'true'
     count_only = request.args.get('count_only') == 'true'
 
+    # アーカイブ済みの期間を含む場合はアーカイブ込みのビューから読む
+    # 日付指定なしの一覧は稼働中のパーティションのみを対象にするが、CSV出力とその件数確認は
+    # 出力から月が欠けないよう開始日が無ければ常にアーカイブを含める
+    include_archive = request.args.get('include_archive') == 'true' or (
+        (csv_export or count_only) and start_date_obj is None
+    )
+    source = worklog_read_source(start_date_obj, include_archive)
+    
+    # ユニット名・社員ID・ステータス（pending は申請中の全種類）の絞り込み条件
+    conditions = admin_worklog_conditions(
+        source,
+        start_date=start_date_obj,
+        end_date=end_date_obj,
+        unit_name=unit_name,
+        employee_id=employee_id,
+        status=status
+    )
+    
     if count_only:
-        print(f"件数取得処理: count_only={count_only}")
-        
-        # ✅ pending_editの重複を除外したカウント
-        # pending_editでoriginal_idがnullでないもの（編集後データ）を除外
-        count_query = query.filter(
-            (WorkLog.status != 'pending_edit') | 
-            (WorkLog.original_id == None)
-        )
-        
-        total_count = count_query.count()
-        print(f"取得件数（pending_edit重複除外後）: {total_count}")
+        # ✅ pending_editの重複（編集後データ）を除外したカウント
+        total_count = count_admin_worklogs(source, conditions, department)
+        current_app.logger.debug(f"取得件数（pending_edit重複除外後）: {total_count}")
         return jsonify({'count': total_count}), 200
 
+    # 返すフィールド（fields=id,date,employeeName のように指定、省略時はすべて）
+    # 指定されなかったカラムはSQLでも取得せず、社員情報を指定しない場合は users を結合しない
+    try:
+        selected_fields = select_fields(ADMIN_WORKLOG_FIELDS + ADMIN_WORKLOG_USER_FIELDS, request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    fields = tuple(field for field in selected_fields if field in ADMIN_WORKLOG_FIELDS)
+    user_fields = tuple(field for field in selected_fields if field in ADMIN_WORKLOG_USER_FIELDS)
+
     if csv_export:
-        # CSVの場合も同様の除外処理
-        csv_query = query.filter(
-            (WorkLog.status != 'pending_edit') | 
-            (WorkLog.original_id == None)
-        )
-        work_logs = csv_query.all()
+        # CSVの場合も編集後データを除外して全件取得
         paginated_logs = None
+        work_logs = admin_worklog_rows(
+            source, conditions, department, sort_by, sort_order, fields=fields, user_fields=user_fields
+        ).items
     else:
-        # ページネーション情報は編集後データを除外して計算（件数を正しく保つ）
-        display_query = query.filter(
-            (WorkLog.status != 'pending_edit') | 
-            (WorkLog.original_id == None)
+        # ページ内の編集前データ + 対応する編集後データ
+        paginated_logs = admin_worklog_rows(
+            source, conditions, department, sort_by, sort_order, page=page, per_page=100,
+            fields=fields, user_fields=user_fields
         )
-        paginated_logs = display_query.paginate(page=page, per_page=100, error_out=False)
-        
-        # 実際のデータ取得：ページ内の編集前データのIDを取得
-        page_log_ids = [log.id for log in paginated_logs.items]
-        
-        # 編集前データ + 対応する編集後データの両方を取得
-        work_logs = query.filter(
-            (WorkLog.id.in_(page_log_ids)) |  # ページ内の編集前データ
-            (WorkLog.original_id.in_(page_log_ids))  # 対応する編集後データ
-        ).all()
-
-    # すべてのemployee_idを抽出し、一括でユーザー情報を取得
-    employee_ids = list({log.employee_id for log in work_logs})
-    users = User.query.filter(User.employee_id.in_(employee_ids)).all()
-    user_dict = {u.employee_id: u for u in users}
+        work_logs = paginated_logs.items
 
     # 現在のユーザーのデフォルトユニットを取得
     current_user_id = get_jwt_identity()
     current_user_data = User.query.get(current_user_id)
     default_unit = current_user_data.default_unit if current_user_data else None
 
-    work_rows = []
-    for log in work_logs:
-        user = user_dict.get(log.employee_id)
-
-        work_rows.append({
-            'id': log.id,
-            'date': log.date.isoformat() if log.date else '',
-            'model': log.model or '',
-            'serialNumber': log.serial_number or '',
-            'workOrder': log.work_order or '',
-            'partNumber': log.part_number or '',
-            'orderNumber': log.order_number or '',
-            'quantity': str(log.quantity) if log.quantity is not None else '',
-            'unitName': log.unit_name,
-            'workType': log.work_type,
-            'minutes': str(log.minutes),
-            'remarks': log.remarks or '',
-            'status': log.status,
-            'editReason': log.edit_reason or '',
-            'originalId': log.original_id,
-
-            'employeeId': log.employee_id,
-            'employeeName': user.name if user else '不明',
-            'department': user.department_name if user else '不明',
-            'position': user.position if user else '不明',
-        })
+    # 社員情報（employeeName / department / position）はSQLで結合済み
+    work_rows = cached_rows_serializer(selected_fields)(work_logs)
 
     return jsonify({
         'workRows': work_rows,
@@ -288,12 +208,51 @@ def get_default_unit():
     現在のユーザーに設定されているデフォルトユニットを取得する
     """
     # 現在のユーザーを取得
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = load_current_user()
     
     if not user:
         return jsonify({'error': 'ユーザーが見つかりません'}), 404
     
     return jsonify({
         'defaultUnit': user.default_unit
-    }), 200
\ No newline at end of file
+    }), 200
+
+# 工数データ一括取り込み（CSV / XLSX）
+@admin_worklog_bp.route('/admin_worklog/import', methods=['POST'])
+@jwt_required()
+def import_admin_worklog():
+    """
+    過去の工数データをファイルから一括で取り込む
+    form data:
+        file: CSV または XLSX ファイル
+    query params:
+        dry_run: true の場合は検証のみ（書き込みなし）
+    """
+    from services.worklog_import import import_worklogs
+
+    # 管理者権限の確認
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    if not user or user.role_level < 2:
+        return jsonify({'error': '管理者権限が必要です'}), 403
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'error': 'ファイルが指定されていません'}), 400
+
+    dry_run = request.args.get('dry_run') == 'true'
+
+    try:
+        result = import_worklogs(upload.stream, upload.filename, dry_run=dry_run)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"工数データ取り込みエラー: {str(e)}")
+        return jsonify({'error': f'取り込みに失敗しました: {str(e)}'}), 500
+
+    # エラー一覧はレスポンスが肥大化しないよう先頭のみ返す
+    errors = result.pop('errors')
+    result['error_count'] = len(errors)
+    result['errors'] = errors[:IMPORT_ERROR_LIMIT]
+    return jsonify(result), 200
@@ -99,7 +99,6 @@ def get_user_reject_count(user_id):
 @approval_rejection_bp.route('/approval_rejection/approve_add', methods=['POST'])
 @jwt_required()
 def approve_add_worklog():
-   print('approve_add_worklog　関数実行')
    """✅ 最適化版：工数追加申請を承認する（軽量化Socket通知）"""
    data = request.get_json()
    worklog_id = data.get('worklog_id')
@@ -127,23 +126,6 @@ def approve_add_worklog():
        current_user = User.query.get(current_user_id)
        default_unit = current_user.default_unit if current_user else None
 
-       # ✅ Socket通知のみ（重いデータ取得は削除）
-       socketio = current_app.config.get('socketio')
-       if socketio:
-           # ✅ 申請者に承認通知のみ送信（最小限のデータ）
-           applicant_user = User.query.filter_by(employee_id=worklog.employee_id).first()
-           if applicant_user:
-               socketio.emit(
-                   'worklog_approved_with_data',
-                   {
-                       'type': 'add',
-                       'worklog_id': worklog_id,
-                       'message': '追加申請が承認されました',
-                       # ✅ worklog_dataを削除（フロントエンドで再取得）
-                   },
-                   room=str(applicant_user.id)
-               )
-
        return jsonify({
            'success': True,
            'message': '追加申請を承認しました',
@@ -159,7 +141,6 @@ def approve_add_worklog():
 @approval_rejection_bp.route('/approval_rejection/reject_add', methods=['POST'])
 @jwt_required()
 def reject_add_worklog():
-    print('【追加却下】')
     data = request.get_json()
     worklog_id = data.get('worklog_id')
     reject_reason = data.get('reject_reason')
@@ -187,25 +168,6 @@ def reject_add_worklog():
         current_user = User.query.get(current_user_id)
         default_unit = current_user.default_unit if current_user else None
 
-        # ✅ Socket通知のみ（重いデータ取得は削除）
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            # ✅ 申請者に却下通知のみ送信（最小限のデータ）
-            applicant_user = User.query.filter_by(employee_id=worklog.employee_id).first()
-            if applicant_user:
-                socketio.emit(
-                    'worklog_rejected_with_data',
-                    {
-                        'type': 'add',
-                        'worklog_id': worklog_id,
-                        'reject_reason': reject_reason,
-                        'message': f'追加申請が却下されました: {reject_reason}',
-                        # ✅ worklog_dataを削除（フロントエンドで再取得）
-                        'reject_count': get_user_reject_count(applicant_user.id)
-                    },
-                    room=str(applicant_user.id)
-                )
-        
         return jsonify({
             'success': True,
             'message': '追加申請を却下しました',
@@ -267,23 +229,6 @@ def approve_edit_worklog():
         current_user = User.query.get(current_user_id)
         default_unit = current_user.default_unit if current_user else None
 
-        # ✅ Socket通知のみ（重いデータ取得は削除）
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            # ✅ 申請者に承認通知のみ送信（最小限のデータ）
-            applicant_user = User.query.filter_by(employee_id=original_worklog.employee_id).first()
-            if applicant_user:
-                socketio.emit(
-                    'worklog_approved_with_data',
-                    {
-                        'type': 'edit',
-                        'worklog_id': worklog_id,
-                        'message': '編集申請が承認されました',
-                        # ✅ worklog_dataを削除（フロントエンドで再取得）
-                    },
-                    room=str(applicant_user.id)
-                )
-        
         return jsonify({
             'success': True,
             'message': '編集申請を承認しました',
@@ -332,25 +277,6 @@ def reject_edit_worklog():
         current_user = User.query.get(current_user_id)
         default_unit = current_user.default_unit if current_user else None
 
-        # ✅ Socket通知のみ（重いデータ取得は削除）
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            # ✅ 申請者に却下通知のみ送信（最小限のデータ）
-            applicant_user = User.query.filter_by(employee_id=original_worklog.employee_id).first()
-            if applicant_user:
-                socketio.emit(
-                    'worklog_rejected_with_data',
-                    {
-                        'type': 'edit',
-                        'worklog_id': worklog_id,
-                        'reject_reason': reject_reason,
-                        'message': f'編集申請が却下されました: {reject_reason}',
-                        # ✅ worklog_dataを削除（フロントエンドで再取得）
-                        'reject_count': get_user_reject_count(applicant_user.id)
-                    },
-                    room=str(applicant_user.id)
-                )
-        
         return jsonify({
             'success': True,
             'message': '編集申請を却下しました',
@@ -381,8 +307,6 @@ def approve_delete_worklog():
         if worklog.status != 'pending_delete':
             return jsonify({'error': '削除申請中のデータではありません'}), 400
         
-        employee_id = worklog.employee_id
-        
         # データを削除
         db.session.delete(worklog)
         db.session.commit()
@@ -391,24 +315,7 @@ def approve_delete_worklog():
         current_user_id = get_jwt_identity()
         current_user = User.query.get(current_user_id)
         default_unit = current_user.default_unit if current_user else None
-    
-        # ✅ Socket通知のみ（重いデータ取得は削除）
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            # ✅ 申請者に承認通知のみ送信（最小限のデータ）
-            applicant_user = User.query.filter_by(employee_id=employee_id).first()
-            if applicant_user:
-                socketio.emit(
-                    'worklog_approved_with_data',
-                    {
-                        'type': 'delete',
-                        'worklog_id': worklog_id,
-                        'message': '削除申請が承認されました',
-                        # ✅ worklog_dataを削除（フロントエンドで再取得）
-                    },
-                    room=str(applicant_user.id)
-                )
-        
+
         return jsonify({
             'success': True,
             'message': '削除申請を承認しました',
@@ -451,25 +358,6 @@ def reject_delete_worklog():
         current_user = User.query.get(current_user_id)
         default_unit = current_user.default_unit if current_user else None
 
-        # ✅ Socket通知のみ（重いデータ取得は削除）
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            # ✅ 申請者に却下通知のみ送信（最小限のデータ）
-            applicant_user = User.query.filter_by(employee_id=worklog.employee_id).first()
-            if applicant_user:
-                socketio.emit(
-                    'worklog_rejected_with_data',
-                    {
-                        'type': 'delete',
-                        'worklog_id': worklog_id,
-                        'reject_reason': reject_reason,
-                        'message': f'削除申請が却下されました: {reject_reason}',
-                        # ✅ worklog_dataを削除（フロントエンドで再取得）
-                        'reject_count': get_user_reject_count(applicant_user.id)
-                    },
-                    room=str(applicant_user.id)
-                )
-        
         return jsonify({
             'success': True,
             'message': '削除申請を却下しました',
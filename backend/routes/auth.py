@@ -1,8 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import timedelta
 from models import db, User
+from utils.passwords import hash_password
 from services.auth import validate_registration_data, validate_login_data
 
 # 認証関連のBlueprintを作成
@@ -26,7 +26,7 @@ def login():
     user = User.query.filter_by(employee_id=employee_id).first()
     
     # パスワード検証
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user or not user.check_password(password):
         return jsonify({'error': 'Invalid credentials'}), 401
 
     # ✅ 初回ログインのときだけ sound_enabled を False にする
@@ -67,7 +67,7 @@ def register_user():
         return jsonify({'error': 'Employee ID already exists'}), 400
     
     # パスワードハッシュ化
-    password_hash = generate_password_hash(data['password'])
+    password_hash = hash_password(data['password'])
     
     # 新規ユーザー作成
     new_user = User(
@@ -0,0 +1,145 @@
+# routes/batch.py - 複数のAPIリクエストを1回のHTTPリクエストでまとめて処理する
+#
+# 画面の読み込み時に続けて呼ばれる GET（/users/me・/worklog/unit-options・
+# /admin_worklog/pending_count など）を1回で送れるようにする。
+# サブリクエストは同じアプリコンテキストの中で順に実行するため、DBセッション（接続）と
+# ログインユーザーの行を共有する（ユーザーは最初に1回だけ読み込み、各ルートの
+# load_current_user は identity map から返る）。
+# g はアプリコンテキストにあるため、サブリクエストごとに新しい g に差し替えて実行し、
+# ルートが g に置いた値が次のサブリクエストに残らないようにする。
+# before_request / after_request（プロファイリングの権限確認・計測など）はサブリクエストごとにも動く。
+
+from flask import Blueprint, current_app, jsonify, request
+from flask.globals import app_ctx
+from flask_jwt_extended import jwt_required
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+from models import db
+from utils.auth_helpers import load_current_user
+
+batch_bp = Blueprint('batch', __name__)
+
+# 1回にまとめられるサブリクエストの最大数
+BATCH_MAX_REQUESTS = 20
+
+# サブリクエストで使えるメソッド
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+
+# サブリクエストに引き継ぐヘッダー
+FORWARDED_HEADERS = ('Authorization', 'Accept-Language', 'User-Agent')
+
+
+def _validate_item(item):
+    """サブリクエストの指定を検証してエラーメッセージを返す（問題なければ None）"""
+    if not isinstance(item, dict):
+        return 'リクエストはオブジェクトで指定してください'
+    path = item.get('path')
+    if not isinstance(path, str) or not path.startswith('/api/'):
+        return 'path は /api/ で始まるパスを指定してください'
+    if path.split('?', 1)[0].rstrip('/') == '/api/batch':
+        return '/api/batch は入れ子にできません'
+    if str(item.get('method', 'GET')).upper() not in BATCH_METHODS:
+        return f"method は {' / '.join(BATCH_METHODS)} のいずれかです"
+    return None
+
+
+def _response_body(response):
+    if response.is_json:
+        return response.get_json(silent=True)
+    return response.get_data(as_text=True)
+
+
+def dispatch_subrequest(app, item, headers):
+    """サブリクエストを現在のアプリコンテキストの中でルートに渡して実行する
+
+    DBセッションは共有し、g はサブリクエスト専用のものにする。
+    before_request / after_request / teardown_request も通常のリクエストと同じく実行する。
+
+    Args:
+        app: Flask アプリ
+        item (dict): {'method', 'path', 'params', 'body'}
+        headers (dict): 引き継ぐヘッダー
+
+    Returns:
+        Response: ルートのレスポンス（エラーハンドラーの結果を含む）
+    """
+    builder = EnvironBuilder(
+        path=item['path'],
+        method=str(item.get('method', 'GET')).upper(),
+        query_string=item.get('params'),
+        json=item.get('body'),
+        headers=headers,
+        base_url=request.host_url,
+        environ_overrides={'REMOTE_ADDR': request.remote_addr}
+    )
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+
+    # アプリコンテキストが有効な間はリクエストコンテキストだけが作られる（DBセッションは共有）
+    context = app_ctx._get_current_object()
+    batch_g = context.g
+    context.g = app.app_ctx_globals_class()
+    try:
+        with app.request_context(environ):
+            try:
+                rv = app.preprocess_request()
+                if rv is None:
+                    rv = app.dispatch_request()
+            except HTTPException as e:
+                # 404 / 405 などは HTML ではなくほかのAPIと同じ形のJSONで返す
+                rv = (jsonify({'error': e.description}), e.code)
+            except Exception as e:
+                try:
+                    # JWT のエラーなどはアプリのエラーハンドラーでレスポンスにする
+                    rv = app.handle_user_exception(e)
+                except Exception as e:
+                    db.session.rollback()
+                    current_app.logger.error(f"バッチのサブリクエストエラー（{item['path']}）: {str(e)}")
+                    rv = (jsonify({'error': f'処理中にエラーが発生しました: {str(e)}'}), 500)
+            return app.process_response(app.make_response(rv))
+    finally:
+        context.g = batch_g
+
+
+@batch_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch():
+    """
+    複数のAPIリクエストをまとめて実行する
+    JSON:
+        {"requests": [{"id": 任意の識別子, "method": "GET", "path": "/api/users/me",
+                       "params": {クエリパラメータ}, "body": {JSON本文}}]}
+    Returns:
+        {"responses": [{"id", "status", "body"}]}（requests と同じ順序）
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('requests')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'requests を指定してください'}), 400
+    if len(items) > BATCH_MAX_REQUESTS:
+        return jsonify({'error': f'一度にまとめられるのは{BATCH_MAX_REQUESTS}件までです'}), 400
+    for index, item in enumerate(items):
+        message = _validate_item(item)
+        if message:
+            return jsonify({'error': f'requests[{index}]: {message}'}), 400
+
+    # ログインユーザーを先に読み込んでおく（各ルートでは identity map から返る）
+    user = load_current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+    app = current_app._get_current_object()
+
+    responses = []
+    for item in items:
+        response = dispatch_subrequest(app, item, headers)
+        responses.append({
+            'id': item.get('id'),
+            'status': response.status_code,
+            'body': _response_body(response)
+        })
+    return jsonify({'responses': responses}), 200
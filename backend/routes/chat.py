@@ -7,22 +7,14 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import or_, and_, desc
 import logging
 from datetime import datetime
-from pytz import timezone,utc
+from services.read_models import chat_message_rows
+from utils.serializers import serialize_chat_message_rows
+from utils.time_format import format_jst
 
 from flask_socketio import SocketIO, emit, join_room, leave_room, disconnect
 
 chat_bp = Blueprint("chat", __name__)
 
-# 時間を日本時間に変換
-def to_jst(dt):
-    if not dt:
-        return None
-    if dt.tzinfo is None:
-        dt = utc.localize(dt)  # UTCとして認識させる
-    jst = timezone('Asia/Tokyo')
-    return dt.astimezone(jst).isoformat()
-
-
 # chat取得
 @chat_bp.route('/chat/messages/<int:user_id>', methods=['GET'])
 @jwt_required()
@@ -42,14 +34,6 @@ def get_chat_messages(user_id):
         if not permission:
             return jsonify({'error': 'チャット許可がありません'}), 403
             
-        # 両ユーザー間のメッセージを取得
-        messages = ChatMessage.query.filter(
-            or_(
-                and_(ChatMessage.sender_id == current_user_id, ChatMessage.receiver_id == user_id),
-                and_(ChatMessage.sender_id == user_id, ChatMessage.receiver_id == current_user_id)
-            )
-        ).order_by(ChatMessage.created_at).all()
-        
         # ✅ 既読処理前に未読メッセージをカウント
         unread_messages = ChatMessage.query.filter_by(
             sender_id=user_id,
@@ -66,36 +50,13 @@ def get_chat_messages(user_id):
         
         db.session.commit()
         
-        # ✅ 未読メッセージがあった場合、送信者に既読通知
-        if unread_count > 0:
-            # 送信者（user_id）の最新チャット履歴を取得
-            sender_messages = get_chat_messages_between_users(user_id, current_user_id)
-            sender_threads = get_user_chat_threads(user_id)
-            
-            # WebSocketで送信者に既読通知
-            socketio = current_app.config.get('socketio')
-            if socketio:
-                socketio.emit('chat_messages_updated', {
-                    'chat_partner_id': current_user_id,  # 送信者から見た相手（既読した人）
-                    'messages': sender_messages,         # 既読状態が反映された履歴
-                    'threads': sender_threads            # 更新されたスレッド一覧
-                }, room=str(user_id))
-                
-                current_app.logger.info(f"既読通知送信: ユーザー{user_id}に{unread_count}件の既読通知を送信")
-        
+        # 送信者への既読通知は変更通知（services/change_feed.py）が送る
+
+        # 両ユーザー間のメッセージを取得（既読処理の後に取得して既読状態を反映する）
+        messages = chat_message_rows(current_user_id, user_id)
+
         # 結果をJSON形式に変換
-        result = []
-        for msg in messages:
-            result.append({
-                'id': msg.id,
-                'sender_id': msg.sender_id,
-                'receiver_id': msg.receiver_id,
-                'message': msg.message,
-                'is_read': msg.is_read,
-                'is_edited': msg.is_edited,
-                'created_at': to_jst(msg.created_at),
-                'updated_at': to_jst(msg.updated_at)
-            })
+        result = serialize_chat_message_rows(messages)
             
         return jsonify(result), 200
         
@@ -152,21 +113,9 @@ def send_message():
         db.session.commit()
         
         # ②該当の組み合わせのメッセージを全件取得
+        # （受信者への全履歴の送信は変更通知（services/change_feed.py）が行う）
         sender_messages = get_chat_messages_between_users(current_user_id, receiver_id)
-        receiver_messages = get_chat_messages_between_users(receiver_id, current_user_id)
-        
-        # 送信者・受信者の最新チャットスレッド情報を取得
         sender_threads = get_user_chat_threads(current_user_id)
-        receiver_threads = get_user_chat_threads(receiver_id)
-
-        # ③WebSocketで受信者に全履歴を送信
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            socketio.emit('chat_messages_updated', {
-                'chat_partner_id': current_user_id,  # 受信者から見た相手（送信者）
-                'messages': receiver_messages,
-                'threads': receiver_threads
-            }, room=str(receiver_id))
 
         # 送信者にはHTTP応答で全履歴を返却
         return jsonify({
@@ -188,25 +137,9 @@ def send_message():
 def get_chat_messages_between_users(user_id, partner_id):
     """2ユーザー間のメッセージ履歴を取得（既読処理は行わない）"""
     try:
-        messages = ChatMessage.query.filter(
-            or_(
-                and_(ChatMessage.sender_id == user_id, ChatMessage.receiver_id == partner_id),
-                and_(ChatMessage.sender_id == partner_id, ChatMessage.receiver_id == user_id)
-            )
-        ).order_by(ChatMessage.created_at).all()
+        messages = chat_message_rows(user_id, partner_id)
         
-        result = []
-        for msg in messages:
-            result.append({
-                'id': msg.id,
-                'sender_id': msg.sender_id,
-                'receiver_id': msg.receiver_id,
-                'message': msg.message,
-                'is_read': msg.is_read,
-                'is_edited': msg.is_edited,
-                'created_at': to_jst(msg.created_at),
-                'updated_at': to_jst(msg.updated_at)
-            })
+        result = serialize_chat_message_rows(messages)
             
         return result
         
@@ -255,7 +188,7 @@ def get_user_chat_threads(user_id):
                 'position': partner.position,
                 'unread': unread_count,
                 'lastMessage': latest_message.message if latest_message else None,
-                'lastMessageTime': to_jst(latest_message.created_at) if latest_message else None
+                'lastMessageTime': format_jst(latest_message.created_at) if latest_message else None
             }
             
             result.append(thread_info)
@@ -342,30 +275,10 @@ def update_message(message_id):
         db.session.commit()
         
         # ✅ 編集後の全メッセージ履歴を取得
+        # （双方への全履歴の送信は変更通知（services/change_feed.py）が行う）
         sender_messages = get_chat_messages_between_users(current_user_id, message.receiver_id)
-        receiver_messages = get_chat_messages_between_users(message.receiver_id, current_user_id)
-        
-        # ✅ 最新スレッド情報を取得
         sender_threads = get_user_chat_threads(current_user_id)
-        receiver_threads = get_user_chat_threads(message.receiver_id)
-        
-        # ✅ WebSocketで統一イベントを送信
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            # 受信者に編集後の全履歴を送信
-            socketio.emit('chat_messages_updated', {
-                'chat_partner_id': current_user_id,  # 受信者から見た相手（編集者）
-                'messages': receiver_messages,
-                'threads': receiver_threads
-            }, room=str(message.receiver_id))
-            
-            # 送信者（編集者）にも確認用で全履歴を送信
-            socketio.emit('chat_messages_updated', {
-                'chat_partner_id': message.receiver_id,  # 送信者から見た相手
-                'messages': sender_messages,
-                'threads': sender_threads
-            }, room=str(current_user_id))
-        
+
         # HTTP応答として編集後の全履歴を返却
         return jsonify({
             'messages': sender_messages,
@@ -408,30 +321,10 @@ def delete_message(message_id):
         db.session.commit()
         
         # ✅ 削除後の全メッセージ履歴を取得
+        # （双方への全履歴の送信は変更通知（services/change_feed.py）が行う）
         sender_messages = get_chat_messages_between_users(current_user_id, receiver_id)
-        receiver_messages = get_chat_messages_between_users(receiver_id, current_user_id)
-        
-        # ✅ 最新スレッド情報を取得
         sender_threads = get_user_chat_threads(current_user_id)
-        receiver_threads = get_user_chat_threads(receiver_id)
-        
-        # ✅ WebSocketで統一イベントを送信
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            # 受信者に削除後の全履歴を送信
-            socketio.emit('chat_messages_updated', {
-                'chat_partner_id': current_user_id,  # 受信者から見た相手（削除者）
-                'messages': receiver_messages,
-                'threads': receiver_threads
-            }, room=str(receiver_id))
-            
-            # 送信者（削除者）にも確認用で全履歴を送信
-            socketio.emit('chat_messages_updated', {
-                'chat_partner_id': receiver_id,  # 送信者から見た相手
-                'messages': sender_messages,
-                'threads': sender_threads
-            }, room=str(current_user_id))
-        
+
         # HTTP応答として削除後の全履歴を返却
         return jsonify({
             'messages': sender_messages,
@@ -492,25 +385,14 @@ def mark_as_read(message_id):
         
         current_app.logger.info(f"一括既読処理完了: {read_count}件のメッセージを既読にしました")
         
-        # ✅ 既読処理後に送信者の最新チャット履歴を取得
-        sender_messages = get_chat_messages_between_users(sender_id, current_user_id)
-        sender_threads = get_user_chat_threads(sender_id)
-        
+        # 送信者への既読通知は変更通知（services/change_feed.py）が送る
+
         # ✅ 受信者の未読数も計算
         current_user_unread_count = ChatMessage.query.filter_by(
             receiver_id=current_user_id,
             is_read=False
         ).count()
-        
-        # ✅ WebSocketで送信者に既読通知
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            socketio.emit('chat_messages_updated', {
-                'chat_partner_id': current_user_id,  # 送信者から見た相手（既読した人）
-                'messages': sender_messages,         # 既読状態が反映された履歴
-                'threads': sender_threads            # 更新されたスレッド一覧
-            }, room=str(sender_id))
-        
+
         return jsonify({
             'success': True,
             'read_count': read_count,
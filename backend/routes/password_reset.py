@@ -1,10 +1,11 @@
 from flask import Blueprint, request, jsonify, current_app, render_template, url_for
-from werkzeug.security import generate_password_hash
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import uuid
 from datetime import datetime, timedelta
 import secrets
 from models import db, User, PasswordResetRequest
+from models.password_reset import hash_reset_token
+from utils.passwords import hash_password
 from services.email_service import send_password_reset_email, send_admin_reset_notification
 from services.auth import validate_reset_request, validate_reset_token
 
@@ -39,7 +40,7 @@ def request_password_reset():
     # DBにリセットリクエストを保存
     reset_request = PasswordResetRequest(
         user_id=user.id,
-        token=token,
+        token_hash=hash_reset_token(token),  # トークン自体はメールにのみ記載する
         expires_at=datetime.utcnow() + timedelta(hours=24)  # 24時間有効
     )
     
@@ -50,11 +51,8 @@ def request_password_reset():
     reset_url = f"{request.host_url.rstrip('/')}/api/password-reset-page?token={token}"
 
     
-    # メール送信
-    try:
-        send_password_reset_email(user.email, user.name, reset_url)
-    except Exception as e:
-        current_app.logger.error(f"Failed to send email: {str(e)}")
+    # 送信キューに登録（送信はバックグラウンドのワーカーが行う）
+    if not send_password_reset_email(user.email, user.name, reset_url):
         return jsonify({'error': 'Failed to send email'}), 500
     
     return jsonify({'message': 'Password reset email sent successfully'})
@@ -90,7 +88,7 @@ def request_admin_password_reset():
     db.session.add(reset_request)
     db.session.commit()
     
-    # 管理者へ通知（メールなど）
+    # 管理者へ通知（送信キューに登録）
     try:
         # 管理者一覧を取得
         admins = User.query.filter(User.role_level >= 3).all()  # 部長以上は管理者
@@ -129,7 +127,7 @@ def reset_password():
     new_password = data.get('newPassword')
     
     # トークンのリセットリクエストを検索
-    reset_request = PasswordResetRequest.query.filter_by(token=token, is_used=False).first()
+    reset_request = PasswordResetRequest.find_unused(token)
     
     if not reset_request:
         return jsonify({'error': 'Invalid or used token'}), 400
@@ -145,7 +143,7 @@ def reset_password():
         return jsonify({'error': 'User not found'}), 404
     
     # パスワード更新
-    user.password_hash = generate_password_hash(new_password)
+    user.password_hash = hash_password(new_password)
     
     # トークンを使用済みにする
     reset_request.is_used = True
@@ -167,7 +165,7 @@ def password_reset_page():
         return render_template('password_reset_error.html', error='トークンが見つかりません')
     
     # トークンのリセットリクエストを検索
-    reset_request = PasswordResetRequest.query.filter_by(token=token, is_used=False).first()
+    reset_request = PasswordResetRequest.find_unused(token)
     
     if not reset_request:
         return render_template('password_reset_error.html', error='無効またはすでに使用されたトークンです')
@@ -211,7 +209,7 @@ def change_password():
         return jsonify({'error': 'Current password is incorrect'}), 400
     
     # パスワード更新
-    user.password_hash = generate_password_hash(new_password)
+    user.password_hash = hash_password(new_password)
     db.session.commit()
     
     return jsonify({'message': 'Password has been changed successfully'})
@@ -5,6 +5,13 @@ from flask_jwt_extended import decode_token
 from flask import current_app, request
 import jwt
 
+from models import User
+from utils.metrics import socket_client_connected, socket_client_disconnected
+from services.change_feed import start_change_feed
+
+# 接続中のセッションID → ルームの種類（メトリクス用）
+connected_room_types = {}
+
 def register_socket_events(socketio):
     @socketio.on('connect')
     def handle_connect():
@@ -26,6 +33,15 @@ def register_socket_events(socketio):
                 # ユーザーIDをルームとして使用
                 join_room(str(current_user_id))
                 current_app.logger.info(f"ユーザーID {current_user_id} がWebSocketに接続しました")
+
+                # 管理者・一般ユーザー別の接続数を記録
+                user = User.query.get(current_user_id)
+                room_type = 'admin' if user and user.role_level >= 2 else 'user'
+                connected_room_types[request.sid] = room_type
+                socket_client_connected(room_type)
+
+                # 変更通知の受信スレッドを起動（HTTPリクエストより先に接続された場合）
+                start_change_feed(current_app)
                 
                 return True
             except jwt.ExpiredSignatureError:
@@ -40,4 +56,10 @@ def register_socket_events(socketio):
         except Exception as e:
             current_app.logger.error(f"WebSocket接続エラー: {str(e)}")
             disconnect()
-            return False
\ No newline at end of file
+            return False
+
+    @socketio.on('disconnect')
+    def handle_disconnect():
+        room_type = connected_room_types.pop(request.sid, None)
+        if room_type:
+            socket_client_disconnected(room_type)
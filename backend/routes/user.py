@@ -3,17 +3,59 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User
+from services.read_models import user_directory_page, user_rows
+from utils.auth_helpers import load_current_user
+from utils.http_cache import conditional_json
+from utils.serializers import USER_FIELDS, cached_rows_serializer, select_fields
 
 user_bp = Blueprint("user", __name__)
 
+# ユーザー一覧の1ページの最大件数
+USER_PAGE_MAX = 500
+
+
+def user_list_response():
+    """ユーザー一覧のレスポンス（/users・/admin_users 共通）
+
+    query params:
+        fields: 返すフィールド（カンマ区切り、例: id,name）
+        q: 氏名・社員ID・部署名の前方一致検索
+        page / per_page: ページ番号と件数（q を含めてすべて省略した場合は全件を配列で返す）
+    """
+    try:
+        fields = select_fields(USER_FIELDS, request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    serialize = cached_rows_serializer(fields)
+
+    search = (request.args.get('q') or '').strip()
+    if not search and 'page' not in request.args and 'per_page' not in request.args:
+        # 従来方式：全件を配列で返す（後方互換性）
+        return conditional_json(serialize(user_rows(fields)))
+
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 100, type=int), USER_PAGE_MAX)
+    users = user_directory_page(fields, search=search, page=page, per_page=per_page)
+    return conditional_json({
+        'users': serialize(users.items),
+        'pagination': {
+            'total_items': users.total,
+            'total_pages': users.pages,
+            'current_page': users.page,
+            'per_page': users.per_page,
+            'has_prev': users.has_prev,
+            'has_next': users.has_next,
+        }
+    })
+
+
 @user_bp.route("/users", methods=["GET"])
 @jwt_required()
 def get_users():
     """
-    全従業員一覧を取得するAPI。
+    従業員一覧を取得するAPI（ページネーション・検索・フィールド選択対応）。
     """
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    return user_list_response()
 
 # 現在のユーザーの最新情報をデータベースから取得
 @user_bp.route("/users/me", methods=["GET"])
@@ -22,8 +64,7 @@ def get_current_user():
     """
     現在のユーザーの最新情報をデータベースから取得するAPI。
     """
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = load_current_user()
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -1,10 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 from datetime import datetime
 import json
 
 from models import db, User, WorkLog, WorkType
-from services.worklog import validate_worklog_data
+from services.worklog import validate_worklog_batch, save_daily_worklog
 
 # Blueprintの作成
 worklog_bp = Blueprint('worklog', __name__)
@@ -17,81 +17,34 @@ def create_worklog():
     data = request.get_json()
     
     # デバッグログ
-    print(f"Received data: {data}")
-    print(f"Current user ID: {current_user_id}")
+    current_app.logger.debug(f"Received data: {data}")
+    current_app.logger.debug(f"Current user ID: {current_user_id}")
     
-    # データの検証
-    validation_result = validate_worklog_data(data)
+    # データの検証（全行のエラーをまとめて返す）
+    validation_result = validate_worklog_batch(data)
     if not validation_result['valid']:
-        return jsonify({'error': validation_result['message']}), 400
+        return jsonify({
+            'error': validation_result['message'],
+            'errors': validation_result['errors']
+        }), 400
     
     try:
         # 現在のユーザーを取得
         user = User.query.get(current_user_id)
-        print(f"Found user: {user.name if user else 'None'}")
+        current_app.logger.debug(f"Found user: {user.name if user else 'None'}")
         
         if not user:
             return jsonify({'error': 'ユーザーが見つかりません'}), 404
         
         employee_id = user.employee_id
         
-        # 日付をパース
-        work_date = datetime.fromisoformat(data['workDate']).date()
-        
-        # 同じ日の既存データを探す（下書き状態のみ）
-        existing_logs = WorkLog.query.filter_by(
-            employee_id=employee_id,
-            date=work_date,
-            status='draft'
-        ).all()
-        
-        print(f"Existing logs count: {len(existing_logs)}")
-        
-        # 既存データがあれば削除
-        if existing_logs:
-            for log in existing_logs:
-                db.session.delete(log)
-        
-        # 新しい工数データを追加
-        for row in data['workRows']:
-            # 必須項目のチェック
-            if not row.get('unitName') or not row.get('workType') or not row.get('minutes'):
-                continue
-            # quantity の "N/A" 判定 → None に変換（追加部分）
-            quantity_raw = row.get('quantity')
-            if quantity_raw == "N/A":
-                quantity = None
-            else:
-                try:
-                    quantity = int(quantity_raw) if quantity_raw is not None else None
-                except ValueError:
-                    quantity = None
-
-            # minutes も安全に変換
-            try:
-                minutes = int(row.get('minutes', 0))
-            except ValueError:
-                minutes = 0
-
-            print(f"Adding worklog row: {row}")
-                
-            work_log = WorkLog(
-                employee_id=employee_id,
-                row_number=row.get('id', ''),
-                date=work_date,
-                model=row.get('model', ''),
-                serial_number=row.get('serialNumber', ''),
-                work_order=row.get('workOrder', ''),
-                part_number=row.get('partNumber', ''),
-                order_number=row.get('orderNumber', ''),
-                quantity=quantity,
-                unit_name=row.get('unitName', ''),
-                work_type=row.get('workType', ''),
-                minutes=minutes,
-                remarks=row.get('remarks', ''),
-                status='draft'
-            )
-            db.session.add(work_log)
+        # 既存の下書きと row_number で照合して差分のみ保存（検証時に型変換済みの値を使う）
+        result = save_daily_worklog(
+            employee_id,
+            validation_result['work_date'],
+            validation_result['rows']
+        )
+        current_app.logger.debug(f"Worklog diff saved: {result}")
         
         db.session.commit()
         return jsonify({
@@ -102,9 +55,8 @@ def create_worklog():
         
     except Exception as e:
         db.session.rollback()
-        import traceback
-        traceback.print_exc()  # スタックトレースを出力
-        print(f"Error details: {str(e)}")
+        # スタックトレース付きで出力
+        current_app.logger.exception(f"工数データの保存エラー: {str(e)}")
         return jsonify({'error': f'データの保存に失敗しました: {str(e)}'}), 500
 
 @worklog_bp.route('/worklog/daily', methods=['GET'])
@@ -139,11 +91,16 @@ def get_daily_worklog():
     if work_logs:
         latest_updated = max(log.updated_at for log in work_logs).isoformat()
     
+    # 行IDには保存時の row_number を返す（差分保存で同じ行として照合できるように）
+    # row_number が欠けている・重複している場合は従来どおり連番を振る
+    row_numbers = [log.row_number for log in work_logs]
+    use_row_number = None not in row_numbers and len(set(row_numbers)) == len(row_numbers)
+
     # レスポンス形式に変換
     work_rows = []
     for idx, log in enumerate(work_logs, 1):
         work_rows.append({
-            'id': idx,
+            'id': log.row_number if use_row_number else idx,
             'model': log.model or '',
             'serialNumber': log.serial_number or '',
             'workOrder': log.work_order or '',
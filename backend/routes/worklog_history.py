@@ -3,13 +3,15 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 from datetime import datetime
-from pytz import timezone
-from datetime import timezone as dt_timezone
 import json
 from sqlalchemy import or_
 
 from models import db, User, WorkLog
 from services.worklog import validate_worklog_data
+from services.read_models import worklog_history_page, worklog_history_rows
+from services.worklog_partition import worklog_read_source
+from utils.auth_helpers import load_current_user
+from utils.serializers import WORKLOG_HISTORY_FIELDS, cached_rows_serializer, select_fields
 
 # Blueprintの作成
 worklog_history_bp = Blueprint('worklog_history', __name__)
@@ -19,8 +21,6 @@ worklog_history_bp = Blueprint('worklog_history', __name__)
 @jwt_required()
 def get_worklog_history():
     """工数履歴データを取得する（ページネーション・フィルタリング対応）"""
-    print('get_worklog_history()関数実行 - 最適化版')
-
     current_user_id = get_jwt_identity()
     
     # クエリパラメータの取得
@@ -34,10 +34,17 @@ def get_worklog_history():
     per_page = request.args.get('per_page', 100, type=int)
     sort_by = request.args.get('sort_by', 'date')
     sort_order = request.args.get('sort_order', 'desc')
+    include_archive = request.args.get('include_archive') == 'true'
+
+    # 返すフィールド（fields=id,date,minutes のように指定、省略時はすべて）
+    try:
+        fields = select_fields(WORKLOG_HISTORY_FIELDS, request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # パラメータが存在する場合は新方式、ない場合は従来方式
     use_pagination = any([start_date, end_date, model, work_type, status, 
-                         page != 1, per_page != 100])
+                         page != 1, per_page != 100, include_archive])
     
     if use_pagination:
         # 新方式：ページネーション・フィルタリング対応
@@ -52,18 +59,25 @@ def get_worklog_history():
             page=page,
             per_page=per_page,
             sort_by=sort_by,
-            sort_order=sort_order
+            sort_order=sort_order,
+            fields=fields,
+            include_archive=include_archive
         )
     else:
-        # 従来方式：全データ取得（後方互換性）
-        worklog_data = get_user_worklog_data_legacy(current_user_id)
+        # 従来方式：全データ取得（後方互換性、アーカイブ済みの月は含まない）
+        worklog_data = get_user_worklog_data_legacy(current_user_id, fields=fields)
     
     return jsonify(worklog_data), 200
 
 def get_user_worklog_data_paginated(user_id, start_date=None, end_date=None, 
                                   model=None, work_type=None, unit_name=None, status=None,
-                                  page=1, per_page=100, sort_by='date', sort_order='desc'):
-    """新方式：ユーザーの工数履歴データを取得する（ページネーション・フィルタリング対応）"""
+                                  page=1, per_page=100, sort_by='date', sort_order='desc',
+                                  fields=WORKLOG_HISTORY_FIELDS, include_archive=False):
+    """新方式：ユーザーの工数履歴データを取得する（ページネーション・フィルタリング対応）
+
+    開始日がアーカイブ済みの期間にかかる場合、または include_archive の場合は
+    アーカイブを含むビューから読む（/admin_worklog と同じ判定）。
+    """
     try:
         user = User.query.get(user_id)
         if not user:
@@ -78,111 +92,58 @@ def get_user_worklog_data_paginated(user_id, start_date=None, end_date=None,
                     'has_next': False,
                 }
             }
-
-        jst = timezone('Asia/Tokyo')
-        
-        # 基本クエリの構築
-        query = WorkLog.query.filter_by(employee_id=user.employee_id)
         
-        # 日付範囲フィルター
+        # 日付範囲（無効な日付は無視）
+        start_date_obj = None
         if start_date and start_date.strip():
             try:
                 start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-                query = query.filter(WorkLog.date >= start_date_obj)
             except ValueError:
-                pass  # 無効な日付は無視
+                pass
         
+        end_date_obj = None
         if end_date and end_date.strip():
             try:
                 end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
-                query = query.filter(WorkLog.date <= end_date_obj)
             except ValueError:
-                pass  # 無効な日付は無視
+                pass
+
+        # アーカイブ済みの期間を含む場合はアーカイブ込みのビューから読む
+        source = worklog_read_source(start_date_obj, include_archive)
+
+        # 絞り込み条件の構築
+        conditions = []
+        
+        # 日付範囲フィルター
+        if start_date_obj:
+            conditions.append(source.date >= start_date_obj)
+        if end_date_obj:
+            conditions.append(source.date <= end_date_obj)
         
         # MODELフィルター
         if model and model != 'all':
-            query = query.filter(WorkLog.model == model)
-        
+            conditions.append(source.model == model)
         
         # ユニット名フィルター
         if unit_name and unit_name != 'all':
-            query = query.filter(WorkLog.unit_name == unit_name)    
+            conditions.append(source.unit_name == unit_name)
         
         # 工事区分フィルター
         if work_type and work_type != 'all':
-            query = query.filter(WorkLog.work_type == work_type)
+            conditions.append(source.work_type == work_type)
         
         # ステータスフィルター
         if status and status != 'all':
-            query = query.filter(WorkLog.status == status)
-        
-        # 動的ソート実装
-        if sort_by == 'date':
-            if sort_order == 'asc':
-                query = query.order_by(WorkLog.date.asc())
-            else:
-                query = query.order_by(WorkLog.date.desc())
-        elif sort_by == 'minutes':
-            if sort_order == 'asc':
-                query = query.order_by(WorkLog.minutes.asc())
-            else:
-                query = query.order_by(WorkLog.minutes.desc())
-        elif sort_by == 'status':
-            if sort_order == 'asc':
-                query = query.order_by(WorkLog.status.asc())
-            else:
-                query = query.order_by(WorkLog.status.desc())
-        elif sort_by == 'updated_at':
-            if sort_order == 'asc':
-                query = query.order_by(WorkLog.updated_at.asc())
-            else:
-                query = query.order_by(WorkLog.updated_at.desc())
-        else:
-            # デフォルトは最終更新日時の降順
-            query = query.order_by(WorkLog.updated_at.desc())
+            conditions.append(source.status == status)
         
-        # 編集件数のカウントを編集前だけに限定する
-        display_query = query.filter(
-                or_(
-                    WorkLog.status != 'pending_edit',
-                    WorkLog.original_id == None
-                )
-            )
-
-        # ページネーション実行       
-        paginated_logs = display_query.paginate(page=page, per_page=per_page, error_out=False)
-        # このページで選ばれた「編集前」ID群
-        page_log_ids = [log.id for log in paginated_logs.items]
-
-        # 返却用の実データは「編集前」＋「対応する編集後」を取得
-        work_logs = query.filter(
-            or_(
-                WorkLog.id.in_(page_log_ids),
-                WorkLog.original_id.in_(page_log_ids)
-            )
-        ).order_by(WorkLog.updated_at.desc()).all()
+        # ページ内の「編集前」＋「対応する編集後」を行タプルで取得
+        paginated_logs = worklog_history_page(
+            user.employee_id, conditions, page, per_page, sort_by, sort_order, fields=fields, source=source
+        )
+        work_logs = paginated_logs.items
         
         # レスポンス形式に変換
-        work_rows = []
-        for log in work_logs:
-            work_rows.append({
-                'id': log.id,
-                'date': log.date.isoformat() if log.date else '',
-                'model': log.model or '',
-                'serialNumber': log.serial_number or '',
-                'workOrder': log.work_order or '',
-                'partNumber': log.part_number or '',
-                'orderNumber': log.order_number or '',
-                'quantity': str(log.quantity) if log.quantity is not None else '',
-                'unitName': log.unit_name,
-                'workType': log.work_type,
-                'minutes': str(log.minutes),
-                'remarks': log.remarks or '',
-                'status': log.status,
-                'editReason': log.edit_reason or '',
-                'originalId': log.original_id,
-                'updatedAt': log.updated_at.replace(tzinfo=dt_timezone.utc).astimezone(jst).isoformat() if log.updated_at else None
-            })
+        work_rows = cached_rows_serializer(fields)(work_logs)
         
         # 最終更新日時を取得
         latest_updated = None
@@ -217,41 +178,18 @@ def get_user_worklog_data_paginated(user_id, start_date=None, end_date=None,
             }
         }
 
-def get_user_worklog_data_legacy(user_id):
+def get_user_worklog_data_legacy(user_id, fields=WORKLOG_HISTORY_FIELDS):
     """従来方式：ユーザーの工数履歴データを取得する（全データ取得）"""
     try:
         user = User.query.get(user_id)
         if not user:
             return {'workRows': [], 'updatedAt': None}
-
-        jst = timezone('Asia/Tokyo')
         
         # 工数データを取得（最終更新日時の降順）
-        work_logs = WorkLog.query.filter_by(
-            employee_id=user.employee_id,
-        ).order_by(WorkLog.updated_at.desc()).all()
+        work_logs = worklog_history_rows(user.employee_id, fields=fields)
         
         # レスポンス形式に変換
-        work_rows = []
-        for log in work_logs:
-            work_rows.append({
-                'id': log.id,
-                'date': log.date.isoformat() if log.date else '',
-                'model': log.model or '',
-                'serialNumber': log.serial_number or '',
-                'workOrder': log.work_order or '',
-                'partNumber': log.part_number or '',
-                'orderNumber': log.order_number or '',
-                'quantity': str(log.quantity) if log.quantity is not None else '',
-                'unitName': log.unit_name,
-                'workType': log.work_type,
-                'minutes': str(log.minutes),
-                'remarks': log.remarks or '',
-                'status': log.status,
-                'editReason': log.edit_reason or '',
-                'originalId': log.original_id,
-                'updatedAt': log.updated_at.replace(tzinfo=dt_timezone.utc).astimezone(jst).isoformat() if log.updated_at else None
-            })
+        work_rows = cached_rows_serializer(fields)(work_logs)
         
         # 最終更新日時を取得
         latest_updated = None
@@ -402,32 +340,6 @@ def add_worklog():
         db.session.add(new_log)
         db.session.commit()
 
-       
-        # Socket通知
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            unit_name = data['unitName']
-            admin_users = User.query.filter(User.role_level >= 2).all()
-            
-            for admin_user in admin_users:
-                if not admin_user.default_unit or admin_user.default_unit == unit_name:
-                    # pending_count事前計算
-                    pending_count = get_admin_pending_count(admin_user.default_unit)
-                    
-                    # イベント名を修正: worklog_request_added → worklog_request_added_with_data
-                    socketio.emit(
-                        'worklog_request_added_with_data',  # 修正
-                        {
-                            'unit_name': unit_name,
-                            'type': 'add',
-                            'user_id': admin_user.id,
-                            'pending_count': pending_count,  # 既に正しい構造
-                            'employee_name': user.name,
-                            'message': f'{user.name}さんが追加申請しました'
-                        },
-                        room=str(admin_user.id)
-                    )
-
         return jsonify({
             'success': True,
             'message': '工数データの追加申請が送信されました',
@@ -516,31 +428,7 @@ def edit_worklog():
         
         db.session.add(new_worklog)
         db.session.commit()
-           
-        # Socket通知
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            unit_name = data['unitName']
-            admin_users = User.query.filter(User.role_level >= 2).all()
-            
-            for admin_user in admin_users:
-                if not admin_user.default_unit or admin_user.default_unit == unit_name:
-                    pending_count = get_admin_pending_count(admin_user.default_unit)
-                    
-                    # イベント名を修正
-                    socketio.emit(
-                        'worklog_request_added_with_data',  # 修正
-                        {
-                            'unit_name': unit_name,
-                            'type': 'edit',
-                            'user_id': admin_user.id,
-                            'pending_count': pending_count,
-                            'employee_name': user.name,
-                            'message': f'{user.name}さんが編集申請しました'
-                        },
-                        room=str(admin_user.id)
-                    )
-        
+
         return jsonify({
             'success': True,
             'message': '工数データの編集申請が送信されました',
@@ -581,30 +469,6 @@ def delete_worklog():
 
         db.session.commit()
 
-        # Socket通知
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            unit_name = worklog.unit_name
-            admin_users = User.query.filter(User.role_level >= 2).all()
-            
-            for admin_user in admin_users:
-                if not admin_user.default_unit or admin_user.default_unit == unit_name:
-                    pending_count = get_admin_pending_count(admin_user.default_unit)
-                    
-                    # イベント名を修正
-                    socketio.emit(
-                        'worklog_request_added_with_data',  # 修正
-                        {
-                            'unit_name': unit_name,
-                            'type': 'delete',
-                            'user_id': admin_user.id,
-                            'pending_count': pending_count,
-                            'employee_name': user.name,
-                            'message': f'{user.name}さんが削除申請しました'
-                        },
-                        room=str(admin_user.id)
-                    )
-
         return jsonify({
             'success': True,
             'message': '削除申請が送信されました',
@@ -676,38 +540,6 @@ def cancel_worklog_request():
 
         db.session.commit()
 
-        # Socket通知
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            # unit_name取得ロジック
-            unit_name = None
-            if status == 'pending_edit' and 'original_log' in locals():
-                unit_name = original_log.unit_name
-            elif status in ['pending_delete', 'rejected_edit'] and 'log' in locals():
-                unit_name = log.unit_name
-            elif status == 'pending_add' and 'log' in locals():
-                unit_name = log.unit_name
-
-            if unit_name:
-                admin_users = User.query.filter(User.role_level >= 2).all()
-                for admin_user in admin_users:
-                    if not admin_user.default_unit or admin_user.default_unit == unit_name:
-                        pending_count = get_admin_pending_count(admin_user.default_unit)
-                        
-                        # イベント名を修正（新規追加）
-                        socketio.emit(
-                            'worklog_request_added_with_data',  # 統一
-                            {
-                                'unit_name': unit_name,
-                                'type': 'cancel',
-                                'user_id': admin_user.id,
-                                'pending_count': pending_count,
-                                'employee_name': user.name,
-                                'message': f'{user.name}さんが申請を取り消しました'
-                            },
-                            room=str(admin_user.id)
-                        )
-
         return jsonify({
             'success': True, 
             'message': '申請を取り消しました',
@@ -742,36 +574,9 @@ def cancel_rejected_add():
         if log.status != 'rejected_add':
             return jsonify({'error': 'このデータは追加却下状態ではありません'}), 400
         
-        unit_name = log.unit_name  # 削除前に保存
-        
         db.session.delete(log)
         db.session.commit()
 
-
-        # Socket通知
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            if unit_name:
-                admin_users = User.query.filter(User.role_level >= 2).all()
-                for admin_user in admin_users:
-                    if not admin_user.default_unit or admin_user.default_unit == unit_name:
-                        pending_count = get_admin_pending_count(admin_user.default_unit)
-                        
-                        # イベント名を修正
-                        socketio.emit(
-                            'worklog_request_added_with_data',  # 統一
-                            {
-                                'unit_name': unit_name,
-                                'type': 'rejected_cancel',
-                                'user_id': admin_user.id,
-                                'pending_count': pending_count,
-                                'employee_name': user.name,
-                                'message': f'{user.name}さんが却下申請を取り消しました'
-                            },
-                            room=str(admin_user.id)
-                        )
-
-        
         return jsonify({
             'success': True,
             'message': '却下された追加申請を取り消しました',
@@ -806,37 +611,11 @@ def cancel_rejected_delete():
         if log.status != 'rejected_delete':
             return jsonify({'error': 'このデータは削除却下状態ではありません'}), 400
         
-        unit_name = log.unit_name  # 削除前に保存
-        
         # ステータスを通常に変更
         log.status = 'draft'
         log.edit_reason = None
         db.session.commit()
 
-
-        # Socket通知
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            if unit_name:
-                admin_users = User.query.filter(User.role_level >= 2).all()
-                for admin_user in admin_users:
-                    if not admin_user.default_unit or admin_user.default_unit == unit_name:
-                        pending_count = get_admin_pending_count(admin_user.default_unit)
-                        
-                        # イベント名を修正
-                        socketio.emit(
-                            'worklog_request_added_with_data',  # 統一
-                            {
-                                'unit_name': unit_name,
-                                'type': 'rejected_cancel',
-                                'user_id': admin_user.id,
-                                'pending_count': pending_count,
-                                'employee_name': user.name,
-                                'message': f'{user.name}さんが却下申請を取り消しました'
-                            },
-                            room=str(admin_user.id)
-                        )
-        
         return jsonify({
             'success': True,
             'message': '却下された削除申請を取り消しました',
@@ -944,34 +723,6 @@ def resubmit_worklog():
         
         db.session.commit()
 
-        # ✅ Socket通知のみ（重いデータ取得は削除）
-        socketio = current_app.config.get('socketio')
-        if socketio:
-            unit_name = data['unitName']
-            
-            # 管理者権限を持つユーザーを取得（role_level >= 2）
-            admin_users = User.query.filter(User.role_level >= 2).all()
-            
-            # 各管理者ユーザーにイベントを送信
-            for admin_user in admin_users:
-                if not admin_user.default_unit or admin_user.default_unit == unit_name:
-                    # ✅ pending_count計算
-                    pending_count = get_admin_pending_count(admin_user.default_unit)
-                    
-                    # ✅ 軽量通知
-                    socketio.emit(
-                        'worklog_request_added',
-                        {
-                            'unit_name': unit_name,
-                            'type': 'edit',
-                            'user_id': admin_user.id,
-                            'pending_count': pending_count,
-                            'employee_name': user.name,
-                            'message': f'{user.name}さんが再申請しました'
-                        },
-                        room=str(admin_user.id)
-                    )
-      
         return jsonify({
             'success': True,
             'message': 'データの再申請が送信されました',
@@ -989,10 +740,8 @@ def resubmit_worklog():
 @jwt_required()
 def get_filter_options():
     """ユーザーの工数データからフィルター選択肢を取得する"""
-    current_user_id = get_jwt_identity()
-    
     try:
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         if not user:
             return jsonify({'error': 'ユーザーが見つかりません'}), 404
 
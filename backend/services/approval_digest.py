@@ -0,0 +1,126 @@
+# services/approval_digest.py - 未処理申請の日次ダイジェストメール
+#
+# 申請ごとの Socket.IO 通知はログイン中の管理者にしか届かないため、1日1回、
+# 承認待ちの申請がある管理者に件数のまとめをメールで送る。
+# 送信記録（approval_digests）とメールの登録を同じトランザクションで行うので、
+# 同じ日に何度実行しても（複数プロセスで同時に実行しても）1人に1通しか送らない。
+
+from datetime import datetime
+
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from models import db, User, WorkLog, ApprovalDigest
+from services.email_outbox import enqueue_emails, wake_email_outbox
+from services.email_templates import render_email_batch
+from utils.time_format import JST
+
+PENDING_STATUSES = ('pending_add', 'pending_edit', 'pending_delete')
+
+
+def pending_counts_by_unit():
+    """ユニット・ステータス別の未処理申請数を1回の集計クエリで取得する
+
+    get_admin_pending_count と同じく、編集申請は編集元の行（original_id なし）だけを数える。
+
+    Returns:
+        dict: ユニット名 → {'pending_add': n, 'pending_edit': n, 'pending_delete': n, 'total': n}
+    """
+    rows = db.session.query(WorkLog.unit_name, WorkLog.status, func.count())\
+        .filter(WorkLog.status.in_(PENDING_STATUSES))\
+        .filter(or_(WorkLog.status != 'pending_edit', WorkLog.original_id.is_(None)))\
+        .group_by(WorkLog.unit_name, WorkLog.status)\
+        .all()
+
+    counts = {}
+    for unit_name, status, count in rows:
+        unit = counts.setdefault(unit_name, dict.fromkeys(PENDING_STATUSES + ('total',), 0))
+        unit[status] += count
+        unit['total'] += count
+    return counts
+
+
+def admin_digest_units(admin_user, counts):
+    """管理者が担当するユニットの件数（デフォルトユニット未設定の場合は全ユニット）"""
+    if admin_user.default_unit:
+        unit_names = [admin_user.default_unit] if admin_user.default_unit in counts else []
+    else:
+        unit_names = sorted(counts)
+    return [dict(counts[name], unit_name=name) for name in unit_names if counts[name]['total']]
+
+
+def send_approval_digests(digest_date=None, dry_run=False):
+    """承認待ちの申請がある管理者にダイジェストメールを送信キューへ登録する
+
+    Args:
+        digest_date (date, optional): ダイジェストの日付（省略時は日本時間の今日）
+        dry_run (bool): 送信・記録をせず、対象だけを返す
+
+    Returns:
+        dict: {'sent': 登録した件数, 'already_sent': 送信済みで飛ばした件数, 'targets': [(社員ID, 件数)]}
+    """
+    digest_date = digest_date or datetime.now(JST).date()
+
+    admins = User.query.filter(User.role_level >= 2, User.email.isnot(None), User.email != '')\
+        .order_by(User.id).all()
+    already_sent = {
+        admin_id for (admin_id,) in db.session.query(ApprovalDigest.admin_id)
+        .filter(ApprovalDigest.digest_date == digest_date)
+    }
+    counts = pending_counts_by_unit()
+
+    targets = []
+    for admin_user in admins:
+        if admin_user.id in already_sent:
+            continue
+        units = admin_digest_units(admin_user, counts)
+        if units:
+            targets.append((admin_user, units))
+
+    result = {
+        'sent': 0,
+        'already_sent': len(already_sent),
+        'targets': [(admin_user.employee_id, sum(u['total'] for u in units)) for admin_user, units in targets]
+    }
+    if dry_run or not targets:
+        return result
+
+    # 送信記録を先に確保する（他のプロセスが同時に確保した管理者は除く）
+    claimed = set(db.session.execute(
+        insert(ApprovalDigest)
+        .values([
+            {'admin_id': admin_user.id, 'digest_date': digest_date,
+             'pending_total': sum(u['total'] for u in units)}
+            for admin_user, units in targets
+        ])
+        .on_conflict_do_nothing(constraint='uq_approval_digests_admin_date')
+        .returning(ApprovalDigest.admin_id)
+    ).scalars())
+    targets = [(admin_user, units) for admin_user, units in targets if admin_user.id in claimed]
+    if not targets:
+        db.session.commit()
+        return result
+
+    messages = render_email_batch('approval_digest', [
+        {
+            'admin_name': admin_user.name,
+            'units': units,
+            'total': sum(u['total'] for u in units)
+        }
+        for admin_user, units in targets
+    ], digest_date=digest_date.strftime('%Y/%m/%d'))
+
+    items = enqueue_emails([
+        (admin_user.email, message.subject, message.html, message.text)
+        for (admin_user, _), message in zip(targets, messages)
+    ], commit=False)
+
+    for (admin_user, _), item in zip(targets, items):
+        ApprovalDigest.query.filter_by(admin_id=admin_user.id, digest_date=digest_date)\
+            .update({'outbox_id': item.id}, synchronize_session=False)
+
+    db.session.commit()
+    wake_email_outbox()
+
+    result['sent'] = len(targets)
+    return result
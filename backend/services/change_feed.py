@@ -0,0 +1,399 @@
+# services/change_feed.py - PostgreSQL の変更通知から Socket.IO イベントを送る
+#
+# worklogs・chat_messages のトリガー（マイグレーション c5f2a9e4d718）が pg_notify で送る
+# 変更レコードを、ワーカーごとに1つの受信用グリーンスレッドで受け取り、フロントエンドが
+# 受け取っている既存のイベント（worklog_request_added_with_data など）に変換して送信する。
+# 画面からの操作だけでなく、取込み・スクリプト・手作業のSQLによる変更も通知される。
+#
+# 各ワーカーがすべての変更を受け取り、自分に接続しているクライアントにだけ送る
+# （ignore_queue=True）。SOCKETIO_MESSAGE_QUEUE を設定していても重複して届かない。
+# 送信先が自分に接続していない変更は、チャット履歴・未処理件数などを取得せずに飛ばす。
+# あわせてユニット名・工事区分マスタの変更（マイグレーション d8c3e6a1f527）を受け取り、
+# ワーカーごとの対応表のキャッシュを破棄する。
+#
+# 受信していない間（CHANGE_FEED_ENABLED=false・PostgreSQL 以外・受信の接続が切れている間）は、
+# ORM のフラッシュからトリガーと同じ形の変更レコードを作り、コミット後にこのワーカーから送る。
+#   - 変更通知が無効: メッセージキュー経由で全ワーカーの接続先に送る
+#   - 受信の接続が切れている: 自分の接続先にだけ送る（ほかのワーカーは自分の受信分を送る）
+# この場合、ORM を通らない変更（取込み・スクリプト・手作業のSQL）は通知されない。
+
+import json
+import select
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+from models import db, ChatMessage, User, WorkLog
+from services.worklog import invalidate_unit_work_type_map
+from utils.instrumentation import current_request_stats
+from utils.socketio_queue import postgres_dsn
+
+WORKLOG_CHANNEL = 'worklog_changes'
+CHAT_CHANNEL = 'chat_changes'
+UNIT_MASTER_CHANNEL = 'unit_master_changes'
+
+# 受信待ちのタイムアウト（秒）
+LISTEN_POLL_INTERVAL = 5
+
+# (変更前ステータス, 変更後ステータス) → 管理者への申請通知の種類とメッセージ
+# 編集申請は編集後の行の INSERT で通知するため、編集元の行の変化は対象にしない
+REQUEST_TRANSITIONS = {
+    (None, 'pending_add'): ('add', 'さんが追加申請しました'),
+    ('rejected_add', 'pending_add'): ('edit', 'さんが再申請しました'),
+    ('pending_add', None): ('cancel', 'さんが申請を取り消しました'),
+    ('pending_edit', 'draft'): ('cancel', 'さんが申請を取り消しました'),
+    ('pending_delete', 'draft'): ('cancel', 'さんが申請を取り消しました'),
+    ('rejected_add', None): ('rejected_cancel', 'さんが却下申請を取り消しました'),
+    ('rejected_edit', 'draft'): ('rejected_cancel', 'さんが却下申請を取り消しました'),
+    ('rejected_delete', 'draft'): ('rejected_cancel', 'さんが却下申請を取り消しました'),
+}
+
+# (変更前ステータス, 変更後ステータス) → 申請者への承認・却下通知の種類
+APPROVAL_TRANSITIONS = {
+    ('pending_add', 'approved'): ('add', '追加申請が承認されました'),
+    ('pending_edit', 'approved'): ('edit', '編集申請が承認されました'),
+    ('pending_delete', None): ('delete', '削除申請が承認されました'),
+}
+REJECTION_TRANSITIONS = {
+    ('pending_add', 'rejected_add'): ('add', '追加申請が却下されました'),
+    ('pending_edit', 'rejected_edit'): ('edit', '編集申請が却下されました'),
+    ('pending_delete', 'rejected_delete'): ('delete', '削除申請が却下されました'),
+}
+
+
+# 通知の対象になるステータス（トリガーの pending\_% / rejected\_% と同じ）
+NOTIFY_STATUS_PREFIXES = ('pending_', 'rejected_')
+
+
+class WorklogDispatcher:
+    """工数の変更レコードを Socket.IO イベントに変換する（1回の受信分ごとに作る）"""
+
+    def __init__(self, emit, connected):
+        self.emit = emit
+        self.connected = connected  # ユーザーID → 送信先が接続しているか
+        self.pending_counts = {}  # 管理者のデフォルトユニット → 未処理申請数
+        self.users = {}           # 社員ID → User
+        self.admins = None
+
+    def _user(self, employee_id):
+        if employee_id not in self.users:
+            self.users[employee_id] = User.query.filter_by(employee_id=employee_id).first()
+        return self.users[employee_id]
+
+    def _pending_count(self, unit_name):
+        from routes.worklog_history import get_admin_pending_count
+        if unit_name not in self.pending_counts:
+            self.pending_counts[unit_name] = get_admin_pending_count(unit_name)
+        return self.pending_counts[unit_name]
+
+    def _notify_admins(self, change, request_type, message):
+        if self.admins is None:
+            self.admins = User.query.filter(User.role_level >= 2).all()
+        unit_name = change['unit_name']
+        admin_users = [
+            admin_user for admin_user in self.admins
+            if (not admin_user.default_unit or admin_user.default_unit == unit_name)
+            and self.connected(admin_user.id)
+        ]
+        if not admin_users:
+            return
+        user = self._user(change['employee_id'])
+        if user is None:
+            return
+        for admin_user in admin_users:
+            self.emit('worklog_request_added_with_data', {
+                'unit_name': unit_name,
+                'type': request_type,
+                'user_id': admin_user.id,
+                'pending_count': self._pending_count(admin_user.default_unit),
+                'employee_name': user.name,
+                'message': f'{user.name}{message}'
+            }, admin_user.id)
+
+    def _notify_applicant(self, change, event, result_type, message):
+        from routes.worklog_history import get_user_reject_count
+        applicant_user = self._user(change['employee_id'])
+        if applicant_user is None or not self.connected(applicant_user.id):
+            return
+        data = {'type': result_type, 'worklog_id': change['id'], 'message': message}
+        if event == 'worklog_rejected_with_data':
+            # 却下理由は edit_reason に保存されている
+            reject_reason = db.session.query(WorkLog.edit_reason).filter(WorkLog.id == change['id']).scalar()
+            data['reject_reason'] = reject_reason
+            data['message'] = f'{message}: {reject_reason}'
+            data['reject_count'] = get_user_reject_count(applicant_user.id)
+        self.emit(event, data, applicant_user.id)
+
+    def dispatch(self, change):
+        transition = (change['old_status'], change['status'])
+        is_edited_copy = change['original_id'] is not None
+
+        if is_edited_copy:
+            # 編集後の行は追加時のみ通知する（承認・却下・取消しは編集元の行の変化で通知）
+            if change['op'] == 'INSERT' and change['status'] == 'pending_edit':
+                self._notify_admins(change, 'edit', 'さんが編集申請しました')
+            return
+
+        if change['op'] == 'UPDATE' and change['status'] == 'pending_delete':
+            self._notify_admins(change, 'delete', 'さんが削除申請しました')
+        elif transition in REQUEST_TRANSITIONS:
+            self._notify_admins(change, *REQUEST_TRANSITIONS[transition])
+        elif transition in APPROVAL_TRANSITIONS:
+            self._notify_applicant(change, 'worklog_approved_with_data', *APPROVAL_TRANSITIONS[transition])
+        elif transition in REJECTION_TRANSITIONS:
+            self._notify_applicant(change, 'worklog_rejected_with_data', *REJECTION_TRANSITIONS[transition])
+
+
+def chat_updates(changes):
+    """チャットの変更レコードから、履歴を送り直す (送信先ユーザーID, 相手のユーザーID) を返す"""
+    targets = []
+    for change in changes:
+        sender_id, receiver_id = change['sender_id'], change['receiver_id']
+        if change['op'] == 'INSERT':
+            targets.append((receiver_id, sender_id))
+        elif change['op'] in ('UPDATE', 'DELETE'):
+            targets.append((receiver_id, sender_id))
+            targets.append((sender_id, receiver_id))
+        elif change['op'] == 'READ':
+            targets.append((sender_id, receiver_id))
+    # 同じ相手との履歴は1回だけ送る（順序は維持）
+    return list(dict.fromkeys(targets))
+
+
+def _old_value(state, key):
+    """フラッシュ前の値（変更されていなければ現在の値）"""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return state.attrs[key].value
+
+
+def _is_notify_status(status):
+    return bool(status) and status.startswith(NOTIFY_STATUS_PREFIXES)
+
+
+def _worklog_change(op, worklog, old_status, status):
+    """トリガー（worklogs_change_notify）と同じ形の変更レコード"""
+    if not (_is_notify_status(old_status) or _is_notify_status(status)):
+        return None
+    return {
+        'op': op, 'id': worklog.id, 'employee_id': worklog.employee_id, 'unit_name': worklog.unit_name,
+        'original_id': worklog.original_id, 'old_status': old_status, 'status': status
+    }
+
+
+def flushed_changes(session):
+    """フラッシュされる工数・チャットの変更をトリガーと同じ形の変更レコードにする
+
+    after_flush で呼ぶ（new / dirty / deleted と属性の変更履歴がまだ残っている）。
+
+    Returns:
+        tuple: (工数の変更レコード, チャットの変更レコード)
+    """
+    worklog_changes, chat_changes = [], []
+    for obj in session.new:
+        if isinstance(obj, WorkLog):
+            worklog_changes.append(_worklog_change('INSERT', obj, None, obj.status))
+        elif isinstance(obj, ChatMessage):
+            chat_changes.append({'op': 'INSERT', 'sender_id': obj.sender_id, 'receiver_id': obj.receiver_id})
+    for obj in session.dirty:
+        state = inspect(obj)
+        if isinstance(obj, WorkLog):
+            if state.attrs.status.history.has_changes():
+                old_status = _old_value(state, 'status')
+                if old_status != obj.status:
+                    worklog_changes.append(_worklog_change('UPDATE', obj, old_status, obj.status))
+        elif isinstance(obj, ChatMessage):
+            if state.attrs.message.history.has_changes() and _old_value(state, 'message') != obj.message:
+                op = 'UPDATE'
+            elif obj.is_read and not _old_value(state, 'is_read'):
+                op = 'READ'
+            else:
+                continue
+            chat_changes.append({'op': op, 'sender_id': obj.sender_id, 'receiver_id': obj.receiver_id})
+    for obj in session.deleted:
+        state = inspect(obj)
+        if isinstance(obj, WorkLog):
+            worklog_changes.append(_worklog_change('DELETE', obj, _old_value(state, 'status'), None))
+        elif isinstance(obj, ChatMessage):
+            chat_changes.append({
+                'op': 'DELETE', 'sender_id': _old_value(state, 'sender_id'),
+                'receiver_id': _old_value(state, 'receiver_id')
+            })
+    return [change for change in worklog_changes if change], chat_changes
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+def _record_flushed_changes(session, flush_context):
+    worklog_changes, chat_changes = flushed_changes(session)
+    if worklog_changes or chat_changes:
+        pending = session.info.setdefault('change_feed', ([], []))
+        pending[0].extend(worklog_changes)
+        pending[1].extend(chat_changes)
+
+
+def _dispatch_committed_changes(session):
+    pending = session.info.pop('change_feed', None)
+    if pending is None or not has_app_context():
+        return
+    # 送信は別のグリーンスレッド（受信スレッド・コミット後の送信）で行うため、
+    # コミットしたリクエストの計測値には変更レコード数を記録する
+    stats = current_request_stats()
+    if stats is not None:
+        stats.add_feed_changes(len(pending[0]) + len(pending[1]))
+    feed = current_app.extensions.get('change_feed')
+    if feed is not None and not feed.listening:
+        # コミット後のセッションではSQLを実行できないため、別のグリーンスレッドで送る
+        feed.socketio.start_background_task(feed._dispatch, *pending)
+
+
+def _discard_changes(session):
+    session.info.pop('change_feed', None)
+
+
+class ChangeFeed:
+    """変更通知の受信スレッド（ワーカーごとに1つ）"""
+
+    def __init__(self, app, socketio, listen=True):
+        self.app = app
+        self.socketio = socketio
+        self.listen = listen        # LISTEN で受信するか（False の場合はコミット後の送信のみ）
+        self.listening = False      # 受信中か（False の間はコミット後にこのワーカーから送る）
+        self.started = False
+        # 自分の接続先にだけ送る場合、送信先が接続していなければ送信データを作らない
+        # （メッセージキュー経由で送る場合はほかのワーカーの接続先が分からない）
+        self.local_only = listen or not app.config.get('SOCKETIO_MESSAGE_QUEUE')
+
+    def start(self):
+        """受信スレッドを起動する（2回目以降・受信しない設定の場合は何もしない）"""
+        if self.started or not self.listen:
+            return
+        self.started = True
+        self.socketio.start_background_task(self._run)
+
+    def _connected(self, user_id):
+        if not self.local_only:
+            return True
+        rooms = self.socketio.server.manager.rooms.get('/', {})
+        return bool(rooms.get(str(user_id)))
+
+    def _emit(self, event, data, user_id):
+        # 受信している場合は各ワーカーが自分の接続先にだけ送る（メッセージキュー経由にしない）
+        self.socketio.emit(event, data, room=str(user_id), ignore_queue=self.listen)
+
+    def _dispatch(self, worklog_changes, chat_changes):
+        from routes.chat import get_chat_messages_between_users, get_user_chat_threads
+
+        with self.app.app_context():
+            try:
+                dispatcher = WorklogDispatcher(self._emit, self._connected)
+                for change in worklog_changes:
+                    dispatcher.dispatch(change)
+
+                for user_id, partner_id in chat_updates(chat_changes):
+                    if not self._connected(user_id):
+                        continue
+                    self._emit('chat_messages_updated', {
+                        'chat_partner_id': partner_id,
+                        'messages': get_chat_messages_between_users(user_id, partner_id),
+                        'threads': get_user_chat_threads(user_id)
+                    }, user_id)
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f"変更通知の送信エラー: {str(e)}")
+            finally:
+                db.session.remove()
+
+    def _run(self):
+        retry_sleep = 1
+        while True:
+            connection = None
+            try:
+                connection = psycopg2.connect(postgres_dsn(self.app.config['SQLALCHEMY_DATABASE_URI']),
+                                              application_name='worklog-change-feed')
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {WORKLOG_CHANNEL}')
+                    cursor.execute(f'LISTEN {CHAT_CHANNEL}')
+                    cursor.execute(f'LISTEN {UNIT_MASTER_CHANNEL}')
+                self.listening = True
+                self.app.logger.info('変更通知の受信を開始しました')
+                retry_sleep = 1
+
+                while True:
+                    # monkey_patch 済みの select なので他のグリーンスレッドを止めない
+                    select.select([connection], [], [], LISTEN_POLL_INTERVAL)
+                    connection.poll()
+                    if not connection.notifies:
+                        continue
+                    # 溜まっている通知をまとめて処理する（ユーザー・未処理件数の取得を共有）
+                    worklog_changes, chat_changes = [], []
+                    unit_master_changed = False
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        if notify.channel == UNIT_MASTER_CHANNEL:
+                            unit_master_changed = True
+                            continue
+                        changes = worklog_changes if notify.channel == WORKLOG_CHANNEL else chat_changes
+                        changes.append(json.loads(notify.payload))
+                    if unit_master_changed:
+                        invalidate_unit_work_type_map()
+                    if worklog_changes or chat_changes:
+                        self._dispatch(worklog_changes, chat_changes)
+            except psycopg2.Error as e:
+                self.listening = False
+                self.app.logger.error(f"変更通知の受信に失敗しました。{retry_sleep}秒後に再接続します: {str(e)}")
+                time.sleep(retry_sleep)
+                retry_sleep = min(retry_sleep * 2, 60)
+            finally:
+                self.listening = False
+                if connection is not None and not connection.closed:
+                    connection.close()
+
+
+def init_change_feed(app, socketio):
+    """変更通知の受信を登録する
+
+    受信スレッドは最初のHTTPリクエストまたはSocket.IO接続で起動する
+    （flask db upgrade などのCLI実行時には起動しない）。
+
+    設定:
+        CHANGE_FEED_ENABLED: 変更通知の有効/無効（無効時は ORM の変更だけをコミット後に送る）
+    """
+    app.config.setdefault('CHANGE_FEED_ENABLED', True)
+    listen = app.config['CHANGE_FEED_ENABLED']
+    if listen and (psycopg2 is None or not app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql')):
+        app.logger.warning('PostgreSQL 以外のデータベースのため変更通知を無効にします')
+        listen = False
+
+    feed = ChangeFeed(app, socketio, listen=listen)
+    app.extensions['change_feed'] = feed
+
+    if not event.contains(Session, 'after_flush', _record_flushed_changes):
+        # 期限切れの属性に代入した場合も変更前の値を読み込んでおく（変更の判定に使う）
+        for attribute in (WorkLog.status, ChatMessage.message, ChatMessage.is_read):
+            event.listen(attribute, 'set', _keep_old_value, active_history=True, retval=True)
+        event.listen(Session, 'after_flush', _record_flushed_changes)
+        event.listen(Session, 'after_commit', _dispatch_committed_changes)
+        event.listen(Session, 'after_rollback', _discard_changes)
+
+    @app.before_request
+    def start_change_feed_on_request():
+        feed.start()
+
+
+def start_change_feed(app):
+    """変更通知の受信スレッドを起動する（無効の場合は何もしない）"""
+    feed = app.extensions.get('change_feed')
+    if feed is not None:
+        feed.start()
@@ -0,0 +1,404 @@
+# services/email_outbox.py - メール送信キュー（email_outbox）と送信ワーカー
+#
+# send_email は email_outbox に登録するだけで、HTTPリクエスト内では SMTP に接続しない。
+# 各プロセスの送信ワーカー（EMAIL_WORKER_CONCURRENCY 個のグリーンスレッド）が
+# FOR UPDATE SKIP LOCKED で未送信分を取り出し、ログイン済みの SMTP 接続を使い回して送信する。
+# 一時的な失敗は間隔を空けて再試行し、EMAIL_MAX_ATTEMPTS 回失敗したら failed にする。
+#
+# ローカルで確認する場合は aiosmtpd を立てて SMTP_SECURITY=none にする:
+#   python -m aiosmtpd -n -l localhost:8025
+#   SMTP_SERVER=localhost SMTP_PORT=8025 SMTP_SECURITY=none flask email-outbox drain
+
+import random
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from flask import current_app
+from sqlalchemy import and_, func, or_
+
+from models import db, EmailOutbox
+from utils.metrics import EmailSendTimer
+
+# ログイン済みの接続をこの秒数より長く使っていなければ NOOP で生存確認する
+SMTP_NOOP_AFTER_SECONDS = 30
+
+# 送信中のまま止まった行（プロセスの異常終了など）を再送対象に戻すまでの秒数
+SENDING_STALE_SECONDS = 600
+
+# 再試行間隔の上限（秒）
+RETRY_MAX_DELAY_SECONDS = 3600
+
+
+def smtp_security(config):
+    """SMTP の暗号化方式（ssl / starttls / none）。未設定の場合はポート番号で決める"""
+    security = (config.get('SMTP_SECURITY') or '').lower()
+    if security:
+        return security
+    return 'ssl' if config.get('SMTP_PORT') == 465 else 'starttls'
+
+
+def build_message(sender_email, recipients, subject, html_content, text_content=None):
+    """送信するメールを組み立てる（テキスト版があれば multipart/alternative にする）"""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = sender_email
+    msg['To'] = ', '.join(recipients)
+
+    if text_content:
+        msg.attach(MIMEText(text_content, 'plain', 'utf-8'))
+    msg.attach(MIMEText(html_content, 'html', 'utf-8'))
+    return msg
+
+
+def is_connection_error(error):
+    """接続を破棄すべきエラーか（smtplib の例外は OSError のサブクラスなので区別する）"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    return not isinstance(error, smtplib.SMTPException)
+
+
+def is_permanent_error(error):
+    """再試行しても成功しないエラーか（宛先拒否・5xx応答）"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        # 認証情報の誤りはメールごとの問題ではないため再試行する
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 500 <= error.smtp_code < 600
+    return False
+
+
+class SMTPConnectionPool:
+    """ログイン済みの SMTP 接続のプール
+
+    同時に使う接続は size 個まで。返却された接続は次の送信で再利用し、
+    しばらく使っていない接続は NOOP で確認してから渡す。
+
+    Args:
+        config (dict): アプリの設定（SMTP_SERVER / SMTP_PORT / SMTP_USERNAME / SMTP_PASSWORD など）
+        size (int): 最大接続数
+    """
+
+    def __init__(self, config, size=2):
+        self.host = config.get('SMTP_SERVER') or 'localhost'
+        self.port = config.get('SMTP_PORT') or 25
+        self.username = config.get('SMTP_USERNAME')
+        self.password = config.get('SMTP_PASSWORD')
+        self.security = smtp_security(config)
+        self.timeout = config.get('SMTP_TIMEOUT', 30)
+        self.max_idle = config.get('SMTP_MAX_IDLE_SECONDS', 240)
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = deque()  # (接続, 最後に使った時刻)
+        self.lock = threading.Lock()
+        self.opened = 0  # これまでに開いた接続数（確認用）
+
+    def _connect(self):
+        if self.security == 'ssl':
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.security == 'starttls':
+                server.starttls()
+        try:
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        self.opened += 1
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _checkout(self):
+        while True:
+            with self.lock:
+                if not self.idle:
+                    break
+                server, last_used = self.idle.pop()
+            idle_seconds = time.monotonic() - last_used
+            if idle_seconds > self.max_idle:
+                self._close(server)
+                continue
+            if idle_seconds > SMTP_NOOP_AFTER_SECONDS:
+                try:
+                    if server.noop()[0] != 250:
+                        raise smtplib.SMTPServerDisconnected('NOOP failed')
+                except Exception:
+                    server.close()
+                    continue
+            return server
+        return self._connect()
+
+    @contextmanager
+    def connection(self):
+        """接続を1つ借りる（接続エラーの場合は破棄し、それ以外は返却する）"""
+        with self.slots:
+            server = self._checkout()
+            try:
+                yield server
+            except Exception as e:
+                if is_connection_error(e):
+                    server.close()
+                    server = None
+                raise
+            finally:
+                if server is not None:
+                    with self.lock:
+                        self.idle.append((server, time.monotonic()))
+
+    def close_all(self):
+        with self.lock:
+            servers = [server for server, _ in self.idle]
+            self.idle.clear()
+        for server in servers:
+            self._close(server)
+
+
+def enqueue_email(recipients, subject, html_content, text_content=None):
+    """メールを送信キューに登録する（コミットまで行う）
+
+    Args:
+        recipients (list or str): 送信先メールアドレス（複数の場合は1通にまとめて送る）
+        subject (str): 件名
+        html_content (str): HTML本文
+        text_content (str, optional): テキスト本文
+
+    Returns:
+        EmailOutbox: 登録した行
+    """
+    return enqueue_emails([(recipients, subject, html_content, text_content)])[0]
+
+
+def enqueue_emails(messages, commit=True):
+    """複数のメールをまとめて送信キューに登録する
+
+    Args:
+        messages (iterable): (宛先, 件名, HTML本文, テキスト本文) のタプル
+        commit (bool): False の場合は登録のみ行い、コミットは呼び出し側で行う
+            （他の更新と同じトランザクションにする場合。ワーカーへの通知もしない）
+
+    Returns:
+        list of EmailOutbox: 登録した行
+    """
+    items = []
+    for recipients, subject, html_content, text_content in messages:
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        items.append(EmailOutbox(
+            recipients=list(recipients),
+            subject=subject,
+            html_content=html_content,
+            text_content=text_content
+        ))
+    db.session.add_all(items)
+    if not commit:
+        db.session.flush()
+        return items
+    db.session.commit()
+    wake_email_outbox()
+    return items
+
+
+def wake_email_outbox():
+    """このプロセスの送信ワーカーに送信待ちの追加を知らせる"""
+    worker = current_app.extensions.get('email_outbox')
+    if worker is not None:
+        worker.wake()
+
+
+def retry_delay(attempts, base_seconds):
+    """attempts 回目の失敗後の再試行までの秒数（指数バックオフ + 揺らぎ）"""
+    delay = min(base_seconds * 2 ** (attempts - 1), RETRY_MAX_DELAY_SECONDS)
+    return delay + random.uniform(0, delay * 0.1)
+
+
+class EmailOutboxWorker:
+    """送信キューを処理するワーカー（プロセスごとに1つ）
+
+    設定:
+        EMAIL_WORKER_CONCURRENCY: 同時に送信するグリーンスレッド数
+        EMAIL_OUTBOX_BATCH_SIZE: 1回に取り出す件数（同じ接続で続けて送る）
+        EMAIL_OUTBOX_POLL_INTERVAL: 送信待ちが無いときの確認間隔（秒）
+        EMAIL_MAX_ATTEMPTS: 送信を試みる最大回数
+        EMAIL_RETRY_BASE_SECONDS: 最初の再試行までの秒数（以降は倍々）
+        SMTP_POOL_SIZE: SMTP の最大接続数
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.pool = SMTPConnectionPool(app.config, size=app.config.get('SMTP_POOL_SIZE', 2))
+        self.concurrency = app.config.get('EMAIL_WORKER_CONCURRENCY', 2)
+        self.batch_size = app.config.get('EMAIL_OUTBOX_BATCH_SIZE', 20)
+        self.poll_interval = app.config.get('EMAIL_OUTBOX_POLL_INTERVAL', 10)
+        self.max_attempts = app.config.get('EMAIL_MAX_ATTEMPTS', 5)
+        self.retry_base = app.config.get('EMAIL_RETRY_BASE_SECONDS', 30)
+        self.wakeup = threading.Event()
+        self.started = False
+
+    def wake(self):
+        """送信待ちが追加されたことを知らせる（待機中のスレッドがすぐに処理する）"""
+        self.wakeup.set()
+
+    def start(self, start_background_task):
+        """送信スレッドを起動する（2回目以降は何もしない）"""
+        if self.started:
+            return
+        self.started = True
+        for _ in range(self.concurrency):
+            start_background_task(self._run)
+
+    def _claim_batch(self):
+        """送信対象を取り出して sending にする（他のワーカーが処理中の行は飛ばす）"""
+        now = func.now()
+        due = or_(
+            and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == 'sending',
+                 EmailOutbox.locked_at < now - timedelta(seconds=SENDING_STALE_SECONDS))
+        )
+        items = EmailOutbox.query.filter(due)\
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)\
+            .limit(self.batch_size)\
+            .with_for_update(skip_locked=True)\
+            .all()
+
+        batch = []
+        for item in items:
+            item.status = 'sending'
+            item.locked_at = now
+            item.attempts = item.attempts + 1
+            batch.append({
+                'id': item.id,
+                'recipients': item.recipients,
+                'subject': item.subject,
+                'html_content': item.html_content,
+                'text_content': item.text_content,
+                'attempts': item.attempts
+            })
+        db.session.commit()
+        return batch
+
+    def _mark_sent(self, entry, refused):
+        error = None
+        if refused:
+            # 一部の宛先だけ拒否された場合は送信済みとして記録だけ残す
+            error = '一部の宛先が拒否されました: ' + ', '.join(sorted(refused))
+        EmailOutbox.query.filter_by(id=entry['id']).update({
+            'status': 'sent', 'sent_at': func.now(), 'locked_at': None, 'last_error': error
+        }, synchronize_session=False)
+
+    def _mark_failed(self, entry, error):
+        if is_permanent_error(error) or entry['attempts'] >= self.max_attempts:
+            values = {'status': 'failed', 'locked_at': None}
+            self.app.logger.error(f"メール {entry['id']} の送信を中止しました: {str(error)}")
+        else:
+            delay = retry_delay(entry['attempts'], self.retry_base)
+            values = {
+                'status': 'pending', 'locked_at': None,
+                'next_attempt_at': func.now() + timedelta(seconds=delay)
+            }
+            self.app.logger.warning(f"メール {entry['id']} の送信に失敗しました。{int(delay)}秒後に再試行します: {str(error)}")
+        values['last_error'] = str(error)
+        EmailOutbox.query.filter_by(id=entry['id']).update(values, synchronize_session=False)
+
+    def _send_batch(self, batch):
+        """取り出した分を1つの接続で続けて送る"""
+        sender_email = self.app.config.get('SENDER_EMAIL') or 'no-reply@example.com'
+        remaining = deque(batch)
+        try:
+            with self.pool.connection() as server:
+                while remaining:
+                    entry = remaining[0]
+                    msg = build_message(sender_email, entry['recipients'], entry['subject'],
+                                        entry['html_content'], entry['text_content'])
+                    with EmailSendTimer() as timer:
+                        try:
+                            refused = server.sendmail(sender_email, entry['recipients'], msg.as_string())
+                        except Exception as e:
+                            timer.failed()
+                            if is_connection_error(e):
+                                raise
+                            self._mark_failed(entry, e)
+                        else:
+                            self._mark_sent(entry, refused)
+                    remaining.popleft()
+        except Exception as e:
+            # 接続・ログインの失敗: 未送信分をまとめて再試行に回す
+            for entry in remaining:
+                self._mark_failed(entry, e)
+        db.session.commit()
+
+    def process_batch(self):
+        """1回分を取り出して送信する
+
+        Returns:
+            int: 処理した件数（0 の場合は送信待ちなし）
+        """
+        batch = self._claim_batch()
+        if batch:
+            self._send_batch(batch)
+        return len(batch)
+
+    def drain(self):
+        """送信待ちが無くなるまで処理する（CLI用）
+
+        Returns:
+            int: 処理した件数
+        """
+        total = 0
+        try:
+            while True:
+                processed = self.process_batch()
+                if not processed:
+                    return total
+                total += processed
+        finally:
+            self.pool.close_all()
+
+    def _run(self):
+        while True:
+            processed = 0
+            with self.app.app_context():
+                try:
+                    processed = self.process_batch()
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f"メール送信ワーカーのエラー: {str(e)}")
+                finally:
+                    db.session.remove()
+            if not processed:
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+
+
+def init_email_outbox(app, socketio):
+    """メール送信ワーカーを登録する
+
+    送信スレッドは最初のHTTPリクエストで起動する（CLI実行時には起動しない）。
+    EMAIL_WORKER_ENABLED が無効のプロセスでは登録のみ行い、送信は
+    他のプロセスまたは flask email-outbox drain に任せる。
+    """
+    app.config.setdefault('EMAIL_WORKER_ENABLED', True)
+    if not app.config['EMAIL_WORKER_ENABLED']:
+        return
+
+    worker = EmailOutboxWorker(app)
+    app.extensions['email_outbox'] = worker
+
+    @app.before_request
+    def start_email_outbox_on_request():
+        worker.start(socketio.start_background_task)
@@ -1,11 +1,11 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from flask import current_app, render_template
+from flask import current_app
+
+from services.email_outbox import enqueue_email
+from services.email_templates import render_email
 
 def send_email(recipients, subject, html_content, text_content=None):
     """
-    メール送信関数（.envの中身をprintして確認しつつログインを試みる）
+    メールを送信キューに登録する（送信は services/email_outbox.py のワーカーが行う）
 
     Args:
         recipients (list or str): 送信先メールアドレス（リストまたは文字列）
@@ -14,63 +14,13 @@ def send_email(recipients, subject, html_content, text_content=None):
         text_content (str, optional): テキスト本文
 
     Returns:
-        bool: 成功時True、失敗時False
+        bool: 登録できたらTrue、失敗時False
     """
-    # 設定の取得
-    smtp_server = current_app.config.get('SMTP_SERVER', 'localhost')
-    smtp_port = current_app.config.get('SMTP_PORT', 25)
-    smtp_username = current_app.config.get('SMTP_USERNAME')
-    smtp_password = current_app.config.get('SMTP_PASSWORD')
-    sender_email = current_app.config.get('SENDER_EMAIL', 'no-reply@example.com')
-
-    # printで確認
-    print("----- SMTP設定確認 -----")
-    print("SMTP_SERVER:", smtp_server)
-    print("SMTP_PORT:", smtp_port)
-    print("SMTP_USERNAME:", smtp_username)
-    print("SMTP_PASSWORD:", '*' * len(smtp_password) if smtp_password else None)
-    print("SENDER_EMAIL:", sender_email)
-    print("--------------------------")
-
-    # 宛先をリストに変換
-    if isinstance(recipients, str):
-        recipients = [recipients]
-
-    # メッセージ構築
-    msg = MIMEMultipart('alternative')
-    msg['Subject'] = subject
-    msg['From'] = sender_email
-    msg['To'] = ', '.join(recipients)
-
-    if text_content:
-        msg.attach(MIMEText(text_content, 'plain', 'utf-8'))
-    msg.attach(MIMEText(html_content, 'html', 'utf-8'))
-
     try:
-        # SMTPサーバーに接続（ポート番号によって使い分け）
-        if smtp_port == 465:
-            print("➡ SSLモードで接続")
-            server = smtplib.SMTP_SSL(smtp_server, smtp_port)
-        else:
-            print("➡ STARTTLSモードで接続")
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-
-        # ログインテスト
-        print("➡ ログイン試行中...")
-        server.login(smtp_username, smtp_password)
-        print("✅ ログイン成功")
-
-        # メール送信
-        server.sendmail(sender_email, recipients, msg.as_string())
-        print("✅ メール送信成功")
-
-        server.quit()
+        enqueue_email(recipients, subject, html_content, text_content)
         return True
-
     except Exception as e:
-        print("❌ エラー:", str(e))
-        current_app.logger.error(f"Failed to send email: {str(e)}")
+        current_app.logger.error(f"Failed to enqueue email: {str(e)}")
         return False
 
 
@@ -84,36 +34,13 @@ def send_password_reset_email(recipient_email, user_name, reset_url):
         reset_url (str): パスワードリセット用URL
     
     Returns:
-        bool: 送信成功したらTrue
+        bool: 送信キューに登録できたらTrue
     """
-    # メールの件名
-    subject = "【社内業務ツール】パスワードリセットのご案内"
-    
-    # HTML本文
-    html_content = render_template(
-        'emails/password_reset.html',
-        user_name=user_name,
-        reset_url=reset_url
-    )
+    # 件名・HTML版・テキスト版を1つのテンプレートから作る
+    message = render_email('password_reset', user_name=user_name, reset_url=reset_url)
     
-    # プレーンテキスト版
-    text_content = f"""
-{user_name} 様
-
-パスワードリセットのリクエストを受け付けました。
-
-以下のURLにアクセスして、新しいパスワードを設定してください：
-{reset_url}
-
-このリンクは24時間有効です。
-
-このメールに心当たりがない場合は、無視していただいて構いません。
-
-社内業務ツール管理チーム
-"""
-    
-    # メール送信
-    return send_email(recipient_email, subject, html_content, text_content)
+    # 送信キューに登録
+    return send_email(recipient_email, message.subject, message.html, message.text)
 
 def send_admin_reset_notification(admin_emails, user_name, employee_id, note):
     """
@@ -126,32 +53,15 @@ def send_admin_reset_notification(admin_emails, user_name, employee_id, note):
         note (str): 依頼理由
     
     Returns:
-        bool: 送信成功したらTrue
+        bool: 送信キューに登録できたらTrue
     """
-    # メールの件名
-    subject = "【社内業務ツール】パスワードリセット依頼"
-    
-    # HTML本文
-    html_content = render_template(
-        'emails/admin_reset_notification.html',
+    # 件名・HTML版・テキスト版を1つのテンプレートから作る
+    message = render_email(
+        'admin_reset_notification',
         user_name=user_name,
         employee_id=employee_id,
         note=note
     )
     
-    # プレーンテキスト版
-    text_content = f"""
-管理者各位
-
-{user_name}（社員ID: {employee_id}）からパスワードリセットの依頼がありました。
-
-【依頼理由】
-{note}
-
-管理者ツールからパスワードの再設定をお願いします。
-
-社内業務ツール
-"""
-    
-    # メール送信
-    return send_email(admin_emails, subject, html_content, text_content)
\ No newline at end of file
+    # 送信キューに登録
+    return send_email(admin_emails, message.subject, message.html, message.text)
\ No newline at end of file
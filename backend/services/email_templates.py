@@ -0,0 +1,129 @@
+# services/email_templates.py - メールテンプレートの描画（コンパイル済みテンプレートの再利用）
+#
+# templates/emails/ の各テンプレートは件名（subject）・テキスト版（text）・HTML版（content）を
+# 1つのファイルにブロックとして持つ（emails/_layout.html を継承）。
+# 起動時に全テンプレートをコンパイルしておき、送信のたびにはブロックの描画だけを行う。
+# ダイジェストや一括送信では render_batch で同じテンプレートを宛先ごとの値で続けて描画する。
+
+import os
+from collections import namedtuple
+
+from flask import current_app
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+# 描画結果（件名・HTML本文・テキスト本文）
+RenderedEmail = namedtuple('RenderedEmail', ('subject', 'html', 'text'))
+
+# templates/ 以下のメールテンプレートのディレクトリ
+EMAIL_TEMPLATE_DIR = 'emails'
+
+
+class EmailRenderer:
+    """メールテンプレートの描画
+
+    Flask の render_template とは別の Jinja 環境を持ち、コンパイル済みのテンプレートを
+    プロセス内で使い回す（auto_reload=False の場合はファイルの更新確認もしない）。
+
+    Args:
+        template_folder (str): テンプレートのルートディレクトリ（templates/）
+        auto_reload (bool): テンプレートファイルの更新を確認して再コンパイルする（開発用）
+    """
+
+    def __init__(self, template_folder, auto_reload=False):
+        self.template_folder = template_folder
+        self.env = Environment(
+            loader=FileSystemLoader(template_folder),
+            autoescape=select_autoescape(['html']),
+            auto_reload=auto_reload,
+            cache_size=-1,  # コンパイル済みテンプレートを破棄しない
+            keep_trailing_newline=True
+        )
+
+    def template_names(self):
+        """メールテンプレートの名前の一覧（_ で始まるレイアウトは除く）"""
+        directory = os.path.join(self.template_folder, EMAIL_TEMPLATE_DIR)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            os.path.splitext(file_name)[0] for file_name in os.listdir(directory)
+            if file_name.endswith('.html') and not file_name.startswith('_')
+        )
+
+    def precompile(self):
+        """全テンプレートをコンパイルしておく（最初の送信を待たせない）
+
+        Returns:
+            int: コンパイルしたテンプレート数
+        """
+        names = self.template_names()
+        for name in names:
+            self._template(name)
+        return len(names)
+
+    def _template(self, name):
+        return self.env.get_template(f'{EMAIL_TEMPLATE_DIR}/{name}.html')
+
+    @staticmethod
+    def _render(template, context):
+        # ブロックごとに新しいコンテキストを作る（継承先のブロック解決が混ざらないように）
+        subject = ''.join(template.blocks['subject'](template.new_context(context))).strip()
+        text = ''.join(template.blocks['text'](template.new_context(context))).strip() + '\n'
+        html = ''.join(template.root_render_func(template.new_context(context)))
+        return RenderedEmail(subject, html, text)
+
+    def render(self, name, **context):
+        """1通分を描画する
+
+        Args:
+            name (str): テンプレート名（templates/emails/<name>.html）
+            **context: テンプレートに渡す値
+
+        Returns:
+            RenderedEmail: 件名・HTML本文・テキスト本文
+        """
+        return self._render(self._template(name), context)
+
+    def render_batch(self, name, contexts, **shared):
+        """同じテンプレートを宛先ごとの値で続けて描画する
+
+        Args:
+            name (str): テンプレート名
+            contexts (iterable of dict): 宛先ごとの値
+            **shared: 全宛先で共通の値（宛先ごとの値が優先）
+
+        Returns:
+            list of RenderedEmail: contexts と同じ順序の描画結果
+        """
+        template = self._template(name)
+        return [self._render(template, {**shared, **context}) for context in contexts]
+
+
+def init_email_templates(app):
+    """メールテンプレートを起動時にコンパイルして登録する
+
+    設定:
+        EMAIL_TEMPLATES_AUTO_RELOAD: テンプレートの変更を反映する（DEBUG 時は常に反映）
+    """
+    auto_reload = app.config.get('EMAIL_TEMPLATES_AUTO_RELOAD') or app.debug
+    renderer = EmailRenderer(os.path.join(app.root_path, app.template_folder), auto_reload=auto_reload)
+    renderer.precompile()
+    app.extensions['email_renderer'] = renderer
+    return renderer
+
+
+def email_renderer():
+    """現在のアプリのメールテンプレート描画（未登録の場合はここで登録する）"""
+    renderer = current_app.extensions.get('email_renderer')
+    if renderer is None:
+        renderer = init_email_templates(current_app)
+    return renderer
+
+
+def render_email(name, **context):
+    """templates/emails/<name>.html を描画する"""
+    return email_renderer().render(name, **context)
+
+
+def render_email_batch(name, contexts, **shared):
+    """templates/emails/<name>.html を宛先ごとに描画する"""
+    return email_renderer().render_batch(name, contexts, **shared)
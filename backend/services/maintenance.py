@@ -0,0 +1,90 @@
+# services/maintenance.py - 古いデータの削除（定期ジョブから呼ぶ）
+#
+# 大量の行を1つのトランザクションで削除するとロックとWALが膨らむため、
+# batch_size 件ずつ削除してその都度コミットする。
+
+from flask import current_app
+from sqlalchemy import text
+
+from models import db
+
+# 1回の DELETE で削除する件数
+DELETE_BATCH_SIZE = 5000
+
+
+def delete_in_batches(table, condition, params=None, batch_size=DELETE_BATCH_SIZE):
+    """条件に合う行を batch_size 件ずつ削除する
+
+    Args:
+        table (str): テーブル名（id 列を持つこと）
+        condition (str): WHERE 句の条件（SQL）
+        params (dict, optional): 条件のパラメーター
+        batch_size (int): 1回に削除する件数
+
+    Returns:
+        int: 削除した件数
+    """
+    statement = text(f"""
+        DELETE FROM {table}
+        WHERE id IN (SELECT id FROM {table} WHERE {condition} LIMIT :batch_size)
+    """)
+    total = 0
+    while True:
+        deleted = db.session.execute(statement, {**(params or {}), 'batch_size': batch_size}).rowcount
+        db.session.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def prune_email_outbox(retention_days=None):
+    """送信済み・送信失敗のメールを保存期間を過ぎたら削除する
+
+    Returns:
+        int: 削除した件数
+    """
+    if retention_days is None:
+        retention_days = current_app.config.get('EMAIL_OUTBOX_RETENTION_DAYS', 30)
+    return delete_in_batches(
+        'email_outbox',
+        "status IN ('sent', 'failed') AND created_at < now() - make_interval(days => :days)",
+        {'days': retention_days}
+    )
+
+
+def prune_chat_messages(retention_days=None):
+    """既読のチャットメッセージを保存期間を過ぎたら削除する（0 の場合は削除しない）
+
+    Returns:
+        int: 削除した件数
+    """
+    if retention_days is None:
+        retention_days = current_app.config.get('CHAT_MESSAGE_RETENTION_DAYS', 0)
+    if not retention_days:
+        return 0
+    # created_at は UTC の naive datetime
+    return delete_in_batches(
+        'chat_messages',
+        "is_read AND created_at < (now() AT TIME ZONE 'UTC') - make_interval(days => :days)",
+        {'days': retention_days}
+    )
+
+
+def prune_password_reset_requests(retention_days=None):
+    """使用済み・期限切れ・対応済みのパスワードリセットリクエストを削除する
+
+    保存期間内の行は問い合わせ対応用に残す。未対応の管理者リセット依頼は削除しない。
+
+    Returns:
+        int: 削除した件数
+    """
+    if retention_days is None:
+        retention_days = current_app.config.get('PASSWORD_RESET_RETENTION_DAYS', 7)
+    # 日時はすべて UTC の naive datetime
+    return delete_in_batches(
+        'password_reset_requests',
+        """(used_at < (now() AT TIME ZONE 'UTC') - make_interval(days => :days)
+            OR expires_at < (now() AT TIME ZONE 'UTC') - make_interval(days => :days)
+            OR handled_at < (now() AT TIME ZONE 'UTC') - make_interval(days => :days))""",
+        {'days': retention_days}
+    )
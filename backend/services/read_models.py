@@ -0,0 +1,282 @@
+# services/read_models.py - 一覧表示用の読み取りクエリ
+#
+# 一覧系エンドポイントは ORM のエンティティを組み立てず、必要なカラムだけを
+# select() で取得して行タプル（Row）のまま返す。identity map への登録や
+# 属性の計装が無いため、件数が多い一覧ほどメモリと時間が減る。
+# 更新系の処理はこれまで通り ORM を使う。
+
+from math import ceil
+
+from sqlalchemy import and_, func, or_, select
+
+from models import db, ChatMessage, User, WorkLog
+from utils.serializers import (
+    ADMIN_WORKLOG_FIELDS, ADMIN_WORKLOG_USER_FIELDS, CHAT_MESSAGE_FIELDS, USER_FIELDS, WORKLOG_HISTORY_FIELDS,
+    row_columns
+)
+
+CHAT_MESSAGE_COLUMNS = row_columns(ChatMessage, CHAT_MESSAGE_FIELDS)
+
+# ユーザー一覧の前方一致検索の対象
+USER_SEARCH_COLUMNS = (User.name, User.employee_id, User.department_name)
+
+# 並べ替えに使えるカラム名
+WORKLOG_HISTORY_SORT_KEYS = ('date', 'minutes', 'status', 'updated_at')
+ADMIN_WORKLOG_SORT_KEYS = ('date', 'employee_id', 'minutes', 'status', 'unit_name', 'work_type')
+
+# 申請中として扱うステータス
+PENDING_STATUSES = ('pending_add', 'pending_edit', 'pending_delete')
+
+
+class Page:
+    """ページネーション結果（Flask-SQLAlchemy の Pagination と同じ属性）"""
+
+    __slots__ = ('items', 'page', 'per_page', 'total')
+
+    def __init__(self, items, page, per_page, total):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def pages(self):
+        if not self.total:
+            return 0
+        return ceil(self.total / self.per_page)
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+
+def paginate_ids(stmt, page, per_page):
+    """ID だけを select する文をページ単位で実行する
+
+    Args:
+        stmt: 1カラム（ID）を返す select 文（並び順を含む）
+        page (int): ページ番号（1始まり）
+        per_page (int): 1ページの件数
+
+    Returns:
+        Page: items にそのページの ID のリスト
+    """
+    page = max(page, 1)
+    per_page = max(per_page, 1)
+    total = db.session.execute(
+        select(func.count()).select_from(stmt.order_by(None).subquery())
+    ).scalar()
+    ids = db.session.execute(
+        stmt.limit(per_page).offset((page - 1) * per_page)
+    ).scalars().all()
+    return Page(ids, page, per_page, total)
+
+
+def _columns_with(model, fields, *extra):
+    """fields のカラムの後ろに、呼び出し側で使う extra のカラムを（含まれていなければ）追加する
+
+    シリアライザーは先頭から fields の数だけ読むため、追加したカラムはレスポンスに出ない。
+    """
+    names = {column for _, column, _ in fields}
+    return row_columns(model, fields) + tuple(getattr(model, name) for name in extra if name not in names)
+
+
+def _ordered(column, sort_order):
+    return column.asc() if sort_order == 'asc' else column.desc()
+
+
+def _exclude_edited_copies(source):
+    """編集申請の「編集後」の行を除外する条件（件数・ページは編集前の行で数える）"""
+    return or_(source.status != 'pending_edit', source.original_id.is_(None))
+
+
+def worklog_history_page(employee_id, conditions, page, per_page, sort_by, sort_order,
+                         fields=WORKLOG_HISTORY_FIELDS, source=WorkLog):
+    """社員の工数履歴を1ページ分取得する
+
+    ページ内の編集前の行と、それに対応する編集後の行をまとめて返す。
+
+    Args:
+        employee_id (str): 社員ID
+        conditions (list): 追加の絞り込み条件（source のカラムで指定）
+        page (int): ページ番号
+        per_page (int): 1ページの件数
+        sort_by (str): 並べ替えるカラム名（不明な値は最終更新日時の降順）
+        sort_order (str): 'asc' または 'desc'
+        fields (tuple): 返すフィールド定義（WORKLOG_HISTORY_FIELDS の一部）
+        source: WorkLog またはアーカイブを含む WorkLogWithArchive
+
+    Returns:
+        Page: items に fields の順の行（最終更新日時の updated_at を常に含む）
+    """
+    if sort_by in WORKLOG_HISTORY_SORT_KEYS:
+        order = _ordered(getattr(source, sort_by), sort_order)
+    else:
+        order = source.updated_at.desc()
+
+    where = [source.employee_id == employee_id, *conditions]
+    result = paginate_ids(
+        select(source.id).where(*where, _exclude_edited_copies(source)).order_by(order),
+        page, per_page
+    )
+    ids = result.items
+
+    result.items = db.session.execute(
+        select(*_columns_with(source, fields, 'updated_at'))
+        .where(*where, or_(source.id.in_(ids), source.original_id.in_(ids)))
+        .order_by(order, source.updated_at.desc())
+    ).all() if ids else []
+    return result
+
+
+def worklog_history_rows(employee_id, fields=WORKLOG_HISTORY_FIELDS, source=WorkLog):
+    """社員の工数履歴をすべて取得する（fields の順の行と updated_at、最終更新日時の降順）"""
+    return db.session.execute(
+        select(*_columns_with(source, fields, 'updated_at'))
+        .where(source.employee_id == employee_id)
+        .order_by(source.updated_at.desc())
+    ).all()
+
+
+def _admin_worklog_select(columns, source, conditions, department, join_user=False):
+    stmt = select(*columns).select_from(source)
+    if department or join_user:
+        # 社員が削除されている行も残すため外部結合（部署の絞り込みでは結果的に内部結合と同じ）
+        stmt = stmt.outerjoin(User, source.employee_id == User.employee_id)
+    if department:
+        stmt = stmt.where(User.department_name == department)
+    return stmt.where(*conditions)
+
+
+def admin_worklog_conditions(source, start_date=None, end_date=None, unit_name=None,
+                             employee_id=None, status=None):
+    """管理者用工数一覧の絞り込み条件を作る（日付は date 型で渡す）"""
+    conditions = []
+    if start_date:
+        conditions.append(source.date >= start_date)
+    if end_date:
+        conditions.append(source.date <= end_date)
+    if unit_name:
+        conditions.append(source.unit_name == unit_name)
+    if employee_id:
+        conditions.append(source.employee_id.like(f'%{employee_id}%'))
+    if status == 'pending':
+        conditions.append(source.status.in_(PENDING_STATUSES))
+    elif status:
+        conditions.append(source.status == status)
+    return conditions
+
+
+def count_admin_worklogs(source, conditions, department=None):
+    """管理者用工数一覧の件数（編集後の行を除く）"""
+    stmt = _admin_worklog_select(
+        (func.count(),), source, [*conditions, _exclude_edited_copies(source)], department
+    )
+    return db.session.execute(stmt).scalar()
+
+
+def admin_worklog_rows(source, conditions, department=None, sort_by='date', sort_order='desc',
+                       page=None, per_page=100, fields=ADMIN_WORKLOG_FIELDS, user_fields=ADMIN_WORKLOG_USER_FIELDS):
+    """管理者用の工数一覧を取得する
+
+    Args:
+        source: WorkLog またはアーカイブを含む WorkLogWithArchive
+        conditions (list): admin_worklog_conditions の結果
+        department (str, optional): 部署名（社員テーブルと結合して絞り込む）
+        sort_by (str): 並べ替えるカラム名（不明な値は日付の降順）
+        sort_order (str): 'asc' または 'desc'
+        page (int, optional): ページ番号（省略時は全件、編集後の行は除く）
+        per_page (int): 1ページの件数
+        fields (tuple): 返す工数のフィールド定義（ADMIN_WORKLOG_FIELDS の一部）
+        user_fields (tuple): 返す社員情報のフィールド定義（ADMIN_WORKLOG_USER_FIELDS の一部、
+            空でなければ users を結合する）
+
+    Returns:
+        Page: items に fields + user_fields の順の行
+    """
+    if sort_by in ADMIN_WORKLOG_SORT_KEYS:
+        order = _ordered(getattr(source, sort_by), sort_order)
+    else:
+        order = source.date.desc()
+    columns = row_columns(source, fields) + row_columns(User, user_fields)
+    join_user = bool(user_fields)
+
+    if page is None:
+        rows = db.session.execute(
+            _admin_worklog_select(
+                columns, source, [*conditions, _exclude_edited_copies(source)], department, join_user
+            ).order_by(order)
+        ).all()
+        return Page(rows, 1, max(len(rows), 1), len(rows))
+
+    result = paginate_ids(
+        _admin_worklog_select((source.id,), source, [*conditions, _exclude_edited_copies(source)], department)
+        .order_by(order),
+        page, per_page
+    )
+    ids = result.items
+
+    # 編集前の行 + 対応する編集後の行
+    result.items = db.session.execute(
+        _admin_worklog_select(
+            columns, source, [*conditions, or_(source.id.in_(ids), source.original_id.in_(ids))],
+            department, join_user
+        ).order_by(order)
+    ).all() if ids else []
+    return result
+
+
+def user_rows(fields=USER_FIELDS):
+    """ユーザー一覧（fields の順の行）"""
+    return db.session.execute(select(*row_columns(User, fields))).all()
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def user_directory_page(fields=USER_FIELDS, search=None, page=1, per_page=100):
+    """ユーザー一覧を1ページ分取得する（社員IDの順）
+
+    Args:
+        fields (tuple): 返すフィールド定義（USER_FIELDS の一部）
+        search (str, optional): 氏名・社員ID・部署名の前方一致検索（varchar_pattern_ops のインデックスを使う）
+        page (int): ページ番号
+        per_page (int): 1ページの件数
+
+    Returns:
+        Page: items に fields の順の行
+    """
+    page = max(page, 1)
+    per_page = max(per_page, 1)
+    conditions = []
+    if search:
+        pattern = _escape_like(search) + '%'
+        conditions.append(or_(*(
+            column.like(pattern, escape='\\') for column in USER_SEARCH_COLUMNS
+        )))
+
+    total = db.session.execute(select(func.count()).select_from(User).where(*conditions)).scalar()
+    rows = db.session.execute(
+        select(*row_columns(User, fields))
+        .where(*conditions)
+        .order_by(User.employee_id)
+        .limit(per_page).offset((page - 1) * per_page)
+    ).all()
+    return Page(rows, page, per_page, total)
+
+
+def chat_message_rows(user_id, partner_id):
+    """2ユーザー間のメッセージ（CHAT_MESSAGE_FIELDS の順の行、送信日時の昇順）"""
+    return db.session.execute(
+        select(*CHAT_MESSAGE_COLUMNS)
+        .where(or_(
+            and_(ChatMessage.sender_id == user_id, ChatMessage.receiver_id == partner_id),
+            and_(ChatMessage.sender_id == partner_id, ChatMessage.receiver_id == user_id)
+        ))
+        .order_by(ChatMessage.created_at)
+    ).all()
@@ -0,0 +1,28 @@
+# services/scheduled_jobs.py - 定期ジョブの一覧（services/scheduler.py に登録する）
+
+
+def register_jobs(scheduler, app):
+    """アプリの定期ジョブを登録する
+
+    設定:
+        APPROVAL_DIGEST_ENABLED: 未処理申請ダイジェストを送る
+        APPROVAL_DIGEST_TIME: ダイジェストの送信時刻（日本時間、'HH:MM'）
+    """
+    from services.approval_digest import send_approval_digests
+    from services.maintenance import prune_chat_messages, prune_email_outbox, prune_password_reset_requests
+    from services.worklog_partition import ensure_worklog_partitions
+
+    # 工数テーブルの先の月のパーティションを作成（起動時にも作成している）
+    scheduler.add_job('worklog_partitions', ensure_worklog_partitions, at='01:00')
+
+    # 未処理申請のダイジェストメール
+    if app.config.get('APPROVAL_DIGEST_ENABLED', True):
+        scheduler.add_job('approval_digest', send_approval_digests,
+                          at=app.config.get('APPROVAL_DIGEST_TIME', '08:00'))
+
+    # 古いデータの削除
+    scheduler.add_job('email_outbox_prune', prune_email_outbox, at='03:00')
+    scheduler.add_job('chat_messages_prune', prune_chat_messages, at='03:30')
+    scheduler.add_job('password_reset_prune', prune_password_reset_requests, at='03:15')
+
+    return scheduler
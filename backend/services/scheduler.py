@@ -0,0 +1,245 @@
+# services/scheduler.py - アプリ内の定期ジョブ実行
+#
+# ジョブは名前・実行間隔（every）または毎日の実行時刻（at、日本時間）で登録する。
+# 実行状態は scheduler_jobs テーブルに持ち、ジョブごとに実行権（リース）を UPDATE で
+# 取り合うため、gunicorn の複数ワーカーや別プロセス（flask scheduler run）で
+# 同時に動かしても、1つのジョブを実行するのは常に1プロセスだけになる。
+# 実行時間と結果は Prometheus のメトリクスとして記録する。
+
+import os
+import socket
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta, timezone
+
+from sqlalchemy import text
+
+from models import db, SchedulerJob
+from utils.metrics import observe_job
+from utils.time_format import JST
+
+# ジョブの実行権の有効期間（秒）。これより長く終わらないジョブは他のプロセスが実行し直す
+DEFAULT_LEASE_SECONDS = 1800
+
+
+class Job:
+    """定期ジョブの定義
+
+    Args:
+        name (str): ジョブ名（scheduler_jobs の主キー）
+        func (callable): 実行する関数（アプリコンテキスト内で引数なしで呼ぶ）
+        every (timedelta, optional): 実行間隔
+        at (str, optional): 毎日の実行時刻（日本時間、'HH:MM'）
+        lease_seconds (int): 実行権の有効期間（秒）
+    """
+
+    def __init__(self, name, func, every=None, at=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        if (every is None) == (at is None):
+            raise ValueError(f'ジョブ {name}: every と at のどちらか一方を指定してください')
+        self.name = name
+        self.func = func
+        self.every = every
+        self.at = dt_time.fromisoformat(at) if at else None
+        self.lease_seconds = lease_seconds
+
+    def next_run(self, now):
+        """now（aware datetime）より後の次回実行時刻"""
+        if self.every is not None:
+            return now + self.every
+        local_now = now.astimezone(JST)
+        candidate = datetime.combine(local_now.date(), self.at, tzinfo=JST)
+        if candidate <= local_now:
+            candidate = datetime.combine(local_now.date() + timedelta(days=1), self.at, tzinfo=JST)
+        return candidate.astimezone(timezone.utc)
+
+    def describe(self):
+        if self.every is not None:
+            return f'{int(self.every.total_seconds())}秒ごと'
+        return f'毎日 {self.at.strftime("%H:%M")}'
+
+
+class Scheduler:
+    """定期ジョブの登録と実行
+
+    設定:
+        SCHEDULER_POLL_INTERVAL: 実行時刻の確認間隔（秒）
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.jobs = {}
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.poll_interval = app.config.get('SCHEDULER_POLL_INTERVAL', 30)
+        self.started = False
+        self.stopping = threading.Event()
+
+    def add_job(self, name, func, every=None, at=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """ジョブを登録する（同じ名前は上書き）"""
+        self.jobs[name] = Job(name, func, every=every, at=at, lease_seconds=lease_seconds)
+        return self.jobs[name]
+
+    def job(self, name, every=None, at=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """ジョブとして登録するデコレーター"""
+        def decorator(func):
+            self.add_job(name, func, every=every, at=at, lease_seconds=lease_seconds)
+            return func
+        return decorator
+
+    def sync_jobs(self):
+        """登録したジョブの行を scheduler_jobs に作る（既存の行は次回実行時刻を維持する）"""
+        now = datetime.now(timezone.utc)
+        for job in self.jobs.values():
+            db.session.execute(text("""
+                INSERT INTO scheduler_jobs (name, next_run_at)
+                VALUES (:name, :next_run_at)
+                ON CONFLICT (name) DO NOTHING
+            """), {'name': job.name, 'next_run_at': job.next_run(now)})
+        db.session.commit()
+
+    def _claim(self, names, force=False):
+        """実行時刻を過ぎたジョブを1つ選んで実行権を取る（他のプロセスが実行中のものは除く）
+
+        どのジョブが選ばれるかは実行するまで分からないため、実行権の有効期間は
+        候補の中で最も長いものにする（異常終了時に再実行されるまでが長くなるだけ）。
+        """
+        due = '' if force else 'AND next_run_at <= now()'
+        row = db.session.execute(text(f"""
+            UPDATE scheduler_jobs
+            SET locked_by = :worker_id,
+                locked_until = now() + make_interval(secs => :lease_seconds),
+                last_started_at = now()
+            WHERE name = (
+                SELECT name FROM scheduler_jobs
+                WHERE name = ANY(:names) {due}
+                  AND (locked_until IS NULL OR locked_until < now())
+                ORDER BY next_run_at
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING name
+        """), {
+            'worker_id': self.worker_id,
+            'lease_seconds': max(self.jobs[name].lease_seconds for name in names),
+            'names': list(names)
+        }).scalar()
+        db.session.commit()
+        return row
+
+    def _finish(self, job, status, duration, error=None):
+        db.session.execute(text("""
+            UPDATE scheduler_jobs
+            SET locked_by = NULL, locked_until = NULL,
+                last_finished_at = now(), last_status = :status,
+                last_duration_ms = :duration_ms, last_error = :error,
+                next_run_at = :next_run_at
+            WHERE name = :name AND locked_by = :worker_id
+        """), {
+            'name': job.name,
+            'worker_id': self.worker_id,
+            'status': status,
+            'duration_ms': int(duration * 1000),
+            'error': error,
+            'next_run_at': job.next_run(datetime.now(timezone.utc))
+        })
+        db.session.commit()
+
+    def _execute(self, job):
+        started = time.perf_counter()
+        try:
+            job.func()
+        except Exception as e:
+            db.session.rollback()
+            duration = time.perf_counter() - started
+            self.app.logger.error(f"定期ジョブ {job.name} が失敗しました: {str(e)}")
+            observe_job(job.name, duration, 'failure')
+            self._finish(job, 'failure', duration, str(e))
+            return False
+        duration = time.perf_counter() - started
+        self.app.logger.info(f"定期ジョブ {job.name} が完了しました（{duration:.1f}秒）")
+        observe_job(job.name, duration, 'success')
+        self._finish(job, 'success', duration)
+        return True
+
+    def run_due_jobs(self):
+        """実行時刻を過ぎたジョブをすべて実行する（アプリコンテキスト内で呼ぶ）
+
+        Returns:
+            list of str: 実行したジョブ名
+        """
+        executed = []
+        while self.jobs:
+            name = self._claim(self.jobs)
+            if name is None:
+                return executed
+            self._execute(self.jobs[name])
+            executed.append(name)
+        return executed
+
+    def run_job(self, name):
+        """実行時刻に関係なくジョブを今すぐ実行する（他のプロセスが実行中の場合は実行しない）
+
+        Returns:
+            bool or None: 成功/失敗（実行できなかった場合は None）
+        """
+        if name not in self.jobs:
+            raise KeyError(f'ジョブ {name} は登録されていません')
+        self.sync_jobs()
+        if self._claim([name], force=True) is None:
+            return None
+        return self._execute(self.jobs[name])
+
+    def status(self):
+        """登録したジョブの実行状態（scheduler_jobs の行）"""
+        rows = {row.name: row for row in SchedulerJob.query.filter(SchedulerJob.name.in_(list(self.jobs)))}
+        return [(job, rows.get(job.name)) for job in self.jobs.values()]
+
+    def run_forever(self):
+        """実行時刻の確認と実行を繰り返す（グリーンスレッドまたは flask scheduler run で使う）"""
+        synced = False
+        while not self.stopping.is_set():
+            with self.app.app_context():
+                try:
+                    # マイグレーション前などで失敗した場合は次の確認時に登録し直す
+                    if not synced:
+                        self.sync_jobs()
+                        synced = True
+                    self.run_due_jobs()
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f"定期ジョブの実行エラー: {str(e)}")
+                finally:
+                    db.session.remove()
+            time.sleep(self.poll_interval)
+
+    def start(self, start_background_task):
+        """実行スレッドを起動する（2回目以降は何もしない）"""
+        if self.started:
+            return
+        self.started = True
+        start_background_task(self.run_forever)
+
+
+def init_scheduler(app, socketio):
+    """定期ジョブを登録し、Webプロセス内での実行を設定する
+
+    SCHEDULER_ENABLED が有効なら最初のHTTPリクエストで実行スレッドを起動する。
+    無効にした場合は別プロセスの flask scheduler run で実行する。
+
+    設定:
+        SCHEDULER_ENABLED: Webプロセス内で定期ジョブを実行する
+    """
+    from services.scheduled_jobs import register_jobs
+
+    scheduler = Scheduler(app)
+    register_jobs(scheduler, app)
+    app.extensions['scheduler'] = scheduler
+
+    app.config.setdefault('SCHEDULER_ENABLED', True)
+    if not app.config['SCHEDULER_ENABLED']:
+        return scheduler
+
+    @app.before_request
+    def start_scheduler_on_request():
+        scheduler.start(socketio.start_background_task)
+
+    return scheduler
@@ -0,0 +1,168 @@
+# services/user_import.py - ユーザーの一括登録（CSV / JSON）
+#
+# 新しい拠点の社員をまとめて登録するための処理。
+#   1. 全行を検証（必須項目・文字数・ファイル内の社員IDの重複）
+#   2. 既存の社員IDを1回のクエリで照合
+#   3. パスワードのハッシュをスレッドプールで並列に計算（utils/passwords.py）
+#   4. 1回の複数行 INSERT で登録（同時に登録された社員IDは ON CONFLICT で飛ばす）
+# 結果は行ごとのレポート（登録・スキップ・エラー）として返す。
+
+import csv
+import io
+import os
+
+from sqlalchemy.dialects.postgresql import insert
+
+from models import db, User
+from utils.passwords import hash_passwords
+
+# 1回に登録できる最大件数
+MAX_IMPORT_USERS = 2000
+
+# ファイルの見出し・JSONのキー → カラム名
+COLUMN_ALIASES = {
+    '社員ID': 'employee_id', 'employee_id': 'employee_id', 'employeeId': 'employee_id',
+    '氏名': 'name', '名前': 'name', 'name': 'name',
+    '部署': 'department_name', '部署名': 'department_name',
+    'department_name': 'department_name', 'departmentName': 'department_name',
+    '役職': 'position', 'position': 'position',
+    'メールアドレス': 'email', 'email': 'email',
+    'パスワード': 'password', 'password': 'password',
+    '権限': 'role_level', 'role_level': 'role_level', 'roleLevel': 'role_level',
+}
+
+# 必須カラム（エラーメッセージは create_user と同じ文言）
+REQUIRED_COLUMNS = ('employee_id', 'name', 'department_name', 'position', 'password')
+
+# 文字列カラムの最大長（users の定義に合わせる）
+STRING_LIMITS = {'employee_id': 10, 'name': 100, 'department_name': 50, 'position': 50, 'email': 100}
+
+# 登録できる権限レベル（validate_registration_data と同じ範囲）
+ROLE_LEVELS = (1, 2, 3, 4)
+
+
+def read_user_file(stream, filename):
+    """CSV ファイルを行（dict）のリストとして読み込む
+
+    Args:
+        stream: ファイルオブジェクト（バイナリ）
+        filename (str): 拡張子の判定に使うファイル名
+
+    Returns:
+        list of dict: 見出しをキーにした行
+    """
+    if os.path.splitext(filename or '')[1].lower() != '.csv':
+        raise ValueError('CSVファイルを指定してください')
+    # Excel で保存したCSV（BOM付き）もそのまま読めるように utf-8-sig
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    return list(csv.DictReader(text_stream))
+
+
+def normalize_rows(rows):
+    """見出しの別名をカラム名にそろえ、値の前後の空白を除く"""
+    normalized = []
+    for row in rows:
+        if not isinstance(row, dict):
+            raise ValueError('ユーザーはオブジェクトの配列で指定してください')
+        values = {}
+        for key, value in row.items():
+            column = COLUMN_ALIASES.get(str(key).strip())
+            if column:
+                values[column] = '' if value is None else str(value).strip()
+        normalized.append(values)
+    return normalized
+
+
+def validate_user_row(values, seen_ids):
+    """1行を検証してエラーメッセージを返す（問題なければ None）"""
+    for column in REQUIRED_COLUMNS:
+        if not values.get(column):
+            return f'{column}は必須です'
+    for column, limit in STRING_LIMITS.items():
+        if len(values.get(column) or '') > limit:
+            return f'{column}は{limit}文字以内で入力してください'
+    role_level = values.get('role_level') or '1'
+    if not role_level.isdigit() or int(role_level) not in ROLE_LEVELS:
+        return f"role_levelは {' / '.join(map(str, ROLE_LEVELS))} のいずれかです"
+    if values['employee_id'] in seen_ids:
+        return f"社員ID {values['employee_id']} がファイル内で重複しています"
+    return None
+
+
+def import_users(rows, dry_run=False, first_row=1):
+    """ユーザーを一括登録する
+
+    不正な行・既存の社員IDの行は登録せず、残りの行をまとめて登録する。
+
+    Args:
+        rows (list of dict): 登録するユーザー（CSVの行またはJSONのオブジェクト）
+        dry_run (bool): Trueの場合は検証のみ行い書き込まない
+        first_row (int): 最初の行の行番号（CSVの場合は見出しの次の2）
+
+    Returns:
+        dict: total / created / skipped / error_count / results
+            results は行ごとの {'row': 行番号, 'employee_id', 'status': created / skipped / error / valid,
+            'message', 'id'}
+    """
+    rows = normalize_rows(rows)
+    if len(rows) > MAX_IMPORT_USERS:
+        raise ValueError(f'一度に登録できるのは{MAX_IMPORT_USERS}件までです')
+
+    results = []
+    candidates = []
+    seen_ids = set()
+    for number, values in enumerate(rows, start=first_row):
+        result = {'row': number, 'employee_id': values.get('employee_id', ''), 'status': 'valid'}
+        results.append(result)
+        message = validate_user_row(values, seen_ids)
+        if message:
+            result.update(status='error', message=message)
+            continue
+        seen_ids.add(values['employee_id'])
+        candidates.append((result, values))
+
+    # 既存の社員IDを1回のクエリで照合
+    if candidates:
+        existing = set(db.session.execute(
+            db.select(User.employee_id).where(User.employee_id.in_([v['employee_id'] for _, v in candidates]))
+        ).scalars())
+        for result, values in candidates:
+            if values['employee_id'] in existing:
+                result.update(status='skipped', message='この社員IDは既に使用されています')
+        candidates = [(result, values) for result, values in candidates if result['status'] == 'valid']
+
+    if not dry_run and candidates:
+        password_hashes = hash_passwords([values['password'] for _, values in candidates])
+        inserted = dict(db.session.execute(
+            insert(User)
+            .values([
+                {
+                    'employee_id': values['employee_id'],
+                    'name': values['name'],
+                    'department_name': values['department_name'],
+                    'position': values['position'],
+                    'email': values.get('email') or None,
+                    'password_hash': password_hash,
+                    'role_level': int(values.get('role_level') or 1)
+                }
+                for (_, values), password_hash in zip(candidates, password_hashes)
+            ])
+            .on_conflict_do_nothing(index_elements=['employee_id'])
+            .returning(User.employee_id, User.id)
+        ).all())
+        db.session.commit()
+
+        for result, values in candidates:
+            if values['employee_id'] in inserted:
+                result.update(status='created', id=inserted[values['employee_id']])
+            else:
+                # 検証後に別のリクエストで登録された社員ID
+                result.update(status='skipped', message='この社員IDは既に使用されています')
+
+    return {
+        'total': len(rows),
+        'created': sum(1 for r in results if r['status'] == 'created'),
+        'skipped': sum(1 for r in results if r['status'] == 'skipped'),
+        'error_count': sum(1 for r in results if r['status'] == 'error'),
+        'results': results,
+    }
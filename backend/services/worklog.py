@@ -1,71 +1,350 @@
-def validate_worklog_data(data):
-    """工数入力データのバリデーション
-    
+import time
+from datetime import datetime
+from sqlalchemy import select, delete, text, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+
+from models import db, WorkLog, UnitName, WorkType, UnitWorkType
+
+# 各行の必須フィールドとエラーメッセージ（チェック順）
+REQUIRED_ROW_FIELDS = (
+    ('model', 'MODELは必須です'),
+    ('serialNumber', '製造番号は必須です'),
+    ('workOrder', '工事番号は必須です'),
+    ('partNumber', 'P/Nは必須です'),
+    ('orderNumber', '注文番号は必須です'),
+    ('unitName', 'ユニット名は必須です'),
+    ('workType', '工事区分は必須です'),
+    ('minutes', '工数(分)は必須です'),
+)
+
+# 整数でない値のエラーメッセージ（フィールドごと）
+INTEGER_FIELD_MESSAGES = {
+    'quantity': '数量には整数を入力してください',
+    'minutes': '工数(分)には整数を入力してください',
+}
+
+# ユニット名→工事区分のキャッシュ（有効期限付き）
+# マスタの更新時は、更新したワーカーでは即座に、ほかのワーカーでは変更通知
+# （services/change_feed.py の unit_master_changes）を受けた時点で破棄する。
+# 変更通知が無効・未接続の場合、ほかのワーカーは最大 UNIT_WORK_TYPE_CACHE_TTL 秒
+# 古い対応表で検証する（削除された組み合わせを受け付ける・追加された組み合わせを拒否する）。
+UNIT_WORK_TYPE_CACHE_TTL = 60  # 秒
+_unit_work_type_cache = {'map': None, 'loaded_at': 0.0}
+
+
+def get_unit_work_type_map():
+    """ユニット名と工事区分の対応表を取得する（キャッシュ付き）
+
+    Returns:
+        dict: ユニット名 → 工事区分名の frozenset
+    """
+    now = time.monotonic()
+    cached = _unit_work_type_cache['map']
+    if cached is not None and now - _unit_work_type_cache['loaded_at'] < UNIT_WORK_TYPE_CACHE_TTL:
+        return cached
+
+    records = db.session.execute(
+        select(UnitName.name, WorkType.name)
+        .outerjoin(UnitWorkType, UnitWorkType.unit_id == UnitName.id)
+        .outerjoin(WorkType, WorkType.id == UnitWorkType.work_type_id)
+    ).all()
+
+    mapping = {}
+    for unit_name, work_type in records:
+        mapping.setdefault(unit_name, set())
+        if work_type:
+            mapping[unit_name].add(work_type)
+    mapping = {unit_name: frozenset(work_types) for unit_name, work_types in mapping.items()}
+
+    _unit_work_type_cache['map'] = mapping
+    _unit_work_type_cache['loaded_at'] = now
+    return mapping
+
+
+def invalidate_unit_work_type_map():
+    """ユニット名・工事区分のキャッシュを破棄する（このワーカーのみ）"""
+    _unit_work_type_cache['map'] = None
+
+
+def unit_work_type_error(unit_work_types, unit_name, work_type):
+    """ユニット名と工事区分の組み合わせを確認する（一括取り込みの検証と共通）
+
     Args:
-        data (dict): リクエストデータ
-    
+        unit_work_types (dict): get_unit_work_type_map の対応表
+        unit_name (str): ユニット名
+        work_type (str): 工事区分
+
+    Returns:
+        str: エラーメッセージ（問題なければ None）
+    """
+    allowed = unit_work_types.get(unit_name)
+    if allowed is None:
+        return f'ユニット名「{unit_name}」は登録されていません'
+    if work_type not in allowed:
+        return f'工事区分「{work_type}」はユニット「{unit_name}」に登録されていません'
+    return None
+
+
+def validate_worklog_batch(data, unit_work_types=None):
+    """工数入力データを全行まとめてバリデーションする
+
+    最初のエラーで止めずに全行をチェックし、エラーを行番号付きで集める。
+    あわせて保存用に型変換した値（int / date / "N/A" は None）を返すので、
+    呼び出し側で再度パースする必要はない。
+
+    Args:
+        data (dict): リクエストデータ（workDate / workRows）
+        unit_work_types (dict, optional): ユニット名→工事区分の対応表
+            省略時はキャッシュ済みの対応表を使う
+
     Returns:
-        dict: バリデーション結果
+        dict: valid / message（最初のエラー）/ errors / work_date / rows
     """
+    errors = []
+
+    def fail(message, row=None):
+        errors.append({'row': row, 'message': message})
+        return {
+            'valid': False,
+            'message': message,
+            'errors': errors,
+            'work_date': None,
+            'rows': [],
+        }
+
     # 必須フィールドのチェック
     if not data:
-        return {'valid': False, 'message': 'データが提供されていません'}
-    
+        return fail('データが提供されていません')
+
     if 'workDate' not in data:
-        return {'valid': False, 'message': '作業日付が必要です'}
-    
+        return fail('作業日付が必要です')
+
     if 'workRows' not in data or not isinstance(data['workRows'], list):
-        return {'valid': False, 'message': '工数データが必要です'}
-    
-    # 各行の必須フィールドをチェック
-    for i, row in enumerate(data['workRows']):
-        if not row.get('model'):
-            return {'valid': False, 'message': f'行 {i+1}: MODELは必須です'}
-        
-        if not row.get('serialNumber'):
-            return {'valid': False, 'message': f'行 {i+1}: 製造番号は必須です'}
-        
-        if not row.get('workOrder'):
-            return {'valid': False, 'message': f'行 {i+1}: 工事番号は必須です'}
-
-        if not row.get('partNumber'):
-            return {'valid': False, 'message': f'行 {i+1}: P/Nは必須です'}
-        
-        if not row.get('orderNumber'):
-            return {'valid': False, 'message': f'行 {i+1}: 注文番号は必須です'}
-        
-        # 数量が "N/A" の場合はスキップ（N工数対応）
-        if row.get("quantity") != "N/A":
+        return fail('工数データが必要です')
+
+    try:
+        work_date = datetime.fromisoformat(data['workDate']).date()
+    except (ValueError, TypeError):
+        return fail('日付の形式が正しくありません')
+
+    if unit_work_types is None:
+        unit_work_types = get_unit_work_type_map()
+
+    rows = []
+    append_row = rows.append
+    append_error = errors.append
+
+    # 各行を1回だけ走査してチェックと型変換を同時に行う
+    for i, row in enumerate(data['workRows'], 1):
+        if not isinstance(row, dict):
+            append_error({'row': i, 'message': f'行 {i}: 行データの形式が正しくありません'})
+            continue
+
+        row_ok = True
+        get = row.get
+        model = get('model')
+        serial_number = get('serialNumber')
+        work_order = get('workOrder')
+        part_number = get('partNumber')
+        order_number = get('orderNumber')
+        unit_name = get('unitName')
+        work_type = get('workType')
+
+        # 必須項目がすべて揃っている通常の行はメッセージ生成を省く
+        if not (model and serial_number and work_order and part_number
+                and order_number and unit_name and work_type and get('minutes')):
+            for field, message in REQUIRED_ROW_FIELDS:
+                if not get(field):
+                    append_error({'row': i, 'message': f'行 {i}: {message}'})
+                    row_ok = False
+
+        # 数量が "N/A" の場合は None（N工数対応）
+        quantity = get('quantity')
+        if quantity == 'N/A':
+            quantity = None
+        else:
             try:
-                quantity = int(row["quantity"])
+                quantity = int(quantity)
                 if quantity < 0:
-                    return {'valid': False, 'message': f'行 {i+1}: 数量は0以上の整数である必要があります'}
+                    append_error({'row': i, 'message': f'行 {i}: 数量は0以上の整数である必要があります'})
+                    row_ok = False
             except (ValueError, TypeError):
-                return {'valid': False, 'message': f'行 {i+1}: 数値フィールドには整数を入力してください'}
-
-
-        if not row.get('unitName'):
-            return {'valid': False, 'message': f'行 {i+1}: ユニット名は必須です'}
-        
-        if not row.get('workType'):
-            return {'valid': False, 'message': f'行 {i+1}: 工事区分は必須です'}
-        
-        if not row.get('minutes'):
-            return {'valid': False, 'message': f'行 {i+1}: 工数(分)は必須です'}
-        
-        
+                append_error({'row': i, 'message': f"行 {i}: {INTEGER_FIELD_MESSAGES['quantity']}"})
+                row_ok = False
+
         # 数値フィールドの確認
-        try:
-            if row.get('minutes'):
-                minutes = int(row['minutes'])
+        minutes = get('minutes')
+        if minutes:
+            try:
+                minutes = int(minutes)
                 if minutes <= 0:
-                    return {'valid': False, 'message': f'行 {i+1}: 工数(分)は正の整数である必要があります'}
-            # 重複バリデーションをコメントアウト
-            # if row.get('quantity') and row['quantity']:
-            #     quantity = int(row['quantity'])
-                # if quantity < 0:
-                #     return {'valid': False, 'message': f'行 {i+1}: 数量は0以上の整数である必要があります'}
-        except ValueError:
-            return {'valid': False, 'message': f'行 {i+1}: 数値フィールドには整数を入力してください'}
+                    append_error({'row': i, 'message': f'行 {i}: 工数(分)は正の整数である必要があります'})
+                    row_ok = False
+            except (ValueError, TypeError):
+                append_error({'row': i, 'message': f"行 {i}: {INTEGER_FIELD_MESSAGES['minutes']}"})
+                row_ok = False
+
+        # ユニット名と工事区分の組み合わせ（マスタ未登録の環境ではチェックしない）
+        if unit_work_types and unit_name and work_type:
+            message = unit_work_type_error(unit_work_types, unit_name, work_type)
+            if message:
+                append_error({'row': i, 'message': f'行 {i}: {message}'})
+                row_ok = False
+
+        if not row_ok:
+            continue
+
+        row_number = get('id')
+        try:
+            row_number = int(row_number) if row_number not in (None, '') else None
+        except (ValueError, TypeError):
+            row_number = None
+
+        append_row({
+            'row_number': row_number,
+            'model': model,
+            'serial_number': serial_number,
+            'work_order': work_order,
+            'part_number': part_number,
+            'order_number': order_number,
+            'quantity': quantity,
+            'unit_name': unit_name,
+            'work_type': work_type,
+            'minutes': minutes,
+            'remarks': get('remarks', ''),
+        })
+
+    return {
+        'valid': not errors,
+        'message': errors[0]['message'] if errors else None,
+        'errors': errors,
+        'work_date': work_date,
+        'rows': rows,
+    }
+
+
+def validate_worklog_data(data):
+    """工数入力データのバリデーション
+    
+    Args:
+        data (dict): リクエストデータ
     
-    return {'valid': True}
\ No newline at end of file
+    Returns:
+        dict: バリデーション結果（最初のエラーのみ）
+    """
+    result = validate_worklog_batch(data)
+    if not result['valid']:
+        return {'valid': False, 'message': result['message']}
+    return {'valid': True}
+
+
+# 差分保存で比較・書き込みを行うカラム（row_number をキーに照合する）
+DAILY_WORKLOG_COLUMNS = (
+    'model', 'serial_number', 'work_order', 'part_number', 'order_number',
+    'quantity', 'unit_name', 'work_type', 'minutes', 'remarks',
+)
+
+
+def save_daily_worklog(employee_id, work_date, rows):
+    """1日分の下書き工数を差分保存する
+
+    既存の下書き行と row_number で照合し、変更があった行だけを
+    1本の INSERT ... ON CONFLICT (id, date) DO UPDATE で書き込み、送信されなかった行は
+    1本の DELETE ... WHERE id = ANY(...) で削除する。
+    変更のない行には書き込まないため updated_at は実際の更新日時を保つ。
+    commit は呼び出し側で行う。
+
+    Args:
+        employee_id (str): 社員ID
+        work_date (date): 作業日
+        rows (list): 正規化済みの行（validate_worklog_batch の rows）
+
+    Returns:
+        dict: inserted / updated / deleted / unchanged の件数
+    """
+    columns = [WorkLog.id, WorkLog.row_number] + [getattr(WorkLog, c) for c in DAILY_WORKLOG_COLUMNS]
+    existing = db.session.execute(
+        select(*columns)
+        .where(
+            WorkLog.employee_id == employee_id,
+            WorkLog.date == work_date,
+            WorkLog.status == 'draft'
+        )
+        .order_by(WorkLog.id)
+    ).all()
+
+    # row_number → 既存行（同じ row_number の重複行は削除対象にする）
+    existing_by_number = {}
+    stale_ids = []
+    for record in existing:
+        if record.row_number is None or record.row_number in existing_by_number:
+            stale_ids.append(record.id)
+        else:
+            existing_by_number[record.row_number] = record
+
+    now = datetime.utcnow()
+    matched_ids = set()
+    changed = []
+    new_rows = []
+    unchanged = 0
+
+    for row in rows:
+        current = existing_by_number.get(row['row_number'])
+        if current is not None and current.id not in matched_ids:
+            matched_ids.add(current.id)
+            if all(getattr(current, c) == row[c] for c in DAILY_WORKLOG_COLUMNS):
+                unchanged += 1
+                continue
+            changed.append(dict(row, id=current.id))
+        else:
+            new_rows.append(dict(row))
+
+    # 新規行のIDはシーケンスから一括採番し、更新行と同じ1文で書き込む
+    if new_rows:
+        new_ids = db.session.execute(
+            text("SELECT nextval('worklogs_id_seq') FROM generate_series(1, :n)"),
+            {'n': len(new_rows)}
+        ).scalars().all()
+        for row, new_id in zip(new_rows, new_ids):
+            row['id'] = new_id
+
+    upsert_rows = changed + new_rows
+    if upsert_rows:
+        values = [
+            dict(
+                row,
+                employee_id=employee_id,
+                date=work_date,
+                status='draft',
+                created_at=now,
+                updated_at=now
+            )
+            for row in upsert_rows
+        ]
+        stmt = insert(WorkLog.__table__).values(values)
+        update_columns = ('row_number',) + DAILY_WORKLOG_COLUMNS + ('updated_at',)
+        stmt = stmt.on_conflict_do_update(
+            # worklogs は日付で月次パーティション化されているため主キーは (id, date)
+            index_elements=[WorkLog.__table__.c.id, WorkLog.__table__.c.date],
+            set_={c: stmt.excluded[c] for c in update_columns},
+            # 申請中などに変わった行は上書きしない
+            where=WorkLog.__table__.c.status == 'draft'
+        )
+        db.session.execute(stmt)
+
+    removed_ids = stale_ids + [
+        record.id for record in existing_by_number.values() if record.id not in matched_ids
+    ]
+    if removed_ids:
+        db.session.execute(
+            delete(WorkLog.__table__).where(
+                WorkLog.__table__.c.id == any_(bindparam('removed_ids', removed_ids, type_=ARRAY(Integer)))
+            )
+        )
+
+    return {
+        'inserted': len(new_rows),
+        'updated': len(changed),
+        'deleted': len(removed_ids),
+        'unchanged': unchanged,
+    }
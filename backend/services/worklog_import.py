@@ -0,0 +1,347 @@
+# services/worklog_import.py - 工数データ一括取り込み（CSV / XLSX → COPY → マージ）
+
+import io
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from models import db
+from services.worklog import (
+    INTEGER_FIELD_MESSAGES, REQUIRED_ROW_FIELDS, get_unit_work_type_map, unit_work_type_error
+)
+
+# 取り込み対象カラム（worklogs のカラム名）
+IMPORT_COLUMNS = (
+    'employee_id', 'date', 'model', 'serial_number', 'work_order', 'part_number',
+    'order_number', 'quantity', 'unit_name', 'work_type', 'minutes', 'remarks', 'status',
+)
+
+# ファイルの見出し → カラム名（CSV出力の日本語見出し・APIのキー名にも対応）
+COLUMN_ALIASES = {
+    '日付': 'date', 'date': 'date', 'workDate': 'date',
+    '社員ID': 'employee_id', 'employee_id': 'employee_id', 'employeeId': 'employee_id',
+    'MODEL': 'model', 'model': 'model',
+    'S/N': 'serial_number', 'serial_number': 'serial_number', 'serialNumber': 'serial_number',
+    '工事番号': 'work_order', 'work_order': 'work_order', 'workOrder': 'work_order',
+    'P/N': 'part_number', 'part_number': 'part_number', 'partNumber': 'part_number',
+    '注文番号': 'order_number', 'order_number': 'order_number', 'orderNumber': 'order_number',
+    '数量': 'quantity', 'quantity': 'quantity',
+    'ユニット名': 'unit_name', 'unit_name': 'unit_name', 'unitName': 'unit_name',
+    '工事区分': 'work_type', 'work_type': 'work_type', 'workType': 'work_type',
+    '工数(分)': 'minutes', 'minutes': 'minutes',
+    '備考': 'remarks', 'remarks': 'remarks',
+    'ステータス': 'status', 'status': 'status',
+}
+
+# 必須カラムとエラーメッセージ（各行の項目は validate_worklog_batch と同じ定義を使う）
+REQUIRED_COLUMNS = {
+    'employee_id': '社員IDは必須です',
+    'date': '作業日付が必要です',
+    **{COLUMN_ALIASES[field]: message for field, message in REQUIRED_ROW_FIELDS},
+}
+
+# 取り込み可能なステータス（未指定の場合は承認済みとして取り込む）
+IMPORT_STATUSES = ('draft', 'approved')
+DEFAULT_IMPORT_STATUS = 'approved'
+
+# 文字列カラムの最大長（worklogs の定義に合わせる）
+STRING_LIMITS = {
+    'employee_id': 10, 'model': 50, 'serial_number': 50, 'work_order': 50,
+    'part_number': 50, 'order_number': 50, 'unit_name': 50, 'work_type': 50,
+}
+
+
+def read_import_file(stream, filename):
+    """CSV / XLSX ファイルを文字列のDataFrameとして読み込む
+
+    Args:
+        stream: ファイルオブジェクト（バイナリ）
+        filename (str): 拡張子の判定に使うファイル名
+
+    Returns:
+        DataFrame: IMPORT_COLUMNS をカラムに持つDataFrame（欠損は空文字）
+    """
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        df = pd.read_excel(stream, dtype=str, keep_default_na=False, engine='openpyxl')
+    elif ext == '.csv':
+        # CSV出力（Excel用BOM付き）もそのまま読めるように utf-8-sig
+        df = pd.read_csv(stream, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    else:
+        raise ValueError('CSVまたはXLSXファイルを指定してください')
+
+    df = df.rename(columns=lambda c: COLUMN_ALIASES.get(str(c).strip(), str(c).strip()))
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"必須カラムがありません: {', '.join(missing)}")
+
+    for column in IMPORT_COLUMNS:
+        if column not in df.columns:
+            df[column] = ''
+    df = df[list(IMPORT_COLUMNS)]
+    return df.apply(lambda s: s.astype(str).str.strip())
+
+
+def validate_worklog_frame(df, unit_work_types=None):
+    """validate_worklog_batch のベクトル化版（全行を一括チェック）
+
+    必須項目・ユニット名と工事区分の組み合わせは日次保存と同じ定義でチェックする。
+
+    Args:
+        df (DataFrame): read_import_file の戻り値
+        unit_work_types (dict, optional): ユニット名→工事区分の対応表
+            省略時はキャッシュ済みの対応表を使う
+
+    Returns:
+        tuple: (正規化済みの有効行DataFrame, エラー一覧)
+            エラーは {'row': ファイル上の行番号, 'message': 内容} のリスト
+    """
+    # ファイル上の行番号（見出し行の次が2行目）
+    line_numbers = np.arange(len(df)) + 2
+    error_masks = []
+
+    def add_error(mask, message):
+        if mask.any():
+            error_masks.append((np.asarray(mask, dtype=bool), message))
+
+    for column, message in REQUIRED_COLUMNS.items():
+        add_error(df[column] == '', message)
+
+    for column, limit in STRING_LIMITS.items():
+        add_error(df[column].str.len() > limit, f'{column}は{limit}文字以内で入力してください')
+
+    # 日付
+    # XLSXの日付セルは "YYYY-MM-DD 00:00:00" として読まれるため先頭10文字で判定
+    dates = pd.to_datetime(
+        df['date'].str.slice(0, 10).str.replace('/', '-', regex=False),
+        format='%Y-%m-%d',
+        errors='coerce'
+    )
+    add_error((df['date'] != '') & dates.isna(), '日付の形式が正しくありません (YYYY-MM-DD)')
+
+    # 工数(分)：正の整数
+    minutes = pd.to_numeric(df['minutes'], errors='coerce')
+    minutes_bad = (df['minutes'] != '') & (minutes.isna() | (minutes % 1 != 0))
+    add_error(minutes_bad, INTEGER_FIELD_MESSAGES['minutes'])
+    add_error(~minutes_bad & (minutes <= 0), '工数(分)は正の整数である必要があります')
+
+    # 数量："N/A" は None、それ以外は0以上の整数（空欄は validate_worklog_batch と同じくエラー）
+    quantity_blank = df['quantity'] == 'N/A'
+    quantity = pd.to_numeric(df['quantity'].where(~quantity_blank), errors='coerce')
+    quantity_bad = ~quantity_blank & (quantity.isna() | (quantity % 1 != 0))
+    add_error(quantity_bad, INTEGER_FIELD_MESSAGES['quantity'])
+    add_error(~quantity_bad & (quantity < 0), '数量は0以上の整数である必要があります')
+
+    # ユニット名と工事区分の組み合わせ（マスタ未登録の環境ではチェックしない）
+    # 組み合わせごとに1回だけ判定する
+    if unit_work_types is None:
+        unit_work_types = get_unit_work_type_map()
+    if unit_work_types:
+        filled = (df['unit_name'] != '') & (df['work_type'] != '')
+        pairs = df.loc[filled, ['unit_name', 'work_type']].drop_duplicates()
+        for unit_name, work_type in pairs.itertuples(index=False):
+            message = unit_work_type_error(unit_work_types, unit_name, work_type)
+            if message:
+                add_error((df['unit_name'] == unit_name) & (df['work_type'] == work_type), message)
+
+    # ステータス
+    status = df['status'].where(df['status'] != '', DEFAULT_IMPORT_STATUS)
+    add_error(~status.isin(IMPORT_STATUSES), f"ステータスは {' / '.join(IMPORT_STATUSES)} のいずれかです")
+
+    invalid = np.zeros(len(df), dtype=bool)
+    errors = []
+    for mask, message in error_masks:
+        invalid |= mask
+        errors.extend({'row': int(n), 'message': message} for n in line_numbers[mask])
+    errors.sort(key=lambda e: e['row'])
+
+    valid = ~invalid
+    normalized = pd.DataFrame({
+        'line_no': line_numbers[valid],
+        'employee_id': df['employee_id'][valid],
+        'date': dates[valid].dt.strftime('%Y-%m-%d'),
+        'model': df['model'][valid],
+        'serial_number': df['serial_number'][valid],
+        'work_order': df['work_order'][valid],
+        'part_number': df['part_number'][valid],
+        'order_number': df['order_number'][valid],
+        'quantity': quantity[valid].astype('Int64'),
+        'unit_name': df['unit_name'][valid],
+        'work_type': df['work_type'][valid],
+        'minutes': minutes[valid].astype('Int64'),
+        'remarks': df['remarks'][valid],
+        'status': status[valid],
+    })
+    return normalized, errors
+
+
+def resolve_employee_ids(df):
+    """社員IDを users テーブルと一括照合する
+
+    Args:
+        df (DataFrame): validate_worklog_frame の有効行
+
+    Returns:
+        tuple: (存在する社員の行だけのDataFrame, エラー一覧)
+    """
+    employee_ids = df['employee_id'].unique().tolist()
+    if not employee_ids:
+        return df, []
+
+    known = set(db.session.execute(
+        text("SELECT employee_id FROM users WHERE employee_id = ANY(:ids)"),
+        {'ids': employee_ids}
+    ).scalars())
+
+    unknown = ~df['employee_id'].isin(known)
+    errors = [
+        {'row': int(n), 'message': f'社員ID {e} のユーザーが見つかりません'}
+        for n, e in zip(df['line_no'][unknown], df['employee_id'][unknown])
+    ]
+    return df[~unknown], errors
+
+
+def copy_and_merge(df):
+    """COPY FROM STDIN でステージングテーブルへ流し込み、worklogs にマージする
+
+    同じ社員・日付・内容の行が既に存在する場合は取り込まない（再実行しても重複しない）。
+    ファイル内で同じ内容の行が重複している場合は、ステージング上で DISTINCT ON により
+    最初の行だけを残す。row_number は社員・日付ごとに既存行の続き番号を振る。
+    マージの前に取り込む期間の月次パーティションを作成する（過去の月の行が
+    デフォルトパーティションに入らないようにする）。commit は呼び出し側で行う。
+
+    Args:
+        df (DataFrame): 取り込み対象の行（resolve_employee_ids の戻り値）
+
+    Returns:
+        int: worklogs に追加した件数
+    """
+    if df.empty:
+        return 0
+
+    connection = db.session.connection()
+    connection.execute(text("""
+        CREATE TEMP TABLE worklog_import_staging (
+            line_no integer,
+            employee_id varchar(10),
+            date date,
+            model varchar(50),
+            serial_number varchar(50),
+            work_order varchar(50),
+            part_number varchar(50),
+            order_number varchar(50),
+            quantity integer,
+            unit_name varchar(50),
+            work_type varchar(50),
+            minutes integer,
+            remarks text,
+            status varchar(20)
+        ) ON COMMIT DROP
+    """))
+
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY worklog_import_staging ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+    # 取り込む期間の月次パーティション（パーティション化のマイグレーション前は何もしない）
+    if connection.execute(text("SELECT to_regprocedure('worklogs_ensure_partitions(date, date)')")).scalar():
+        connection.execute(text("""
+            SELECT partition_name, moved_rows
+            FROM worklogs_ensure_partitions(
+                (SELECT MIN(date) FROM worklog_import_staging),
+                (SELECT MAX(date) FROM worklog_import_staging)
+            )
+        """)).all()
+
+    result = connection.execute(text("""
+        WITH deduped AS (
+            SELECT DISTINCT ON (
+                employee_id, date, model, serial_number, work_order, part_number,
+                order_number, quantity, unit_name, work_type, minutes
+            ) *
+            FROM worklog_import_staging
+            ORDER BY
+                employee_id, date, model, serial_number, work_order, part_number,
+                order_number, quantity, unit_name, work_type, minutes, line_no
+        )
+        INSERT INTO worklogs (
+            employee_id, row_number, date, model, serial_number, work_order, part_number,
+            order_number, quantity, unit_name, work_type, minutes, remarks, status,
+            created_at, updated_at
+        )
+        SELECT
+            s.employee_id,
+            COALESCE(m.max_row_number, 0)
+                + ROW_NUMBER() OVER (PARTITION BY s.employee_id, s.date ORDER BY s.line_no),
+            s.date, s.model, s.serial_number, s.work_order, s.part_number,
+            s.order_number, s.quantity, s.unit_name, s.work_type, s.minutes,
+            NULLIF(s.remarks, ''), s.status,
+            :now, :now
+        FROM deduped s
+        LEFT JOIN (
+            SELECT w.employee_id, w.date, MAX(w.row_number) AS max_row_number
+            FROM worklogs w
+            JOIN (SELECT DISTINCT employee_id, date FROM worklog_import_staging) d
+              ON d.employee_id = w.employee_id AND d.date = w.date
+            GROUP BY w.employee_id, w.date
+        ) m ON m.employee_id = s.employee_id AND m.date = s.date
+        WHERE NOT EXISTS (
+            SELECT 1 FROM worklogs w
+            WHERE w.employee_id = s.employee_id
+              AND w.date = s.date
+              AND w.model IS NOT DISTINCT FROM s.model
+              AND w.serial_number IS NOT DISTINCT FROM s.serial_number
+              AND w.work_order IS NOT DISTINCT FROM s.work_order
+              AND w.part_number IS NOT DISTINCT FROM s.part_number
+              AND w.order_number IS NOT DISTINCT FROM s.order_number
+              AND w.quantity IS NOT DISTINCT FROM s.quantity
+              AND w.unit_name = s.unit_name
+              AND w.work_type = s.work_type
+              AND w.minutes = s.minutes
+        )
+    """), {'now': datetime.utcnow()})
+    return result.rowcount
+
+
+def import_worklogs(stream, filename, dry_run=False):
+    """工数データファイルを検証して取り込む
+
+    不正な行はエラーとして記録し、残りの行はそのまま取り込む。
+
+    Args:
+        stream: ファイルオブジェクト（バイナリ）
+        filename (str): ファイル名
+        dry_run (bool): Trueの場合は検証のみ行い書き込まない
+
+    Returns:
+        dict: total / valid / inserted / skipped / errors
+    """
+    df = read_import_file(stream, filename)
+    valid_df, errors = validate_worklog_frame(df)
+    valid_df, employee_errors = resolve_employee_ids(valid_df)
+    errors = sorted(errors + employee_errors, key=lambda e: e['row'])
+
+    inserted = 0
+    if not dry_run:
+        inserted = copy_and_merge(valid_df)
+        db.session.commit()
+
+    return {
+        'total': len(df),
+        'valid': len(valid_df),
+        'inserted': inserted,
+        'skipped': 0 if dry_run else len(valid_df) - inserted,
+        'errors': errors,
+    }
@@ -0,0 +1,210 @@
+# services/worklog_partition.py - 工数テーブルの月次パーティション管理とアーカイブ
+#
+# アーカイブ済みの月は読み取り専用で、ビュー worklogs_with_archive（WorkLogWithArchive）からのみ読める。
+# 一覧（/admin_worklog・/worklog_history）は worklog_read_source で読み先を切り替えるが、
+# 承認・却下・編集申請・下書きの差分保存など WorkLog を直接読み書きする処理は稼働中の月だけが対象
+# （アーカイブ済みの工数IDを指定した場合は見つからない扱いになる）。
+
+import re
+import time
+from datetime import date
+
+from flask import current_app
+from sqlalchemy import text
+
+from models import db, WorkLog, WorkLogWithArchive
+
+# 月次パーティション名（worklogs_pYYYYMM）
+PARTITION_NAME_PATTERN = re.compile(r'^worklogs_p(\d{4})(\d{2})$')
+
+# アーカイブ時に圧縮設定を行う長文カラム
+ARCHIVE_TEXT_COLUMNS = ('remarks', 'edit_reason')
+
+# アーカイブの境界日のキャッシュ（アーカイブは CLI で月1回程度しか行わないため有効期限付きで保持する）
+# ほかのワーカーでは最大 ARCHIVE_BOUNDARY_CACHE_TTL 秒、アーカイブ前の境界日を使う
+# （その間にアーカイブされた月を日付指定で読むと、include_archive=true を付けない限り空になる）
+ARCHIVE_BOUNDARY_CACHE_TTL = 300  # 秒
+_archive_boundary_cache = {'boundary': None, 'loaded_at': None}
+
+
+def _add_months(month_start, months):
+    """月初日に月数を加算した月初日を返す"""
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_month(name):
+    """パーティション名から対象月の月初日を返す（月次パーティションでなければNone）"""
+    match = PARTITION_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def _list_partitions(parent):
+    """親テーブルに接続されている月次パーティションを (名前, 月初日) の昇順で返す"""
+    if db.session.execute(text("SELECT to_regclass(:parent)"), {'parent': parent}).scalar() is None:
+        return []
+
+    names = db.session.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:parent AS regclass)
+    """), {'parent': parent}).scalars()
+
+    partitions = [(name, _partition_month(name)) for name in names]
+    return sorted((p for p in partitions if p[1]), key=lambda p: p[1])
+
+
+def ensure_worklog_partitions(months_ahead=None):
+    """当月から指定月数先までと、デフォルトパーティションに行がある月の月次パーティションを作成する
+
+    デフォルトパーティション（worklogs_default）に同じ月の行があれば、その行を新しい
+    パーティションへ移してから接続する（アーカイブ済みの月の行はアーカイブへ移す）。
+    作成・移動に失敗した場合は例外をそのまま送出する。
+
+    Args:
+        months_ahead (int, optional): 先行作成する月数（省略時は設定値）
+
+    Returns:
+        list: 作成・移動したパーティションの (パーティション名, 移動した行数)
+    """
+    if months_ahead is None:
+        months_ahead = current_app.config.get('WORKLOG_PARTITION_MONTHS_AHEAD', 3)
+
+    # パーティション化のマイグレーション前は何もしない
+    exists = db.session.execute(
+        text("SELECT to_regprocedure('worklogs_ensure_partitions(date, date)')")
+    ).scalar()
+    if exists is None:
+        return []
+
+    this_month = date.today().replace(day=1)
+    ranges = [(this_month, _add_months(this_month, months_ahead))]
+    # 先行作成の範囲外（過去の月・先の月）でデフォルトパーティションに入った行
+    default_months = db.session.execute(text("""
+        SELECT DISTINCT CAST(date_trunc('month', date) AS date) FROM worklogs_default
+    """)).scalars()
+    ranges.extend((month, month) for month in default_months)
+
+    results = []
+    try:
+        for from_date, to_date in ranges:
+            results.extend(db.session.execute(
+                text("SELECT partition_name, moved_rows FROM worklogs_ensure_partitions(:from_date, :to_date)"),
+                {'from_date': from_date, 'to_date': to_date}
+            ).all())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return [(name, moved) for name, moved in results]
+
+
+def archive_worklog_partitions(older_than_years=None, dry_run=False):
+    """指定年数より古い月のパーティションをアーカイブスキーマへ移す
+
+    圧縮設定（TOAST の lz4 圧縮・インライン上限の引き下げ）をした新しいテーブルへ
+    行をコピーしてから worklog_archive.worklogs に接続し、稼働側のパーティションは
+    切り離して削除する。1か月ずつ別トランザクションで処理するため途中で失敗しても
+    処理済みの月はそのまま残る。アーカイブ後もビュー worklogs_with_archive から読める。
+
+    Args:
+        older_than_years (int, optional): この年数より古い月を対象にする（省略時は設定値）
+        dry_run (bool): Trueの場合は対象の一覧だけ返す
+
+    Returns:
+        list: アーカイブした（dry_run の場合は対象の）パーティション名
+    """
+    if older_than_years is None:
+        older_than_years = current_app.config.get('WORKLOG_ARCHIVE_YEARS', 3)
+
+    this_month = date.today().replace(day=1)
+    cutoff = _add_months(this_month, -12 * older_than_years)
+
+    targets = [
+        (name, month) for name, month in _list_partitions('public.worklogs')
+        if _add_months(month, 1) <= cutoff
+    ]
+    if dry_run:
+        return [name for name, _ in targets]
+
+    # lz4 は PostgreSQL 14 以降のみ
+    server_version = db.session.execute(text("SHOW server_version_num")).scalar()
+    use_lz4 = int(server_version) >= 140000
+
+    archived = []
+    for name, month in targets:
+        month_end = _add_months(month, 1)
+        try:
+            db.session.execute(text(
+                f"CREATE TABLE worklog_archive.{name} (LIKE worklog_archive.worklogs) "
+                f"WITH (toast_tuple_target = 128, fillfactor = 100)"
+            ))
+            if use_lz4:
+                for column in ARCHIVE_TEXT_COLUMNS:
+                    db.session.execute(text(
+                        f"ALTER TABLE worklog_archive.{name} ALTER COLUMN {column} SET COMPRESSION lz4"
+                    ))
+
+            # コピー時に新しい圧縮設定で書き直される
+            db.session.execute(text(f"INSERT INTO worklog_archive.{name} SELECT * FROM public.{name}"))
+            db.session.execute(text(
+                f"ALTER TABLE worklog_archive.worklogs ATTACH PARTITION worklog_archive.{name} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{month_end.isoformat()}')"
+            ))
+            db.session.execute(text(f"ALTER TABLE public.worklogs DETACH PARTITION public.{name}"))
+            db.session.execute(text(f"DROP TABLE public.{name}"))
+            db.session.commit()
+            archived.append(name)
+            invalidate_worklog_archive_boundary()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"パーティションのアーカイブに失敗しました ({name}): {str(e)}")
+            raise
+
+    return archived
+
+
+def get_worklog_archive_boundary():
+    """アーカイブ済みデータの境界日を返す（キャッシュ付き）
+
+    Returns:
+        date: この日付より前の工数はアーカイブにある（アーカイブが無ければNone）
+    """
+    now = time.monotonic()
+    loaded_at = _archive_boundary_cache['loaded_at']
+    if loaded_at is not None and now - loaded_at < ARCHIVE_BOUNDARY_CACHE_TTL:
+        return _archive_boundary_cache['boundary']
+
+    partitions = _list_partitions('worklog_archive.worklogs')
+    boundary = _add_months(partitions[-1][1], 1) if partitions else None
+
+    _archive_boundary_cache['boundary'] = boundary
+    _archive_boundary_cache['loaded_at'] = now
+    return boundary
+
+
+def invalidate_worklog_archive_boundary():
+    """アーカイブの境界日のキャッシュを破棄する"""
+    _archive_boundary_cache['loaded_at'] = None
+
+
+def worklog_read_source(start_date=None, include_archive=False):
+    """工数の一覧を読むモデルを返す
+
+    開始日がアーカイブの境界日より前の場合、または include_archive の場合は
+    アーカイブを含むビューから読む（開始日の指定が無い場合は稼働中の月のみ）。
+
+    Args:
+        start_date (date, optional): 絞り込みの開始日
+        include_archive (bool): アーカイブを必ず含める
+
+    Returns:
+        WorkLog または WorkLogWithArchive
+    """
+    if not include_archive and start_date is not None:
+        boundary = get_worklog_archive_boundary()
+        include_archive = bool(boundary and start_date < boundary)
+    return WorkLogWithArchive if include_archive else WorkLog
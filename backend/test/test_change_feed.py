@@ -0,0 +1,236 @@
+"""変更通知（services/change_feed.py）のテスト
+
+トリガーが送る変更レコード（NOTIFY のペイロード）を WorklogDispatcher・chat_updates に渡し、
+送信するイベント名・送信先・内容を確認する。受信していない間のコミット後の送信
+（ORM のフラッシュから作る変更レコード）は SQLite のメモリ上のデータベースで確認する。
+"""
+
+import json
+from datetime import date
+
+import pytest
+from flask import Flask, g
+from sqlalchemy.pool import StaticPool
+
+from models import db, ChatMessage, ChatPermission, User, WorkLog
+from services.change_feed import WorklogDispatcher, chat_updates, init_change_feed
+from utils.instrumentation import RequestStats
+
+UNIT = 'UNIT-A'
+
+
+def notify_payload(op, status, old_status=None, row_id=501, employee_id='100', original_id=None):
+    """worklogs_change_notify と同じ形のペイロードを読み込んだ変更レコード"""
+    return json.loads(json.dumps({
+        'op': op, 'id': row_id, 'employee_id': employee_id, 'unit_name': UNIT,
+        'original_id': original_id, 'old_status': old_status, 'status': status,
+    }))
+
+
+class Recorder:
+    """emit / connected の代わりに送信内容を記録する"""
+
+    def __init__(self, connected_ids):
+        self.connected_ids = set(connected_ids)
+        self.emits = []
+
+    def emit(self, event, data, user_id):
+        self.emits.append((event, data, user_id))
+
+    def connected(self, user_id):
+        return user_id in self.connected_ids
+
+
+def dispatcher_with(recorder):
+    """ユーザー・管理者・未処理件数を読み込み済みの WorklogDispatcher（データベースを使わない）"""
+    dispatcher = WorklogDispatcher(recorder.emit, recorder.connected)
+    dispatcher.users = {'100': User(id=1, employee_id='100', name='申請者', role_level=1)}
+    dispatcher.admins = [
+        User(id=10, employee_id='900', name='管理者A', role_level=2, default_unit=UNIT),
+        User(id=11, employee_id='901', name='管理者B', role_level=2, default_unit=None),
+        User(id=12, employee_id='902', name='管理者C', role_level=2, default_unit='UNIT-B'),
+    ]
+    dispatcher.pending_counts = {UNIT: 3, None: 7, 'UNIT-B': 0}
+    return dispatcher
+
+
+def test_add_request_notifies_connected_admins_of_the_unit():
+    recorder = Recorder(connected_ids={10, 12})
+    dispatcher_with(recorder).dispatch(notify_payload('INSERT', 'pending_add'))
+
+    # 管理者B は未接続、管理者C は別のユニット
+    assert recorder.emits == [('worklog_request_added_with_data', {
+        'unit_name': UNIT, 'type': 'add', 'user_id': 10, 'pending_count': 3,
+        'employee_name': '申請者', 'message': '申請者さんが追加申請しました',
+    }, 10)]
+
+
+def test_admins_without_default_unit_receive_every_unit():
+    recorder = Recorder(connected_ids={10, 11})
+    dispatcher_with(recorder).dispatch(notify_payload('UPDATE', 'pending_delete', old_status='approved'))
+
+    assert [(event, data['type'], data['pending_count'], room) for event, data, room in recorder.emits] == [
+        ('worklog_request_added_with_data', 'delete', 3, 10),
+        ('worklog_request_added_with_data', 'delete', 7, 11),
+    ]
+
+
+def test_edited_copy_is_notified_only_when_inserted():
+    recorder = Recorder(connected_ids={10})
+    dispatcher = dispatcher_with(recorder)
+    dispatcher.dispatch(notify_payload('INSERT', 'pending_edit', row_id=502, original_id=501))
+    # 編集後の行の承認・削除は編集元の行の変化で通知する
+    dispatcher.dispatch(notify_payload('UPDATE', 'approved', old_status='pending_edit', row_id=502, original_id=501))
+    dispatcher.dispatch(notify_payload('DELETE', None, old_status='pending_edit', row_id=502, original_id=501))
+
+    assert [(event, data['type'], data['message']) for event, data, _ in recorder.emits] == [
+        ('worklog_request_added_with_data', 'edit', '申請者さんが編集申請しました'),
+    ]
+
+
+def test_cancelled_request_uses_the_cancel_message():
+    recorder = Recorder(connected_ids={10})
+    dispatcher_with(recorder).dispatch(notify_payload('DELETE', None, old_status='pending_add'))
+
+    assert [(data['type'], data['message']) for _, data, _ in recorder.emits] == [
+        ('cancel', '申請者さんが申請を取り消しました'),
+    ]
+
+
+def test_approval_notifies_the_applicant():
+    recorder = Recorder(connected_ids={1})
+    dispatcher = dispatcher_with(recorder)
+    dispatcher.dispatch(notify_payload('UPDATE', 'approved', old_status='pending_add'))
+    dispatcher.dispatch(notify_payload('DELETE', None, old_status='pending_delete', row_id=503))
+
+    assert recorder.emits == [
+        ('worklog_approved_with_data', {'type': 'add', 'worklog_id': 501, 'message': '追加申請が承認されました'}, 1),
+        ('worklog_approved_with_data', {'type': 'delete', 'worklog_id': 503, 'message': '削除申請が承認されました'}, 1),
+    ]
+
+
+def test_nothing_is_sent_to_disconnected_users():
+    recorder = Recorder(connected_ids=set())
+    dispatcher = dispatcher_with(recorder)
+    dispatcher.dispatch(notify_payload('INSERT', 'pending_add'))
+    dispatcher.dispatch(notify_payload('UPDATE', 'approved', old_status='pending_add'))
+    # 却下理由・却下件数も取得しない（データベースを使わずに終わる）
+    dispatcher.dispatch(notify_payload('UPDATE', 'rejected_add', old_status='pending_add'))
+
+    assert recorder.emits == []
+
+
+def test_chat_updates_targets_each_conversation_once():
+    changes = [
+        {'op': 'INSERT', 'sender_id': 1, 'receiver_id': 2},
+        {'op': 'INSERT', 'sender_id': 1, 'receiver_id': 2},
+        {'op': 'UPDATE', 'sender_id': 1, 'receiver_id': 3},
+        {'op': 'READ', 'sender_id': 4, 'receiver_id': 1},
+        {'op': 'DELETE', 'sender_id': 2, 'receiver_id': 1},
+    ]
+    # (履歴を送り直すユーザー, 相手)
+    assert chat_updates(changes) == [(2, 1), (3, 1), (1, 3), (4, 1), (1, 2)]
+
+
+class FakeSocketIO:
+    """送信を記録し、バックグラウンドタスクをその場で実行する Socket.IO の代わり"""
+
+    def __init__(self, connected_ids):
+        self.emits = []
+        self.server = type('Server', (), {})()
+        self.server.manager = type('Manager', (), {})()
+        self.server.manager.rooms = {'/': {str(user_id): {'sid'} for user_id in connected_ids}}
+
+    def emit(self, event, data, room=None, ignore_queue=False):
+        self.emits.append((event, data, room))
+
+    def start_background_task(self, target, *args):
+        target(*args)
+
+
+@pytest.fixture
+def feed_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    # 送信用のアプリコンテキストからも同じメモリ上のデータベースを使う
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}
+    }
+    app.config['CHANGE_FEED_ENABLED'] = False
+    db.init_app(app)
+    socketio = FakeSocketIO(connected_ids={1, 10})
+    init_change_feed(app, socketio)
+
+    with app.app_context():
+        db.metadata.create_all(
+            db.engine, tables=[User.__table__, WorkLog.__table__, ChatPermission.__table__, ChatMessage.__table__]
+        )
+        db.session.add_all([
+            User(id=1, employee_id='100', name='申請者', department_name='製造', position='一般',
+                 password_hash='x', role_level=1),
+            User(id=10, employee_id='900', name='管理者A', department_name='製造', position='課長',
+                 password_hash='x', role_level=2, default_unit=UNIT),
+        ])
+        db.session.commit()
+
+        yield app, socketio
+
+        db.session.remove()
+        db.engine.dispose()
+
+
+def add_worklog(status):
+    worklog = WorkLog(
+        employee_id='100', date=date(2025, 7, 1), unit_name=UNIT, work_type='組立', minutes=30, status=status
+    )
+    db.session.add(worklog)
+    return worklog
+
+
+def test_committed_orm_changes_are_sent_after_commit(feed_app):
+    app, socketio = feed_app
+
+    with app.test_request_context('/worklog'):
+        g.request_stats = RequestStats()
+        worklog = add_worklog('pending_add')
+        db.session.commit()
+        # 送信は別のグリーンスレッドで行うため、リクエストには変更レコード数を記録する
+        assert g.request_stats.feed_changes == 1
+
+    assert socketio.emits == [('worklog_request_added_with_data', {
+        'unit_name': UNIT, 'type': 'add', 'user_id': 10,
+        'pending_count': {'total': 1, 'pending_add': 1, 'pending_edit': 0, 'pending_delete': 0},
+        'employee_name': '申請者', 'message': '申請者さんが追加申請しました',
+    }, '10')]
+
+    socketio.emits.clear()
+    # 期限切れの属性（コミット後）に代入しても変更前のステータスが分かる
+    worklog = db.session.get(WorkLog, worklog.id)
+    worklog.status = 'approved'
+    db.session.commit()
+
+    assert socketio.emits == [('worklog_approved_with_data', {
+        'type': 'add', 'worklog_id': worklog.id, 'message': '追加申請が承認されました'
+    }, '1')]
+
+
+def test_rolled_back_changes_are_not_sent(feed_app):
+    app, socketio = feed_app
+
+    add_worklog('pending_add')
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+
+    assert socketio.emits == []
+
+
+def test_changes_outside_notify_statuses_are_ignored(feed_app):
+    app, socketio = feed_app
+
+    add_worklog('draft')
+    db.session.flush()
+    assert 'change_feed' not in db.session.info
+    db.session.commit()
+
+    assert socketio.emits == []
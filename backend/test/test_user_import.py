@@ -0,0 +1,124 @@
+"""ユーザーの一括登録（services/user_import.py）のテスト
+
+行の検証はデータベースなしで、登録結果のレポート（登録・スキップ・エラー）は
+SQLite のメモリ上のデータベースで確認する。
+"""
+
+import io
+
+import pytest
+from flask import Flask
+
+from models import db, User
+from services.user_import import (
+    MAX_IMPORT_USERS, import_users, normalize_rows, read_user_file, validate_user_row
+)
+
+
+def user_row(employee_id, **overrides):
+    row = {'社員ID': employee_id, '氏名': '山田', '部署': '製造一課', '役職': '一般', 'パスワード': 'secret-1'}
+    row.update(overrides)
+    return row
+
+
+def test_csv_headers_and_json_keys_are_normalized():
+    data = '\ufeff社員ID,氏名,部署,役職,パスワード,備考\n 1001 ,山田,製造一課,一般,pw,無視する列\n'.encode('utf-8')
+    rows = read_user_file(io.BytesIO(data), 'users.csv')
+
+    assert normalize_rows(rows) == [{
+        'employee_id': '1001', 'name': '山田', 'department_name': '製造一課', 'position': '一般', 'password': 'pw',
+    }]
+    assert normalize_rows([{'employeeId': 1002, 'departmentName': '開発', 'roleLevel': None}]) == [
+        {'employee_id': '1002', 'department_name': '開発', 'role_level': ''}
+    ]
+
+
+def test_non_csv_files_and_non_object_rows_are_rejected():
+    with pytest.raises(ValueError, match='CSVファイルを指定してください'):
+        read_user_file(io.BytesIO(b''), 'users.xlsx')
+    with pytest.raises(ValueError, match='オブジェクトの配列'):
+        normalize_rows(['1001'])
+
+
+@pytest.mark.parametrize('overrides, message', [
+    ({'氏名': ''}, 'nameは必須です'),
+    ({'パスワード': '  '}, 'passwordは必須です'),
+    ({'部署': 'x' * 51}, 'department_nameは50文字以内で入力してください'),
+    ({'権限': '5'}, 'role_levelは 1 / 2 / 3 / 4 のいずれかです'),
+    ({'権限': 'admin'}, 'role_levelは 1 / 2 / 3 / 4 のいずれかです'),
+])
+def test_invalid_rows(overrides, message):
+    values = normalize_rows([user_row('1001', **overrides)])[0]
+    assert validate_user_row(values, set()) == message
+
+
+def test_missing_employee_id_is_reported_before_other_fields():
+    values = normalize_rows([{'氏名': ''}])[0]
+    assert validate_user_row(values, set()) == 'employee_idは必須です'
+
+
+def test_duplicate_employee_id_in_the_file():
+    values = normalize_rows([user_row('1001')])[0]
+    assert validate_user_row(values, set()) is None
+    assert validate_user_row(values, {'1001'}) == '社員ID 1001 がファイル内で重複しています'
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=[User.__table__])
+        db.session.add(User(
+            employee_id='1000', name='既存', department_name='製造一課', position='一般', password_hash='x'
+        ))
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_report_lists_created_skipped_and_error_rows(app):
+    report = import_users([
+        user_row('1001'),
+        user_row('1000'),                 # 既存の社員ID
+        user_row('1002', 役職=''),         # 必須項目なし
+        user_row('1001', 氏名='佐藤'),      # ファイル内で重複
+        user_row('1003', 権限='2', メールアドレス='sato@example.com'),
+    ], first_row=2)
+
+    assert {key: report[key] for key in ('total', 'created', 'skipped', 'error_count')} == {
+        'total': 5, 'created': 2, 'skipped': 1, 'error_count': 2,
+    }
+    results = [(r['row'], r['employee_id'], r['status'], r.get('message')) for r in report['results']]
+    assert results == [
+        (2, '1001', 'created', None),
+        (3, '1000', 'skipped', 'この社員IDは既に使用されています'),
+        (4, '1002', 'error', 'positionは必須です'),
+        (5, '1001', 'error', '社員ID 1001 がファイル内で重複しています'),
+        (6, '1003', 'created', None),
+    ]
+
+    created = {user.employee_id: user for user in User.query.filter(User.employee_id.in_(['1001', '1003']))}
+    assert {r['id'] for r in report['results'] if r['status'] == 'created'} == {u.id for u in created.values()}
+    assert created['1001'].name == '山田'
+    assert created['1003'].role_level == 2
+    assert created['1003'].email == 'sato@example.com'
+    assert created['1001'].password_hash != 'secret-1'
+
+
+def test_dry_run_validates_without_writing(app):
+    report = import_users([user_row('1001'), user_row('1000')], dry_run=True)
+
+    assert [r['status'] for r in report['results']] == ['valid', 'skipped']
+    assert (report['created'], report['skipped'], report['error_count']) == (0, 1, 0)
+    assert User.query.filter_by(employee_id='1001').first() is None
+
+
+def test_too_many_rows_are_rejected(app):
+    with pytest.raises(ValueError, match=f'{MAX_IMPORT_USERS}件まで'):
+        import_users([user_row(str(n)) for n in range(MAX_IMPORT_USERS + 1)], dry_run=True)
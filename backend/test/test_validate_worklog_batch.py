@@ -0,0 +1,110 @@
+"""validate_worklog_batch（工数入力データの一括検証）のテスト
+
+ユニット名と工事区分の対応表を引数で渡すため、データベースなしで実行できる。
+"""
+
+from datetime import date
+
+from services.worklog import INTEGER_FIELD_MESSAGES, validate_worklog_batch
+
+UNIT_WORK_TYPES = {'UNIT': frozenset({'組立', '調整'}), 'EMPTY-UNIT': frozenset()}
+
+
+def work_row(**overrides):
+    row = {
+        'id': '1', 'model': 'M-100', 'serialNumber': 'S-1', 'workOrder': 'W-1', 'partNumber': 'P-1',
+        'orderNumber': 'O-1', 'quantity': '2', 'unitName': 'UNIT', 'workType': '組立',
+        'minutes': '30', 'remarks': '',
+    }
+    row.update(overrides)
+    return row
+
+
+def validate(*rows, unit_work_types=UNIT_WORK_TYPES):
+    return validate_worklog_batch({'workDate': '2025-07-01', 'workRows': list(rows)}, unit_work_types=unit_work_types)
+
+
+def test_valid_rows_are_converted():
+    result = validate(work_row(), work_row(id='2', quantity='0', minutes='45'))
+
+    assert result['valid'] is True
+    assert result['errors'] == []
+    assert result['work_date'] == date(2025, 7, 1)
+    assert [(row['row_number'], row['quantity'], row['minutes']) for row in result['rows']] == [(1, 2, 30), (2, 0, 45)]
+
+
+def test_errors_of_several_rows_are_reported_together():
+    result = validate(
+        work_row(model=''),
+        work_row(id='2'),
+        work_row(id='3', serialNumber='', minutes='abc'),
+        work_row(id='4', quantity='-1'),
+    )
+
+    assert result['valid'] is False
+    assert result['errors'] == [
+        {'row': 1, 'message': '行 1: MODELは必須です'},
+        {'row': 3, 'message': '行 3: 製造番号は必須です'},
+        {'row': 3, 'message': f"行 3: {INTEGER_FIELD_MESSAGES['minutes']}"},
+        {'row': 4, 'message': '行 4: 数量は0以上の整数である必要があります'},
+    ]
+    # message は最初のエラー、rows はエラーの無い行だけ
+    assert result['message'] == '行 1: MODELは必須です'
+    assert [row['row_number'] for row in result['rows']] == [2]
+
+
+def test_quantity_na_is_saved_as_none():
+    result = validate(work_row(quantity='N/A'))
+
+    assert result['valid'] is True
+    assert result['rows'][0]['quantity'] is None
+
+
+def test_blank_or_non_integer_quantity_is_rejected():
+    result = validate(work_row(quantity=''), work_row(id='2', quantity='1.5'), work_row(id='3', quantity='n/a'))
+
+    assert result['errors'] == [
+        {'row': i, 'message': f"行 {i}: {INTEGER_FIELD_MESSAGES['quantity']}"} for i in (1, 2, 3)
+    ]
+
+
+def test_zero_and_negative_minutes_are_rejected():
+    result = validate(work_row(minutes='0'), work_row(id='2', minutes='-15'))
+
+    assert result['errors'] == [
+        {'row': 1, 'message': '行 1: 工数(分)は正の整数である必要があります'},
+        {'row': 2, 'message': '行 2: 工数(分)は正の整数である必要があります'},
+    ]
+
+
+def test_unknown_unit_and_work_type_pairs_are_rejected():
+    result = validate(
+        work_row(unitName='OTHER'),
+        work_row(id='2', workType='検査'),
+        work_row(id='3', unitName='EMPTY-UNIT'),
+    )
+
+    assert result['errors'] == [
+        {'row': 1, 'message': '行 1: ユニット名「OTHER」は登録されていません'},
+        {'row': 2, 'message': '行 2: 工事区分「検査」はユニット「UNIT」に登録されていません'},
+        {'row': 3, 'message': '行 3: 工事区分「組立」はユニット「EMPTY-UNIT」に登録されていません'},
+    ]
+
+
+def test_empty_map_skips_the_pair_check():
+    # マスタ未登録の環境（対応表が空）では組み合わせを確認しない
+    result = validate(work_row(unitName='OTHER', workType='検査'), unit_work_types={})
+
+    assert result['valid'] is True
+    assert result['rows'][0]['unit_name'] == 'OTHER'
+
+
+def test_request_level_errors_stop_before_the_rows():
+    assert validate_worklog_batch({}, unit_work_types={})['message'] == 'データが提供されていません'
+    assert validate_worklog_batch({'workRows': []}, unit_work_types={})['message'] == '作業日付が必要です'
+    assert validate_worklog_batch(
+        {'workDate': '07/01/2025', 'workRows': [work_row()]}, unit_work_types={}
+    )['message'] == '日付の形式が正しくありません'
+    assert validate_worklog_batch(
+        {'workDate': '2025-07-01', 'workRows': ['not a row']}, unit_work_types={}
+    )['errors'] == [{'row': 1, 'message': '行 1: 行データの形式が正しくありません'}]
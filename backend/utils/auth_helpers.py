@@ -1,7 +1,21 @@
 from functools import wraps
 from flask import jsonify
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from models import User
+from models import db, User
+
+
+def load_current_user():
+    """JWT のユーザーを取得する（見つからない場合は None）
+
+    JWT の identity は文字列のため、主キーの型にそろえて Session.get で引く。
+    同じDBセッションで読み込み済みのユーザーは identity map から返る（/api/batch のサブリクエストなど）。
+    """
+    identity = get_jwt_identity()
+    try:
+        return db.session.get(User, int(identity))
+    except (TypeError, ValueError):
+        return None
+
 
 def admin_required(fn):
     """管理者権限を要求するデコレーター
@@ -15,8 +29,7 @@ def admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = load_current_user()
         
         if not user or user.role_level < 3:  # 最高権限(3)のみアクセス可能
             return jsonify(msg="Admin privileges required"), 403
@@ -36,8 +49,7 @@ def role_required(min_level):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
+            user = load_current_user()
             
             if not user or user.role_level < min_level:
                 return jsonify(msg=f"Minimum role level {min_level} required"), 403
@@ -0,0 +1,144 @@
+# utils/compression.py - レスポンス圧縮（gzip / brotli）
+
+import gzip
+import zlib
+
+from flask import request
+
+# brotli は任意（未インストールの場合は gzip のみ）
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 圧縮対象のMIMEタイプ
+DEFAULT_COMPRESS_MIMETYPES = (
+    'application/json',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'application/javascript',
+)
+
+
+def _supported_encodings(app):
+    """設定とインストール状況から利用できるエンコーディングを優先順で返す"""
+    encodings = []
+    for encoding in app.config['COMPRESS_ALGORITHMS']:
+        if encoding == 'br' and brotli is None:
+            continue
+        if encoding in ('br', 'gzip'):
+            encodings.append(encoding)
+    return encodings
+
+
+def choose_encoding(accept_encodings, supported):
+    """Accept-Encoding の品質値が最も高いエンコーディングを選ぶ（同値は supported の順）
+
+    Args:
+        accept_encodings: werkzeug の Accept オブジェクト（request.accept_encodings）
+        supported (list): サーバー側で利用できるエンコーディング（優先順）
+
+    Returns:
+        str: 選ばれたエンコーディング（圧縮しない場合はNone）
+    """
+    best, best_quality = None, 0
+    for encoding in supported:
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_bytes(data, encoding, level):
+    """バイト列を一括で圧縮する"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_stream(chunks, encoding, level):
+    """ストリーミングレスポンスをチャンクごとに圧縮する
+
+    チャンク単位で flush するため、クライアントには逐次届く。
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        # wbits=31 で gzip ヘッダー付き
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def init_compression(app):
+    """レスポンス圧縮を after_request フックとして登録する
+
+    設定:
+        COMPRESS_ENABLED: 圧縮の有効/無効
+        COMPRESS_MIN_SIZE: これより小さいレスポンスは圧縮しない（バイト）
+        COMPRESS_ALGORITHMS: 利用するエンコーディング（優先順）
+        COMPRESS_GZIP_LEVEL / COMPRESS_BROTLI_LEVEL: 圧縮レベル
+        COMPRESS_MIMETYPES: 圧縮対象のMIMEタイプ
+    """
+    app.config.setdefault('COMPRESS_ENABLED', True)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.config.setdefault('COMPRESS_ALGORITHMS', ('br', 'gzip'))
+    app.config.setdefault('COMPRESS_GZIP_LEVEL', 6)
+    app.config.setdefault('COMPRESS_BROTLI_LEVEL', 4)
+    app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_COMPRESS_MIMETYPES)
+
+    supported = _supported_encodings(app)
+
+    @app.after_request
+    def compress_response(response):
+        if not app.config['COMPRESS_ENABLED'] or not supported:
+            return response
+
+        # 圧縮できない・すべきでないレスポンスはそのまま返す
+        if (response.status_code < 200
+                or response.status_code in (204, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in app.config['COMPRESS_MIMETYPES']
+                or request.method == 'HEAD'):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        encoding = choose_encoding(request.accept_encodings, supported)
+        if encoding is None:
+            return response
+
+        level = app.config['COMPRESS_BROTLI_LEVEL'] if encoding == 'br' else app.config['COMPRESS_GZIP_LEVEL']
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < app.config['COMPRESS_MIN_SIZE']:
+                return response
+            response.set_data(compress_bytes(data, encoding, level))
+
+        response.headers['Content-Encoding'] = encoding
+
+        # 圧縮後は内容が変わるため強いETagは弱いETagにする
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        return response
@@ -0,0 +1,17 @@
+# utils/http_cache.py - 一覧レスポンスの条件付きGET（ETag）
+#
+# 同じ一覧を繰り返し取得する画面向けに、レスポンス本文のハッシュを ETag として付ける。
+# ブラウザが If-None-Match で送ってきた ETag と一致すれば本文なしの 304 を返す。
+# （圧縮時は utils/compression.py が弱い ETag に変えるが、If-None-Match は弱い比較で判定する）
+
+from flask import jsonify, request
+
+
+def conditional_json(payload):
+    """JSON レスポンスに ETag を付け、変わっていなければ 304 にする"""
+    response = jsonify(payload)
+    response.add_etag()
+    # ブラウザにはキャッシュさせるが、使う前に毎回 ETag で確認させる
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
@@ -0,0 +1,169 @@
+# utils/instrumentation.py - リクエストごとの処理時間・SQL・Socket送信の計測
+
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ログに出すSQL文の最大文字数
+STATEMENT_LOG_LENGTH = 500
+
+
+class RequestStats:
+    """1リクエスト分の計測値"""
+
+    __slots__ = (
+        'started', 'sql_count', 'sql_time', 'statements', 'emit_count', 'emits', 'feed_changes',
+        'duration', 'response_size',
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.statements = []  # (秒, SQL文)
+        self.emit_count = 0
+        self.emits = {}  # イベント名 → 送信回数
+        # コミットした変更レコード数（変更通知の送信は別のグリーンスレッドで行うため、送信元の
+        # リクエストには送信回数ではなくこの件数を記録する）
+        self.feed_changes = 0
+        self.duration = None
+        self.response_size = None
+
+    def add_statement(self, elapsed, statement, keep):
+        self.sql_count += 1
+        self.sql_time += elapsed
+        # 遅い順に keep 件だけ保持する
+        if keep > 0:
+            self.statements.append((elapsed, statement))
+            if len(self.statements) > keep:
+                self.statements.sort(key=lambda s: s[0], reverse=True)
+                del self.statements[keep:]
+
+    def add_emit(self, event_name):
+        self.emit_count += 1
+        self.emits[event_name] = self.emits.get(event_name, 0) + 1
+
+    def add_feed_changes(self, count):
+        self.feed_changes += count
+
+    def slowest_statements(self):
+        return sorted(self.statements, key=lambda s: s[0], reverse=True)
+
+
+def current_request_stats():
+    """実行中のリクエストの計測値（リクエスト外・計測無効の場合はNone）"""
+    if not has_request_context():
+        return None
+    return g.get('request_stats')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get('query_start_time')
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+
+    stats = current_request_stats()
+    if stats is not None:
+        stats.add_statement(elapsed, statement, g.get('request_stats_keep', 0))
+
+
+def add_emit_hook(socketio, hook):
+    """socketio.emit の呼び出しごとに hook(イベント名) を呼ぶ
+
+    socketio.emit を置き換えるラッパーは最初の1回だけ作り、以降は hook を追加する
+    （リクエスト計測・Prometheus の送信回数など、計測ごとにラッパーを重ねない）。
+    """
+    hooks = getattr(socketio, 'emit_hooks', None)
+    if hooks is None:
+        hooks = socketio.emit_hooks = []
+        original_emit = socketio.emit
+
+        def emit(event_name, *args, **kwargs):
+            for emit_hook in hooks:
+                emit_hook(event_name)
+            return original_emit(event_name, *args, **kwargs)
+
+        socketio.emit = emit
+    hooks.append(hook)
+    return socketio
+
+
+def _record_request_emit(event_name):
+    stats = current_request_stats()
+    if stats is not None:
+        stats.add_emit(event_name)
+
+
+def instrument_socketio(socketio):
+    """socketio.emit の呼び出し回数をリクエストの計測値に記録する"""
+    return add_emit_hook(socketio, _record_request_emit)
+
+
+def init_instrumentation(app):
+    """リクエスト計測を登録する
+
+    Server-Timing ヘッダーに処理時間・DB時間・SQL件数（Socket送信・変更通知の件数）を付け、
+    しきい値を超えたリクエストは遅いSQL文とあわせて警告ログに出す。
+
+    設定:
+        INSTRUMENTATION_ENABLED: 計測の有効/無効
+        SLOW_REQUEST_THRESHOLD_MS: 警告ログを出す処理時間（ミリ秒）
+        SLOW_REQUEST_LOG_STATEMENTS: 警告ログに出す遅いSQL文の件数
+    """
+    app.config.setdefault('INSTRUMENTATION_ENABLED', True)
+    app.config.setdefault('SLOW_REQUEST_THRESHOLD_MS', 1000)
+    app.config.setdefault('SLOW_REQUEST_LOG_STATEMENTS', 5)
+
+    if not app.config['INSTRUMENTATION_ENABLED']:
+        return
+
+    # 全エンジン共通（db.engine はアプリコンテキストが必要なため Engine クラスに登録）
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_stats():
+        g.request_stats = RequestStats()
+        g.request_stats_keep = app.config['SLOW_REQUEST_LOG_STATEMENTS']
+
+    # 圧縮より先に登録する（after_request は登録の逆順に実行されるため、圧縮後のサイズになる）
+    @app.after_request
+    def finish_request_stats(response):
+        stats = current_request_stats()
+        if stats is None:
+            return response
+
+        stats.duration = time.perf_counter() - stats.started
+        if not response.is_streamed:
+            stats.response_size = response.calculate_content_length()
+
+        server_timing = (
+            f'app;dur={stats.duration * 1000:.1f}, '
+            f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries"'
+        )
+        if stats.emit_count or stats.feed_changes:
+            server_timing += f', socket;desc="{stats.emit_count} emits, {stats.feed_changes} changes"'
+        response.headers.add('Server-Timing', server_timing)
+
+        duration_ms = stats.duration * 1000
+        if duration_ms >= app.config['SLOW_REQUEST_THRESHOLD_MS']:
+            lines = [
+                f"遅いリクエスト: {request.method} {request.full_path.rstrip('?')} -> {response.status_code} "
+                f"{duration_ms:.1f}ms (SQL {stats.sql_count}件 {stats.sql_time * 1000:.1f}ms, "
+                f"レスポンス {stats.response_size if stats.response_size is not None else '-'} bytes, "
+                f"Socket送信 {stats.emit_count}件, 変更通知 {stats.feed_changes}件)"
+            ]
+            for elapsed, statement in stats.slowest_statements():
+                statement = ' '.join(statement.split())[:STATEMENT_LOG_LENGTH]
+                lines.append(f"  {elapsed * 1000:8.1f}ms  {statement}")
+            app.logger.warning('\n'.join(lines))
+
+        return response
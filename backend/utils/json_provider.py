@@ -0,0 +1,58 @@
+# utils/json_provider.py - orjson による JSON プロバイダー
+
+from flask.json.provider import DefaultJSONProvider
+
+# orjson は任意（未インストールの場合は Flask 標準の json を使う）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson でエンコード・デコードする JSON プロバイダー
+
+    日時・dataclass などはこれまでと同じ出力になるよう Flask 標準の変換に任せる
+    （datetime は HTTP 日付形式のまま）。レスポンスのキーは並べ替えない。
+    """
+
+    sort_keys = False
+
+    def _options(self, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, pretty=False):
+        """バイト列のまま返す（レスポンス生成用）"""
+        return orjson.dumps(obj, default=self.default, option=self._options(pretty))
+
+    def dumps(self, obj, **kwargs):
+        # json.dumps 固有の引数（cls など）が指定された場合は標準の実装を使う
+        if set(kwargs) - {'default', 'ensure_ascii', 'sort_keys', 'indent'}:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, pretty=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(
+            self.dumps_bytes(obj, pretty=pretty) + b'\n',
+            mimetype=self.mimetype
+        )
+
+
+def init_json_provider(app):
+    """orjson が利用できる場合はアプリの JSON プロバイダーを差し替える"""
+    if orjson is None:
+        app.logger.warning('orjson が見つからないため標準の JSON プロバイダーを使用します')
+        return
+    app.json = OrjsonProvider(app)
@@ -0,0 +1,283 @@
+# utils/metrics.py - Prometheus 形式のメトリクス
+#
+# gunicorn の複数ワーカーで動かす場合は環境変数 PROMETHEUS_MULTIPROC_DIR に
+# 全ワーカー共通の空ディレクトリを指定する（起動前に中身を消しておくこと）。
+# /api/metrics はどのワーカーが応答しても全ワーカーの合計を返す。
+# 終了したワーカーの接続数などを除くため、gunicorn の設定の child_exit から
+# mark_worker_dead(worker.pid) を呼ぶ。
+
+import hmac
+import os
+import time
+
+from flask import Response, g, request
+
+# prometheus_client は任意（未インストールの場合は計測しない）
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    )
+    from prometheus_client import multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    CollectorRegistry = None
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from utils.instrumentation import add_emit_hook
+
+# ヒストグラムのバケット（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+if CollectorRegistry is not None:
+    REQUEST_LATENCY = Histogram(
+        'worklog_http_request_duration_seconds', 'HTTPリクエストの処理時間',
+        ('blueprint', 'endpoint', 'method', 'status'), buckets=LATENCY_BUCKETS
+    )
+    DB_POOL_CHECKOUT_WAIT = Histogram(
+        'worklog_db_pool_checkout_wait_seconds', 'DB接続プールからの取得待ち時間',
+        buckets=POOL_WAIT_BUCKETS
+    )
+    DB_POOL_IN_USE = Gauge(
+        'worklog_db_pool_connections_in_use', '使用中のDB接続数', multiprocess_mode='livesum'
+    )
+    SOCKET_CONNECTED_CLIENTS = Gauge(
+        'worklog_socketio_connected_clients', 'Socket.IOの接続数（ルームの種類別）',
+        ('room_type',), multiprocess_mode='livesum'
+    )
+    SOCKET_EMITS = Counter(
+        'worklog_socketio_emits', 'Socket.IOの送信回数（イベント別）', ('event',)
+    )
+    EMAIL_SEND_LATENCY = Histogram(
+        'worklog_email_send_duration_seconds', 'メール送信の処理時間', buckets=LATENCY_BUCKETS
+    )
+    EMAIL_SEND_FAILURES = Counter(
+        'worklog_email_send_failures', 'メール送信の失敗回数'
+    )
+    JOB_DURATION = Histogram(
+        'worklog_scheduler_job_duration_seconds', '定期ジョブの処理時間', ('job', 'status'),
+        buckets=LATENCY_BUCKETS + (60.0, 300.0, 900.0)
+    )
+    JOB_LAST_SUCCESS = Gauge(
+        'worklog_scheduler_job_last_success_timestamp_seconds', '定期ジョブの最終成功時刻（UNIX時間）',
+        ('job',), multiprocess_mode='max'
+    )
+
+
+def metrics_enabled():
+    return CollectorRegistry is not None
+
+
+class TimedQueuePool(QueuePool):
+    """接続の取得待ち時間を計測する QueuePool"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_IN_USE.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_IN_USE.dec()
+
+
+def instrument_engine_options(app):
+    """DB接続プールの計測を設定する（db.init_app より前に呼ぶ）"""
+    if not metrics_enabled():
+        return
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        return
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    options.setdefault('poolclass', TimedQueuePool)
+
+    if not event.contains(QueuePool, 'checkout', _on_checkout):
+        event.listen(QueuePool, 'checkout', _on_checkout)
+        event.listen(QueuePool, 'checkin', _on_checkin)
+
+
+def _count_emit(event_name):
+    SOCKET_EMITS.labels(event=event_name).inc()
+
+
+def instrument_socketio_emits(socketio):
+    """socketio.emit の回数をイベント名別に数える"""
+    if not metrics_enabled():
+        return socketio
+    return add_emit_hook(socketio, _count_emit)
+
+
+def socket_client_connected(room_type):
+    if metrics_enabled():
+        SOCKET_CONNECTED_CLIENTS.labels(room_type=room_type).inc()
+
+
+def socket_client_disconnected(room_type):
+    if metrics_enabled():
+        SOCKET_CONNECTED_CLIENTS.labels(room_type=room_type).dec()
+
+
+class EmailSendTimer:
+    """メール送信の処理時間と失敗を記録するコンテキストマネージャー
+
+    with EmailSendTimer() as timer:
+        ...
+        timer.failed()  # 例外以外で失敗した場合
+    """
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.has_failed = False
+        return self
+
+    def failed(self):
+        self.has_failed = True
+
+    def __exit__(self, exc_type, exc, tb):
+        if metrics_enabled():
+            EMAIL_SEND_LATENCY.observe(time.perf_counter() - self.start)
+            if exc_type is not None or self.has_failed:
+                EMAIL_SEND_FAILURES.inc()
+        return False
+
+
+def observe_job(job, seconds, status):
+    """定期ジョブ1回分の処理時間と結果を記録する（status: success / failure）"""
+    if not metrics_enabled():
+        return
+    JOB_DURATION.labels(job=job, status=status).observe(seconds)
+    if status == 'success':
+        JOB_LAST_SUCCESS.labels(job=job).set(time.time())
+
+
+class QueueDepthCollector:
+    """取得時にDBから未処理の件数を数えるコレクター（どのワーカーでも同じ値になる）"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _family(self):
+        return GaugeMetricFamily(
+            'worklog_pending_queue_depth', '未処理の件数（キュー別）', labels=('queue',)
+        )
+
+    def describe(self):
+        # 登録時に collect() が呼ばれてDBに接続しないようにする
+        yield self._family()
+
+    def collect(self):
+        from sqlalchemy import func
+        from models import db, WorkLog
+
+        family = self._family()
+        with self.app.app_context():
+            try:
+                rows = db.session.query(WorkLog.status, func.count())\
+                    .filter(WorkLog.status.in_(('pending_add', 'pending_edit', 'pending_delete')))\
+                    .group_by(WorkLog.status).all()
+                counts = dict(rows)
+                for status in ('pending_add', 'pending_edit', 'pending_delete'):
+                    family.add_metric((status,), counts.get(status, 0))
+                # メール送信キューの未送信数
+                from models import EmailOutbox
+                family.add_metric(('email_outbox',), EmailOutbox.query.filter(
+                    EmailOutbox.status.in_(('pending', 'sending'))
+                ).count())
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f"メトリクスの件数取得エラー: {str(e)}")
+            finally:
+                db.session.remove()
+        yield family
+
+
+# グローバルの REGISTRY に登録済みの QueueDepthCollector（単一プロセスの場合）
+_queue_depth_collector = None
+
+
+def _build_registry(app):
+    global _queue_depth_collector
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # 各ワーカーが書き出したファイルを集計する（アプリごとに別のレジストリ）
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(QueueDepthCollector(app))
+        return registry
+
+    # グローバルの REGISTRY には1回だけ登録し、同じプロセスで create_app が複数回
+    # 呼ばれた場合（CLI とWebの併用など）は最後に作成したアプリで件数を数える
+    if _queue_depth_collector is None:
+        _queue_depth_collector = QueueDepthCollector(app)
+        REGISTRY.register(_queue_depth_collector)
+    else:
+        _queue_depth_collector.app = app
+    return REGISTRY
+
+
+def init_metrics(app):
+    """リクエストの処理時間の計測と /api/metrics 用のレスポンス生成を登録する"""
+    if not metrics_enabled():
+        app.logger.warning('prometheus_client が見つからないためメトリクスを無効にします')
+        return
+
+    registry = _build_registry(app)
+    app.extensions['metrics_registry'] = registry
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request_latency(response):
+        started = g.get('metrics_started')
+        if started is not None and request.endpoint != 'metrics':
+            REQUEST_LATENCY.labels(
+                blueprint=request.blueprint or '',
+                endpoint=request.endpoint or 'unknown',
+                method=request.method,
+                status=str(response.status_code)
+            ).observe(time.perf_counter() - started)
+        return response
+
+
+def mark_worker_dead(pid):
+    """終了したワーカーのマルチプロセス用ファイルを片付ける（gunicorn の child_exit 用）"""
+    if metrics_enabled() and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
+
+
+def metrics_access_allowed(app):
+    """/api/metrics へのアクセスを許可するか
+
+    METRICS_TOKEN と一致する Bearer トークン（Prometheus からの取得用）、
+    または最高権限（role_level 3）の管理者のログインが必要。
+    """
+    token = app.config.get('METRICS_TOKEN')
+    authorization = request.headers.get('Authorization', '')
+    if token and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+        return True
+
+    from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+    from utils.auth_helpers import load_current_user
+
+    verify_jwt_in_request(optional=True)
+    if get_jwt_identity() is None:
+        return False
+    user = load_current_user()
+    return user is not None and user.role_level >= 3
+
+
+def metrics_response(app):
+    """Prometheus のテキスト形式のレスポンス"""
+    registry = app.extensions.get('metrics_registry')
+    if registry is None:
+        return Response('metrics disabled\n', status=503, mimetype='text/plain')
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
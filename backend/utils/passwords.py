@@ -0,0 +1,60 @@
+# utils/passwords.py - パスワードのハッシュ化・照合（eventlet のスレッドプールで実行）
+#
+# werkzeug の generate_password_hash / check_password_hash は1回で数十〜数百ミリ秒CPUを使う。
+# eventlet ではすべてのリクエストと Socket.IO 接続が1つのハブ上で動くため、そのまま呼ぶと
+# 朝のログインが集中したときに計算の間ほかの処理が止まる。
+# ここでは eventlet.tpool の OS スレッドで計算し、待っている間はハブをほかのリクエストに譲る。
+# （ハッシュ計算は hashlib が GIL を解放して行うため、スレッド数だけ並列に動く）
+
+from eventlet import GreenPool, patcher, tpool
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+def init_password_hashing(app):
+    """パスワードのハッシュ化に使うスレッドプールを設定する
+
+    スレッドプールは最初の利用時に作られるため、アプリ作成時に呼ぶ。
+
+    設定:
+        PASSWORD_HASH_OFFLOAD: ハッシュ計算をスレッドプールで行う
+        PASSWORD_HASH_THREADS: eventlet のスレッドプールのスレッド数
+    """
+    app.config.setdefault('PASSWORD_HASH_OFFLOAD', True)
+    app.config.setdefault('PASSWORD_HASH_THREADS', 4)
+    tpool.set_num_threads(app.config['PASSWORD_HASH_THREADS'])
+
+
+def _offload_enabled():
+    # monkey_patch していないプロセス（スクリプトなど）ではハブがないので直接呼ぶ
+    return current_app.config.get('PASSWORD_HASH_OFFLOAD', True) and patcher.is_monkey_patched('thread')
+
+
+def _offload(func, *args):
+    if _offload_enabled():
+        return tpool.execute(func, *args)
+    return func(*args)
+
+
+def hash_password(password):
+    """パスワードのハッシュを作る（generate_password_hash と同じ形式）"""
+    return _offload(generate_password_hash, password)
+
+
+def verify_password(password_hash, password):
+    """パスワードがハッシュと一致するか確認する"""
+    return _offload(check_password_hash, password_hash, password)
+
+
+def hash_passwords(passwords):
+    """複数のパスワードのハッシュをスレッドプールで並列に作る（一括登録用）
+
+    Returns:
+        list of str: passwords と同じ順序のハッシュ
+    """
+    if not _offload_enabled():
+        return [generate_password_hash(password) for password in passwords]
+
+    # 同時に投入するのはスレッド数まで（残りは GreenPool で待たせる）
+    pool = GreenPool(current_app.config.get('PASSWORD_HASH_THREADS', 4))
+    return list(pool.imap(lambda password: tpool.execute(generate_password_hash, password), passwords))
@@ -0,0 +1,249 @@
+# utils/profiling.py - 本番リクエストのオンデマンドプロファイリング
+#
+# 次のどちらかの場合にリクエストをプロファイラー付きで実行し、結果を
+# PROFILE_DIR にサーバーで採番したプロファイルIDをファイル名にして保存する。
+#   - 管理者が X-Profile-Request: 1 ヘッダーを付けて送ったリクエスト
+#   - PROFILE_SAMPLE_RATE（0〜1）の割合で抽出したリクエスト
+# pyinstrument があればサンプリングプロファイラーで speedscope 形式（フレームグラフ表示用）、
+# 無ければ cProfile で pstats 形式を保存する。
+#
+# クライアントの X-Request-ID はログとの突き合わせ用にメタデータとレスポンスに返すだけで、
+# ファイル名には使わない（同じIDを送って保存済みのプロファイルを上書きできないように）。
+#
+# eventlet ではすべてのグリーンスレッドが同じOSスレッドで動き、プロファイラー
+# （sys.setprofile / setstatprofile）はOSスレッド単位のため、同時に計測できるのは
+# プロセスごとに1リクエストだけにする（計測中に来た対象リクエストは計測せずに処理する）。
+# 計測中のリクエストが I/O 待ちの間にほかのグリーンスレッドが動いた分は、そのプロファイルに含まれる。
+
+import cProfile
+import json
+import os
+import random
+import re
+import time
+import uuid
+from datetime import datetime
+
+from flask import g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+# pyinstrument は任意（未インストールの場合は cProfile）
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    Profiler = None
+
+PROFILE_HEADER = 'X-Profile-Request'
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# リクエストIDとして受け付ける形式（英数字と - _ のみ）
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+# プロファイルID（uuid4 の16進）
+PROFILE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# プロセスで計測中のプロファイル（同時に1つだけ）
+_active_profile = {'profiler': None}
+
+# 保存形式 → 拡張子
+PROFILE_EXTENSIONS = {
+    'speedscope': '.speedscope.json',
+    'pstats': '.pstats',
+}
+
+
+def profile_dir(app):
+    return app.config['PROFILE_DIR']
+
+
+def _request_id():
+    """リクエストIDを返す（受け取ったIDが正しい形式ならそれを使う）"""
+    request_id = request.headers.get(REQUEST_ID_HEADER, '')
+    if REQUEST_ID_PATTERN.match(request_id):
+        return request_id
+    return uuid.uuid4().hex
+
+
+def _is_admin_request():
+    """管理者のトークン付きリクエストかどうか"""
+    from utils.auth_helpers import load_current_user
+    try:
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+    except Exception:
+        return False
+    if not user_id:
+        return False
+    user = load_current_user()
+    return bool(user and user.role_level >= 2)
+
+
+def _should_profile(app):
+    if request.headers.get(PROFILE_HEADER) == '1' and _is_admin_request():
+        return 'header'
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate > 0 and random.random() < rate:
+        return 'sampled'
+    return None
+
+
+class _RequestProfiler:
+    """pyinstrument / cProfile の差を吸収する"""
+
+    def __init__(self, interval):
+        if Profiler is not None:
+            self.format = 'speedscope'
+            self.profiler = Profiler(interval=interval, async_mode='disabled')
+        else:
+            self.format = 'pstats'
+            self.profiler = cProfile.Profile()
+
+    def start(self):
+        if self.format == 'speedscope':
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+
+    def stop(self):
+        if self.format == 'speedscope':
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+
+    def save(self, path):
+        if self.format == 'speedscope':
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.profiler.output(renderer=SpeedscopeRenderer()))
+        else:
+            self.profiler.dump_stats(path)
+
+
+def _prune(directory, max_files):
+    """古いプロファイルを削除して max_files 件に抑える"""
+    metas = sorted(
+        (name for name in os.listdir(directory) if name.endswith('.meta.json')),
+        key=lambda name: os.path.getmtime(os.path.join(directory, name)),
+        reverse=True
+    )
+    for name in metas[max_files:]:
+        profile_id = name[:-len('.meta.json')]
+        for suffix in ('.meta.json', *PROFILE_EXTENSIONS.values()):
+            path = os.path.join(directory, profile_id + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def list_profiles(app):
+    """保存済みプロファイルのメタデータ一覧（新しい順）"""
+    directory = profile_dir(app)
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if not name.endswith('.meta.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    profiles.sort(key=lambda p: p.get('created_at', ''), reverse=True)
+    return profiles
+
+
+def find_profile(app, profile_id):
+    """プロファイルIDからプロファイルのファイルパスとメタデータを返す（無ければ (None, None)）"""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None, None
+    directory = profile_dir(app)
+    meta_path = os.path.join(directory, profile_id + '.meta.json')
+    if not os.path.exists(meta_path):
+        return None, None
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    path = os.path.join(directory, profile_id + PROFILE_EXTENSIONS[meta['format']])
+    if not os.path.exists(path):
+        return None, None
+    return path, meta
+
+
+def init_profiling(app):
+    """オンデマンドプロファイリングを登録する
+
+    設定:
+        PROFILE_ENABLED: 機能の有効/無効（無効時はヘッダーも無視する）
+        PROFILE_SAMPLE_RATE: 自動で抽出するリクエストの割合（0で抽出しない）
+        PROFILE_DIR: 保存先ディレクトリ
+        PROFILE_INTERVAL: サンプリング間隔（秒、pyinstrument のみ）
+        PROFILE_MAX_FILES: 保存するプロファイルの最大件数
+    """
+    app.config.setdefault('PROFILE_ENABLED', True)
+    app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+    app.config.setdefault('PROFILE_INTERVAL', 0.001)
+    app.config.setdefault('PROFILE_MAX_FILES', 200)
+
+    if not app.config['PROFILE_ENABLED']:
+        return
+
+    @app.before_request
+    def start_profiling():
+        g.request_id = _request_id()
+        trigger = _should_profile(app)
+        if trigger is None:
+            return
+        if _active_profile['profiler'] is not None:
+            # 別のリクエストを計測中（同じOSスレッドで2つのプロファイラーは動かせない）
+            app.logger.info(f"プロファイル計測中のため計測しません: {request.method} {request.path}")
+            return
+        profiler = _RequestProfiler(app.config['PROFILE_INTERVAL'])
+        _active_profile['profiler'] = profiler
+        g.profiler = profiler
+        g.profile_trigger = trigger
+        g.profile_started = time.perf_counter()
+        profiler.start()
+
+    @app.after_request
+    def stop_profiling(response):
+        response.headers[REQUEST_ID_HEADER] = g.get('request_id', '')
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.stop()
+        _active_profile['profiler'] = None
+        duration = time.perf_counter() - g.profile_started
+
+        try:
+            directory = profile_dir(app)
+            os.makedirs(directory, exist_ok=True)
+            profile_id = uuid.uuid4().hex
+            profiler.save(os.path.join(directory, profile_id + PROFILE_EXTENSIONS[profiler.format]))
+            meta = {
+                'profile_id': profile_id,
+                'request_id': g.request_id,
+                'format': profiler.format,
+                'trigger': g.profile_trigger,
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 1),
+                'created_at': datetime.utcnow().isoformat(),
+            }
+            with open(os.path.join(directory, profile_id + '.meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            _prune(directory, app.config['PROFILE_MAX_FILES'])
+            response.headers['X-Profile-Id'] = profile_id
+        except Exception as e:
+            app.logger.error(f"プロファイルの保存に失敗しました: {str(e)}")
+
+        return response
+
+    @app.teardown_request
+    def release_profiler(exc):
+        # after_request まで到達しなかった場合も計測を止めて次のリクエストが計測できるようにする
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
+            _active_profile['profiler'] = None
@@ -0,0 +1,180 @@
+# utils/serializers.py - 一覧系レスポンスの行シリアライザー
+#
+# ORM オブジェクトを組み立てずに、カラムのタプル（SQLAlchemy の Row）から
+# レスポンス用の辞書を作る。フィールド定義から変換関数を1つ作っておき、
+# 行ごとにフィールド定義をたどる処理を省く。
+
+from functools import lru_cache
+
+from utils.time_format import format_jst, format_jst_column
+
+
+# 変換の種類（カラムの値を受け取ってレスポンスの値を返す関数、AS_IS はそのまま）
+# str・format_jst（日本時間のISO形式）はそのまま変換の種類として使う
+AS_IS = None
+
+
+def or_empty(value):
+    return value or ''
+
+
+def iso_or_empty(value):
+    return value.isoformat() if value else ''
+
+
+def iso_or_none(value):
+    return value.isoformat() if value else None
+
+
+def str_or_empty(value):
+    return str(value) if value is not None else ''
+
+
+def or_unknown(value):
+    return value if value is not None else '不明'
+
+
+# 変換の種類 → カラム全体（値の並び）をまとめて変換する関数
+# 一覧では値ごとに関数を呼ばず、カラムごとに1回の内包表記で変換する
+COLUMN_CONVERSIONS = {
+    or_empty: lambda values: [value or '' for value in values],
+    iso_or_empty: lambda values: [value.isoformat() if value else '' for value in values],
+    iso_or_none: lambda values: [value.isoformat() if value else None for value in values],
+    str: lambda values: [str(value) for value in values],
+    str_or_empty: lambda values: [str(value) if value is not None else '' for value in values],
+    format_jst: format_jst_column,
+    or_unknown: lambda values: [value if value is not None else '不明' for value in values],
+}
+
+
+def _column_converter(conversion):
+    """変換の種類から「カラムの値の並び → 変換後のリスト」の関数を返す（AS_IS は None）"""
+    if conversion is AS_IS:
+        return None
+    if conversion in COLUMN_CONVERSIONS:
+        return COLUMN_CONVERSIONS[conversion]
+    return lambda values: list(map(conversion, values))
+
+
+def compile_rows_serializer(fields):
+    """フィールド定義から「行のリスト → 辞書のリスト」の変換関数を作る
+
+    行をカラムごとに並べ替え、変換が必要なカラムだけをカラム単位でまとめて変換してから
+    行の辞書に組み直す（日時のように1件ずつ変換すると遅いカラムも1回の呼び出しで済む）。
+
+    Args:
+        fields (tuple): (レスポンスのキー, カラム名, 変換の種類) のタプル
+
+    Returns:
+        function: 行のリストを辞書のリストに変換する関数
+            fields より後ろのカラムは無視する
+    """
+    keys = tuple(key for key, _, _ in fields)
+    converters = tuple(_column_converter(conversion) for _, _, conversion in fields)
+
+    def serialize(rows):
+        if not rows:
+            return []
+        # zip は短いほうに合わせるため、fields より後ろのカラムはここで落ちる
+        columns = [
+            values if convert is None else convert(values)
+            for convert, values in zip(converters, zip(*rows))
+        ]
+        return [dict(zip(keys, values)) for values in zip(*columns)]
+
+    return serialize
+
+
+def row_columns(model, fields):
+    """フィールド定義の順にモデルのカラムを返す（with_entities / select 用）"""
+    return tuple(getattr(model, column) for _, column, _ in fields)
+
+
+def select_fields(fields, names):
+    """fields= パラメータで指定されたフィールドだけを定義の順に選ぶ
+
+    Args:
+        fields (tuple): フィールド定義
+        names (str or None): レスポンスのキーのカンマ区切り（未指定の場合はすべて）
+
+    Returns:
+        tuple: 選んだフィールド定義
+
+    Raises:
+        ValueError: 定義にないキーが指定された場合
+    """
+    requested = {name.strip() for name in (names or '').split(',') if name.strip()}
+    if not requested:
+        return fields
+    unknown = requested - {key for key, _, _ in fields}
+    if unknown:
+        raise ValueError(f"不明なフィールドです: {', '.join(sorted(unknown))}")
+    return tuple(field for field in fields if field[0] in requested)
+
+
+# fields= で選んだ組み合わせごとの変換関数（作成は組み合わせごとに1回）
+cached_rows_serializer = lru_cache(maxsize=256)(compile_rows_serializer)
+
+
+# 工数履歴（/worklog_history）
+WORKLOG_HISTORY_FIELDS = (
+    ('id', 'id', AS_IS),
+    ('date', 'date', iso_or_empty),
+    ('model', 'model', or_empty),
+    ('serialNumber', 'serial_number', or_empty),
+    ('workOrder', 'work_order', or_empty),
+    ('partNumber', 'part_number', or_empty),
+    ('orderNumber', 'order_number', or_empty),
+    ('quantity', 'quantity', str_or_empty),
+    ('unitName', 'unit_name', AS_IS),
+    ('workType', 'work_type', AS_IS),
+    ('minutes', 'minutes', str),
+    ('remarks', 'remarks', or_empty),
+    ('status', 'status', AS_IS),
+    ('editReason', 'edit_reason', or_empty),
+    ('originalId', 'original_id', AS_IS),
+    ('updatedAt', 'updated_at', format_jst),
+)
+
+# 管理者用工数一覧（/admin_worklog）
+ADMIN_WORKLOG_FIELDS = WORKLOG_HISTORY_FIELDS[:-1] + (
+    ('employeeId', 'employee_id', AS_IS),
+)
+
+# 管理者用工数一覧に付ける社員情報（users を外部結合して取得、社員が見つからない場合は「不明」）
+ADMIN_WORKLOG_USER_FIELDS = (
+    ('employeeName', 'name', or_unknown),
+    ('department', 'department_name', or_unknown),
+    ('position', 'position', or_unknown),
+)
+
+# チャットメッセージ（/chat/messages）
+CHAT_MESSAGE_FIELDS = (
+    ('id', 'id', AS_IS),
+    ('sender_id', 'sender_id', AS_IS),
+    ('receiver_id', 'receiver_id', AS_IS),
+    ('message', 'message', AS_IS),
+    ('is_read', 'is_read', AS_IS),
+    ('is_edited', 'is_edited', AS_IS),
+    ('created_at', 'created_at', format_jst),
+    ('updated_at', 'updated_at', format_jst),
+)
+
+# ユーザー一覧（/users・/admin_users）、User.to_dict と同じ形
+USER_FIELDS = (
+    ('id', 'id', AS_IS),
+    ('employee_id', 'employee_id', AS_IS),
+    ('name', 'name', AS_IS),
+    ('department_name', 'department_name', AS_IS),
+    ('position', 'position', AS_IS),
+    ('email', 'email', AS_IS),
+    ('role_level', 'role_level', AS_IS),
+    ('default_unit', 'default_unit', AS_IS),
+    ('created_at', 'created_at', iso_or_none),
+    ('last_active_page', 'last_active_page', AS_IS),
+    ('sound_enabled', 'sound_enabled', AS_IS),
+)
+
+serialize_worklog_history_rows = compile_rows_serializer(WORKLOG_HISTORY_FIELDS)
+serialize_admin_worklog_rows = compile_rows_serializer(ADMIN_WORKLOG_FIELDS + ADMIN_WORKLOG_USER_FIELDS)
+serialize_chat_message_rows = compile_rows_serializer(CHAT_MESSAGE_FIELDS)
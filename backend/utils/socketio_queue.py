@@ -0,0 +1,175 @@
+# utils/socketio_queue.py - 複数ワーカー間の Socket.IO 通知（メッセージキュー）
+#
+# SocketIO はメッセージキューが無いと、送信元のプロセスに接続しているクライアントにしか
+# 届かない。SOCKETIO_MESSAGE_QUEUE で次のどちらかを選ぶと、どのワーカーから emit しても
+# 全ワーカーの接続先に届く。
+#   - redis://...  : Redis の pub/sub（Flask-SocketIO 標準の RedisManager、redis パッケージが必要）
+#   - postgresql   : DATABASE_URL の PostgreSQL の LISTEN/NOTIFY（追加のサーバー不要）
+#                    postgresql://... で別のデータベースを指定することもできる
+#
+# 複数ワーカーで動かす場合、ロードバランサーはスティッキーセッションにするか、
+# クライアントを WebSocket のみで接続させること（ポーリングは同じワーカーに届く必要がある）。
+
+import json
+import select
+import threading
+import time
+
+try:
+    import psycopg2
+    from psycopg2 import sql
+except ImportError:
+    psycopg2 = None
+
+from socketio import PubSubManager
+
+# NOTIFY のペイロード上限は 8000 バイト。超えるものは socketio_messages に保存して ID を送る
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+# 受信待ちのタイムアウト（秒）。この間隔で古い保存済みメッセージを削除する
+LISTEN_POLL_INTERVAL = 5
+
+
+def postgres_dsn(url):
+    """SQLAlchemy の URL を libpq の接続文字列にする（postgresql+psycopg2:// → postgresql://）"""
+    scheme, _, rest = url.partition('://')
+    return 'postgresql://' + rest if scheme.startswith('postgresql') else url
+
+
+class PostgresManager(PubSubManager):
+    """PostgreSQL の LISTEN/NOTIFY を使う Socket.IO のクライアントマネージャー
+
+    通知は送信用・受信用それぞれ専用の接続（autocommit）で行い、アプリの
+    トランザクションとは独立して即時に配信する。
+
+    Args:
+        url (str): PostgreSQL の接続URL
+        channel (str): NOTIFY のチャンネル名
+        write_only (bool): 送信のみ（受信スレッドを起動しない）
+        retention_seconds (int): 大きなメッセージを保存しておく時間（秒）
+    """
+
+    name = 'postgresql'
+
+    def __init__(self, url, channel='socketio', write_only=False, logger=None, retention_seconds=300):
+        if psycopg2 is None:
+            raise RuntimeError('PostgreSQL のメッセージキューには psycopg2 が必要です')
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.dsn = postgres_dsn(url)
+        self.retention_seconds = retention_seconds
+        self.publish_connection = None
+        self.publish_lock = threading.Lock()
+
+    def initialize(self):
+        super().initialize()
+        if self.server.async_mode == 'eventlet':
+            from eventlet.patcher import is_monkey_patched
+            if not (is_monkey_patched('socket') and is_monkey_patched('select')):
+                raise RuntimeError('PostgreSQL のメッセージキューには eventlet.monkey_patch() が必要です')
+
+    def _connect(self):
+        connection = psycopg2.connect(self.dsn, application_name='worklog-socketio')
+        connection.autocommit = True
+        return connection
+
+    def _encode(self, cursor, data):
+        """NOTIFY で送る文字列（'i:<JSON>' または大きい場合は 'r:<送信元>:<保存ID>'）"""
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        if len(payload.encode('utf-8')) <= NOTIFY_PAYLOAD_LIMIT:
+            return 'i:' + payload
+        cursor.execute("INSERT INTO socketio_messages (payload) VALUES (%s) RETURNING id", (payload,))
+        return f'r:{self.host_id}:{cursor.fetchone()[0]}'
+
+    def _publish(self, data):
+        with self.publish_lock:
+            for attempt in range(2):
+                try:
+                    if self.publish_connection is None or self.publish_connection.closed:
+                        self.publish_connection = self._connect()
+                    with self.publish_connection.cursor() as cursor:
+                        cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, self._encode(cursor, data)))
+                    return
+                except psycopg2.Error as e:
+                    self.publish_connection = None
+                    if attempt == 0:
+                        self._get_logger().error(f'PostgreSQL への送信に失敗しました。再接続します: {e}')
+                    else:
+                        self._get_logger().error(f'PostgreSQL への送信に失敗しました: {e}')
+
+    def _decode(self, cursor, payload):
+        kind, _, body = payload.partition(':')
+        if kind == 'i':
+            return body
+        if kind == 'r':
+            host_id, _, message_id = body.partition(':')
+            if host_id == self.host_id:
+                # 自分が送ったメッセージは送信時に処理済み
+                return None
+            cursor.execute("SELECT payload FROM socketio_messages WHERE id = %s", (int(message_id),))
+            row = cursor.fetchone()
+            if row is None:
+                self._get_logger().error(f'Socket.IO メッセージ {message_id} が見つかりません（保存期間切れ）')
+                return None
+            return row[0]
+        return None
+
+    def _prune(self, cursor):
+        cursor.execute(
+            "DELETE FROM socketio_messages WHERE created_at < now() - make_interval(secs => %s)",
+            (self.retention_seconds,)
+        )
+
+    def _listen(self):
+        retry_sleep = 1
+        while True:
+            connection = None
+            try:
+                connection = self._connect()
+                with connection.cursor() as cursor:
+                    cursor.execute(sql.SQL('LISTEN {}').format(sql.Identifier(self.channel)))
+                    retry_sleep = 1
+                    last_prune = 0
+                    while True:
+                        # monkey_patch 済みの select なので他のグリーンスレッドを止めない
+                        select.select([connection], [], [], LISTEN_POLL_INTERVAL)
+                        connection.poll()
+                        while connection.notifies:
+                            message = self._decode(cursor, connection.notifies.pop(0).payload)
+                            if message is not None:
+                                yield message
+                        if time.monotonic() - last_prune >= self.retention_seconds / 2:
+                            self._prune(cursor)
+                            last_prune = time.monotonic()
+            except psycopg2.Error as e:
+                self._get_logger().error(f'PostgreSQL からの受信に失敗しました。{retry_sleep}秒後に再接続します: {e}')
+                time.sleep(retry_sleep)
+                retry_sleep = min(retry_sleep * 2, 60)
+            finally:
+                if connection is not None and not connection.closed:
+                    connection.close()
+
+
+def socketio_queue_options(app):
+    """SocketIO(...) に渡すメッセージキューの設定
+
+    設定:
+        SOCKETIO_MESSAGE_QUEUE: 未設定（1プロセスのみ）/ redis://... / postgresql / postgresql://...
+        SOCKETIO_CHANNEL: pub/sub のチャンネル名
+        SOCKETIO_QUEUE_RETENTION_SECONDS: 大きなメッセージの保存期間（PostgreSQL のみ）
+
+    Returns:
+        dict: SocketIO のキーワード引数
+    """
+    queue = app.config.get('SOCKETIO_MESSAGE_QUEUE')
+    channel = app.config.get('SOCKETIO_CHANNEL', 'worklog_socketio')
+    if not queue:
+        return {}
+    if queue.startswith(('redis://', 'rediss://', 'redis+sentinel://')):
+        return {'message_queue': queue, 'channel': channel}
+    if queue.startswith('postgresql'):
+        url = app.config['SQLALCHEMY_DATABASE_URI'] if queue == 'postgresql' else queue
+        return {'client_manager': PostgresManager(
+            url, channel=channel,
+            retention_seconds=app.config.get('SOCKETIO_QUEUE_RETENTION_SECONDS', 300)
+        )}
+    raise ValueError(f'SOCKETIO_MESSAGE_QUEUE の値が不正です: {queue}')
@@ -0,0 +1,61 @@
+# utils/time_format.py - 日本時間（JST）への変換と ISO 形式の文字列化
+#
+# DB の日時は UTC の naive datetime で保存されている。日本は 1951 年以降
+# 夏時間が無く常に UTC+9 のため、それ以降の日時は固定オフセットで変換し、
+# タイムゾーンデータベースの参照を省く。それより前の日時は zoneinfo で変換する。
+
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+JST = ZoneInfo('Asia/Tokyo')
+
+# 固定オフセットで変換できる最初の日時（UTC、最後の夏時間の終了後）
+JST_FIXED_OFFSET_SINCE = datetime(1952, 1, 1)
+
+_JST_OFFSET = timedelta(hours=9)
+_JST_SUFFIX = '+09:00'
+
+
+def to_jst(value):
+    """日時を日本時間の aware datetime にする（naive は UTC として扱う、None は None）"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(JST)
+
+
+def format_jst(value):
+    """日時を日本時間の ISO 形式の文字列にする（naive は UTC として扱う、None は None）
+
+    例: datetime(2025, 4, 1, 0, 30) → '2025-04-01T09:30:00+09:00'
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None and value >= JST_FIXED_OFFSET_SINCE:
+        return (value + _JST_OFFSET).isoformat() + _JST_SUFFIX
+    return to_jst(value).isoformat()
+
+
+def format_jst_column(values):
+    """日時のリスト（1カラム分）をまとめて日本時間の ISO 形式にする
+
+    Args:
+        values (iterable): UTC の naive datetime（None・aware も可）
+
+    Returns:
+        list: format_jst と同じ文字列（None は None）のリスト
+    """
+    offset = _JST_OFFSET
+    suffix = _JST_SUFFIX
+    since = JST_FIXED_OFFSET_SINCE
+    result = []
+    append = result.append
+    for value in values:
+        if value is None:
+            append(None)
+        elif value.tzinfo is None and value >= since:
+            append((value + offset).isoformat() + suffix)
+        else:
+            append(to_jst(value).isoformat())
+    return result
@@ -28,6 +28,10 @@ export const getAdminWorkLog = async (filters = {}, page = 1, perPage = 50, sort
     if (filters.endDate) {
       params.append('end_date', filters.endDate);
     }
+    // 全期間（開始日なし）の場合はアーカイブ済みの月も含める
+    if (!filters.startDate) {
+      params.append('include_archive', 'true');
+    }
     
     // ユニット名フィルター
     if (filters.unitName && filters.unitName !== 'all') {
@@ -125,6 +129,10 @@ export const getWorkLogCount = async (filters = {}) => {
     if (filters.endDate) {
       params.append('end_date', filters.endDate);
     }
+    // 全期間（開始日なし）の場合はアーカイブ済みの月も含める
+    if (!filters.startDate) {
+      params.append('include_archive', 'true');
+    }
     
     // フィルター条件
     if (filters.unitName && filters.unitName !== 'all') {
@@ -173,6 +181,10 @@ export const getWorkLogForCSV = async (filters = {}, sortBy = 'date', sortOrder
     if (filters.endDate) {
       params.append('end_date', filters.endDate);
     }
+    // 全期間（開始日なし）の場合はアーカイブ済みの月も含める
+    if (!filters.startDate) {
+      params.append('include_archive', 'true');
+    }
     
     // フィルター条件
     if (filters.unitName && filters.unitName !== 'all') {